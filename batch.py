@@ -0,0 +1,83 @@
+#Solve many (start, goal) queries on one static map across a pool of worker processes.
+#The map is put in shared memory once (see shared_grid.py) and every worker attaches to
+#it, so only the queries and their results are sent between processes.
+#
+#    for index, result in solve_many(pairs, terrain, algorithm='astar'):
+#        ...
+
+import multiprocessing
+from itertools import islice
+
+from shared_grid import SharedGrid, init_worker, worker_solve
+import solvers
+
+
+# Worker side: solve a chunk of (index, start, goal) queries
+def solve_chunk(chunk):
+    algorithm, queries = chunk
+    return [(index, worker_solve((start, goal, algorithm))) for index, start, goal in queries]
+
+
+# Split an iterable of (start, goal) pairs into chunks of (algorithm, [(index, start, goal), ...])
+def make_chunks(pairs, algorithm, chunksize):
+    queries = ((index, start, goal) for index, (start, goal) in enumerate(pairs))
+    while True:
+        chunk = list(islice(queries, chunksize))
+        if not chunk:
+            return
+        yield (algorithm, chunk)
+
+
+# A pool of worker processes attached to one shared map. Keep it around to run
+# several batches without setting the workers and the shared map up again
+class QueryPool(object):
+    def __init__(self, terrain, processes=None, context=None):
+        if isinstance(terrain, SharedGrid):
+            self.grid = terrain
+            self.owns_grid = False
+        else:
+            self.grid = SharedGrid.create(terrain)
+            self.owns_grid = True
+        self.processes = processes or multiprocessing.cpu_count()
+        context = multiprocessing.get_context(context)
+        self.pool = context.Pool(self.processes, initializer=init_worker, initargs=(self.grid.name,))
+
+    # Yield (index, Result) for every pair, index being the position of the pair in pairs.
+    # ordered=True yields them in the order they were submitted, ordered=False as soon as
+    # each chunk is done. By default the pairs are split into about 4 chunks per worker
+    def solve_many(self, pairs, algorithm='astar', ordered=True, chunksize=None):
+        if algorithm not in solvers.ALGORITHMS:
+            raise ValueError(f"algorithm must be one of: {list(solvers.ALGORITHMS)}")
+        if chunksize is None:
+            try:
+                chunksize = max(1, len(pairs) // (self.processes * 4))
+            except TypeError:
+                chunksize = 64
+
+        chunks = make_chunks(pairs, algorithm, chunksize)
+        results = self.pool.imap(solve_chunk, chunks) if ordered else self.pool.imap_unordered(solve_chunk, chunks)
+        for chunk in results:
+            yield from chunk
+
+    # Stop the workers once they have finished (or straight away with terminate=True)
+    def close(self, terminate=False):
+        if terminate:
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
+        if self.owns_grid:
+            self.grid.close()
+
+    def __enter__(self):
+        return self
+
+    # Leaving early (an error, or a solve_many() generator that wasn't used up) stops the workers
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(terminate=exc_type is not None)
+
+
+# One-off version of QueryPool.solve_many(): start the workers, solve the pairs, stop them
+def solve_many(pairs, terrain, algorithm='astar', processes=None, ordered=True, chunksize=None):
+    with QueryPool(terrain, processes) as pool:
+        yield from pool.solve_many(pairs, algorithm, ordered, chunksize)
@@ -0,0 +1,592 @@
+#Headless benchmarks for the pathfinder. Run with:
+#    python benchmark.py <name> [<name> ...]
+#Running it with no names lists the available benchmarks.
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from math import inf
+
+import numpy as np
+
+from random_set import RandomSet
+from terrain import new_terrain, BLANK, WALL, MUD
+from generators import random_walls, noise_terrain, division_blocks, recursive_division
+from mapfile import save_map
+from chunked import ChunkedGrid
+from batch import QueryPool
+from striped import StripedSearch
+from corridors import CorridorGraph
+from pathdb import PathDatabase
+from cache import ArtifactCache
+from priority_queue import TIE_BREAKING
+from realtime import RealTimeAgent
+from cooperative import CooperativePlanner, find_conflicts
+from clearance import ClearanceMap
+from quadtree import QuadTree
+import solvers
+
+
+# The wall frontier loop of better_prim() from grid.py, run on a grid of bare
+# nodetype strings so that it can be timed without a pygame window.
+# frontier is the container class used for the set of walls
+def prim_frontier(rows, frontier, seed=0):
+    rng = random.Random(seed)
+    n = rows - 1
+    mazearray = [['dormant' if row % 2 != 0 and column % 2 != 0 else 'wall' for column in range(rows)] for row in range(rows)]
+
+    def neighbours(node):
+        row, column = node
+        if row < n: yield (row+1, column)
+        if row > 0: yield (row-1, column)
+        if column < n: yield (row, column+1)
+        if column > 0: yield (row, column-1)
+
+    start_point = (rng.randrange(1,n,2), rng.randrange(1,n,2))
+    mazearray[start_point[0]][start_point[1]] = 'blank'
+
+    walls = frontier()
+    for wall in neighbours(start_point):
+        walls.add(wall)
+
+    while len(walls) > 0:
+        if frontier is set:
+            wall = rng.choice(tuple(walls))
+        else:
+            wall = walls.choice(rng)
+
+        visited = 0
+        for neighbour in neighbours(wall):
+            if mazearray[neighbour[0]][neighbour[1]] == 'blank':
+                visited += 1
+
+        if visited <= 1:
+            mazearray[wall[0]][wall[1]] = 'blank'
+            for cell in neighbours(wall):
+                if mazearray[cell[0]][cell[1]] == 'dormant':
+                    mazearray[cell[0]][cell[1]] = 'blank'
+                    for cell_neighbour in neighbours(cell):
+                        if mazearray[cell_neighbour[0]][cell_neighbour[1]] == 'wall':
+                            walls.add(cell_neighbour)
+                    break
+
+        walls.remove(wall)
+
+    return mazearray
+
+
+# Generation time of better_prim's frontier loop with the old set + random.choice(tuple(walls))
+# approach against RandomSet. The old approach is quadratic so it is only run on the smaller sizes
+def bench_prim(sizes=(100, 200, 350, 500, 1000, 2000), old_limit=350):
+    print(f"{'rows':>6} {'set + tuple (s)':>16} {'RandomSet (s)':>14}")
+    for rows in sizes:
+        if rows <= old_limit:
+            start = time.perf_counter()
+            prim_frontier(rows, set)
+            old = f"{time.perf_counter() - start:16.3f}"
+        else:
+            old = f"{'skipped':>16}"
+        start = time.perf_counter()
+        prim_frontier(rows, RandomSet)
+        new = time.perf_counter() - start
+        print(f"{rows:>6} {old} {new:14.3f}")
+
+
+# Time the array generators filling a square terrain array
+def bench_generators(sizes=(1024, 4096)):
+    generators = (random_walls, noise_terrain, division_blocks)
+    print(f"{'rows':>6}" + ''.join(f"{generator.__name__ + ' (s)':>22}" for generator in generators))
+    for rows in sizes:
+        terrain = new_terrain(rows)
+        timings = []
+        for generator in generators:
+            start = time.perf_counter()
+            generator(terrain, rng=0)
+            timings.append(time.perf_counter() - start)
+        print(f"{rows:>6}" + ''.join(f"{timing:22.3f}" for timing in timings))
+
+
+# Time the explicit stack recursive division (one Python step per chamber, see
+# bench_generators for division_blocks on the same sizes)
+def bench_division(sizes=(1000, 4096, 10000)):
+    print(f"{'rows':>6} {'recursive_division (s)':>24}")
+    for rows in sizes:
+        terrain = new_terrain(rows)
+        start = time.perf_counter()
+        recursive_division(terrain, rng=0)
+        print(f"{rows:>6} {time.perf_counter() - start:24.2f}")
+
+
+# A* on a map held in memory against the same map read through a ChunkedGrid
+# with different memory budgets
+def bench_chunked(rows=4096, queries=5, budgets_mb=(64, 4, 1)):
+    terrain = random_walls(new_terrain(rows), density=0.2, rng=0)
+    rng = random.Random(0)
+    pairs = [((rng.randrange(rows), rng.randrange(rows)), (rng.randrange(rows), rng.randrange(rows))) for query in range(queries)]
+    pairs = [(start, goal) for start, goal in pairs if terrain[start] == 0 and terrain[goal] == 0]
+
+    path = os.path.join(tempfile.mkdtemp(), 'chunked.pfm')
+    save_map(path, terrain)
+
+    start = time.perf_counter()
+    for start_point, goal in pairs:
+        solvers.astar(terrain, start_point, goal)
+    print(f"{'in memory':>16}: {time.perf_counter() - start:.2f} s")
+
+    for budget in budgets_mb:
+        with ChunkedGrid(path, chunk_size=256, memory_budget=budget * 2**20) as grid:
+            start = time.perf_counter()
+            for start_point, goal in pairs:
+                solvers.astar(grid, start_point, goal)
+            stats = grid.stats()
+            print(f"{f'chunked {budget} MB':>16}: {time.perf_counter() - start:.2f} s, "
+                  f"{stats['misses']} chunk reads, {stats['evictions']} evictions")
+    os.remove(path)
+
+
+# Throughput of QueryPool.solve_many() with different numbers of worker processes,
+# against solving the same queries one after the other in this process
+def bench_batch(rows=512, queries=400, processes=(1, 2, 4)):
+    terrain = random_walls(new_terrain(rows), density=0.2, rng=0)
+    rng = random.Random(0)
+    pairs = []
+    while len(pairs) < queries:
+        start_point, goal = (rng.randrange(rows), rng.randrange(rows)), (rng.randrange(rows), rng.randrange(rows))
+        if terrain[start_point] == 0 and terrain[goal] == 0:
+            pairs.append((start_point, goal))
+
+    start = time.perf_counter()
+    for start_point, goal in pairs:
+        solvers.astar(terrain, start_point, goal)
+    serial = time.perf_counter() - start
+    print(f"{'serial':>12}: {queries / serial:8.1f} queries/s")
+
+    for count in processes:
+        with QueryPool(terrain, processes=count) as pool:
+            start = time.perf_counter()
+            for index, result in pool.solve_many(pairs, 'astar', ordered=False):
+                pass
+            taken = time.perf_counter() - start
+        print(f"{f'{count} workers':>12}: {queries / taken:8.1f} queries/s ({serial / taken:.2f}x serial)")
+    print(f"({os.cpu_count()} CPU cores available)")
+
+
+# One long query on a big map: solvers.bfs/dijkstra against the striped parallel search
+def bench_striped(rows=2000, processes=(1, 2, 4)):
+    terrain = random_walls(new_terrain(rows), density=0.2, rng=0)
+    terrain[0, 0] = terrain[-1, -1] = 0
+    start_point, goal = (0, 0), (rows - 1, rows - 1)
+
+    for name in ('bfs', 'dijkstra'):
+        start = time.perf_counter()
+        result = solvers.solve(terrain, start_point, goal, name)
+        serial = time.perf_counter() - start
+        print(f"{name + ' serial':>20}: {serial:7.2f} s, cost {result.cost}")
+        for count in processes:
+            with StripedSearch(terrain, processes=count) as search:
+                start = time.perf_counter()
+                result = getattr(search, name)(start_point, goal)
+                taken = time.perf_counter() - start
+            print(f"{f'{name} {count} stripes':>20}: {taken:7.2f} s, cost {result.cost} ({serial / taken:.2f}x serial)")
+    print(f"({os.cpu_count()} CPU cores available)")
+
+
+# Terrain array of a better_prim() maze (see prim_frontier)
+def prim_maze(rows, seed=0):
+    mazearray = prim_frontier(rows, RandomSet, seed)
+    return np.array([[BLANK if nodetype == 'blank' else WALL for nodetype in row] for row in mazearray], dtype=np.uint8)
+
+
+# A* on the grid against A* on the corridor-compressed graph of maze maps
+def bench_corridors(rows=501, queries=100):
+    mazes = {'prim': prim_maze(rows), 'division': recursive_division(new_terrain(rows), rng=0)}
+    rng = random.Random(0)
+    print(f"{'maze':>10} {'build (s)':>10} {'nodes/cells':>12} {'grid A* (s)':>12} {'expanded':>9} {'graph A* (s)':>13} {'expanded':>9}")
+    for name, terrain in mazes.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+        pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for query in range(queries)]
+
+        start = time.perf_counter()
+        graph = CorridorGraph(terrain)
+        build = time.perf_counter() - start
+        stats = graph.stats()
+
+        timings = []
+        for search in (lambda start_point, goal: solvers.astar(terrain, start_point, goal), graph.astar):
+            expanded = 0
+            start = time.perf_counter()
+            for start_point, goal in pairs:
+                expanded += search(start_point, goal).expanded
+            timings.append((time.perf_counter() - start, expanded // queries))
+        (grid_time, grid_expanded), (graph_time, graph_expanded) = timings
+        print(f"{name:>10} {build:10.2f} {stats['nodes'] / stats['cells']:12.2f} {grid_time:12.2f} {grid_expanded:9} {graph_time:13.2f} {graph_expanded:9}")
+
+
+# Preprocessing time, table size and query latency of the compressed path database against A*
+def bench_pathdb(rows=64, queries=500):
+    maps = {'prim': prim_maze(rows - 1), 'random walls': random_walls(new_terrain(rows), density=0.2, rng=0)}
+    rng = random.Random(0)
+    for name, terrain in maps.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+        pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for query in range(queries)]
+        print(f"{name} ({terrain.shape[0]}x{terrain.shape[1]}, {len(open_cells)} open cells)")
+        for order in ('dfs', 'rows'):
+            database = PathDatabase(terrain, order=order)
+            stats = database.stats()
+            start = time.perf_counter()
+            for start_point, goal in pairs:
+                database.path(start_point, goal)
+            latency = (time.perf_counter() - start) / queries
+            print(f"{f'database ({order})':>18}: built in {stats['build_time']:6.2f} s, {stats['bytes'] / 1024:7.1f} KB "
+                  f"({stats['runs_per_source']:.1f} runs per source, {stats['uncompressed_bytes'] / 1024:.0f} KB uncompressed), "
+                  f"{latency * 1e6:7.1f} us per query")
+        start = time.perf_counter()
+        for start_point, goal in pairs:
+            solvers.astar(terrain, start_point, goal)
+        print(f"{'A*':>18}: {(time.perf_counter() - start) / queries * 1e6:7.1f} us per query")
+
+
+# Building the path database tables against loading them from an ArtifactCache
+def bench_cache(rows=64):
+    terrain = prim_maze(rows - 1)
+    cache = ArtifactCache(tempfile.mkdtemp())
+    for run in ('cold', 'warm', 'warm'):
+        start = time.perf_counter()
+        PathDatabase(terrain, cache=cache)
+        print(f"{run:>6}: {time.perf_counter() - start:8.3f} s")
+    print(cache.stats())
+    cache.clear()
+
+
+# A* with 4-way against 8-way movement: path cost, path length in cells, nodes expanded and time
+def bench_diagonals(rows=300, queries=20):
+    maps = {
+        'open': new_terrain(rows),
+        'random walls': random_walls(new_terrain(rows), density=0.2, rng=0),
+        'terrain': noise_terrain(new_terrain(rows), scale=max(1, rows // 6), rng=0),
+    }
+    rng = random.Random(0)
+    print(f"{'map':>13} {'moves':>14} {'cost':>9} {'cells':>7} {'expanded':>9} {'time (s)':>9}")
+    for name, terrain in maps.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+        pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for query in range(queries)]
+        for label, options in (('4-way', {}), ('8-way never', {'diagonals': True}),
+                               ('8-way always', {'diagonals': True, 'corner_cutting': 'always'})):
+            cost = cells = expanded = found = 0
+            start = time.perf_counter()
+            for start_point, goal in pairs:
+                result = solvers.astar(terrain, start_point, goal, **options)
+                if result.path:
+                    cost += result.cost
+                    cells += len(result.path)
+                    found += 1
+                expanded += result.expanded
+            taken = time.perf_counter() - start
+            # Cost and cells are averaged over the paths found, corner cutting can connect more pairs
+            print(f"{name:>13} {label:>14} {cost / max(found, 1):9.1f} {cells // max(found, 1):7} {expanded // queries:9} {taken:9.2f}")
+
+
+# Weighted A* and ARA* against A*: cost over the shortest, nodes expanded and time
+def bench_weighted(rows=400, queries=10, weights=(1.5, 2, 3, 5), deadlines=(0.01, 0.05, 0.2)):
+    maps = {
+        'random walls': random_walls(new_terrain(rows), density=0.3, rng=0),
+        'terrain': noise_terrain(new_terrain(rows), scale=max(1, rows // 6), rng=0),
+    }
+    rng = random.Random(0)
+    for name, terrain in maps.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+        pairs = []
+        while len(pairs) < queries:
+            start_point, goal = rng.choice(open_cells), rng.choice(open_cells)
+            shortest = solvers.astar(terrain, start_point, goal)
+            if shortest.path:
+                pairs.append((start_point, goal, shortest.cost))
+        print(f"{name:>24} {'cost / shortest':>15} {'expanded':>9} {'time (ms)':>10}")
+
+        def run(label, search):
+            ratio = expanded = 0
+            start = time.perf_counter()
+            for start_point, goal, shortest in pairs:
+                result = search(start_point, goal)
+                ratio += result.cost / shortest
+                expanded += result.expanded
+            taken = time.perf_counter() - start
+            print(f"{label:>24} {ratio / queries:15.3f} {expanded // queries:9} {taken / queries * 1000:10.1f}")
+
+        run('A*', lambda start_point, goal: solvers.astar(terrain, start_point, goal))
+        for weight in weights:
+            run(f'weighted A* {weight}', lambda start_point, goal: solvers.weighted_astar(terrain, start_point, goal, weight=weight))
+        for deadline in deadlines:
+            run(f'ARA* {deadline * 1000:g} ms', lambda start_point, goal: solvers.ara_star(terrain, start_point, goal, deadline=deadline)[0])
+
+
+# Nodes expanded by A* with each tie breaking policy of AStarQueue
+def bench_ties(rows=201, queries=20):
+    maps = {
+        'open': new_terrain(rows),
+        'terrain': noise_terrain(new_terrain(rows), scale=max(1, rows // 6), rng=0),
+        'maze': prim_maze(rows),
+    }
+    rng = random.Random(0)
+    print(f"{'tie breaking':>14}" + ''.join(f"{name + ' expanded':>18} {'ms':>6}" for name in maps))
+    pairs = {}
+    for name, terrain in maps.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+        pairs[name] = [(rng.choice(open_cells), rng.choice(open_cells)) for query in range(queries)]
+    for tie_breaking in TIE_BREAKING:
+        line = f"{tie_breaking:>14}"
+        for name, terrain in maps.items():
+            expanded = 0
+            start = time.perf_counter()
+            for start_point, goal in pairs[name]:
+                expanded += solvers.astar(terrain, start_point, goal, tie_breaking=tie_breaking).expanded
+            line += f"{expanded // queries:18} {(time.perf_counter() - start) / queries * 1000:6.1f}"
+        print(line)
+
+
+# Time per step() of real-time search for growing maps, against the time A* takes before
+# the first move, and how long the trips are compared with the shortest paths
+def bench_realtime(sizes=(256, 1024, 2048), lookaheads=(16, 64, 256), ticks=300, trips=5):
+    print(f"{'rows':>6} {'A* (ms)':>9}" + ''.join(f"{f'K={lookahead} worst/mean (ms)':>26}" for lookahead in lookaheads))
+    for rows in sizes:
+        terrain = random_walls(new_terrain(rows), density=0.2, rng=0)
+        terrain[0, 0] = terrain[-1, -1] = 0
+        start = time.perf_counter()
+        solvers.astar(terrain, (0, 0), (rows - 1, rows - 1))
+        line = f"{rows:>6} {(time.perf_counter() - start) * 1000:9.1f}"
+        for lookahead in lookaheads:
+            agent = RealTimeAgent(terrain, (0, 0), (rows - 1, rows - 1), lookahead=lookahead)
+            timings = []
+            for tick in range(ticks):
+                start = time.perf_counter()
+                agent.step()
+                timings.append(time.perf_counter() - start)
+            line += f"{max(timings) * 1000:17.2f} / {sum(timings) / ticks * 1000:5.3f}"
+        print(line)
+
+    rows = 128
+    terrain = random_walls(new_terrain(rows), density=0.2, rng=0)
+    rng = random.Random(0)
+    open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+    pairs = []
+    while len(pairs) < trips:
+        start_point, goal = rng.choice(open_cells), rng.choice(open_cells)
+        shortest = solvers.astar(terrain, start_point, goal)
+        if shortest.path:
+            pairs.append((start_point, goal, shortest.cost))
+    print(f"trip cost / shortest on {rows}x{rows} (first trip, then again with the learned values):")
+    for method in ('rtaa', 'lrta'):
+        for lookahead in lookaheads:
+            ratios = [0, 0]
+            for start_point, goal, shortest in pairs:
+                heuristics = {}
+                for trip in range(2):
+                    agent = RealTimeAgent(terrain, start_point, goal, lookahead=lookahead, method=method, heuristics=heuristics)
+                    agent.run()
+                    ratios[trip] += agent.travelled / shortest
+            print(f"{method:>6} K={lookahead:<4} {ratios[0] / trips:6.2f} {ratios[1] / trips:6.2f}")
+
+
+# Planning time of cooperative A* as the number of agents grows, planned all the way to
+# their goals and with a window. Costs are against every agent's shortest path alone
+def bench_cooperative(rows=128, counts=(50, 100, 200, 400), windows=(None, 16)):
+    terrain = random_walls(new_terrain(rows), density=0.1, rng=0)
+    rng = random.Random(0)
+    open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+    print(f"{'agents':>7} {'window':>7} {'time (s)':>9} {'agents/s':>9} {'failed':>7} {'conflicts':>10} {'cost':>6} {'makespan':>9}")
+    for count in counts:
+        agents = []
+        shortest = {}
+        cells = rng.sample(open_cells, len(open_cells))
+        while len(agents) < count:
+            start_point, goal = cells.pop(), cells.pop()
+            result = solvers.astar(terrain, start_point, goal)
+            if result.path:
+                agents.append((start_point, goal))
+                shortest[start_point] = result.cost
+        for window in windows:
+            planner = CooperativePlanner(terrain)
+            start = time.perf_counter()
+            results = planner.plan(agents, window=window)
+            elapsed = time.perf_counter() - start
+            paths = [result.path for result in results]
+            planned = [(agent, result) for agent, result in zip(agents, results) if result.cost != inf]
+            cost = sum(result.cost for agent, result in planned) / sum(shortest[agent[0]] for agent, result in planned)
+            makespan = max(len(result.path) - 1 for agent, result in planned)
+            print(f"{count:7} {str(window):>7} {elapsed:9.2f} {count / elapsed:9.1f} {count - len(planned):7} {len(find_conflicts(paths, [start_point for start_point, goal in agents])):10} {cost:6.3f} {makespan:9}")
+
+
+# Building a clearance map, updating it after single wall edits against building it
+# again, and A* for agents of each size using it
+def bench_clearance(rows=1024, edits=200, sizes=(1, 2, 3, 4)):
+    terrain = random_walls(new_terrain(rows), density=0.03, rng=0)
+    start = time.perf_counter()
+    clearance = ClearanceMap(terrain)
+    print(f"build {rows}x{rows}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for edit in range(edits):
+        cell = (rng.randrange(rows), rng.randrange(rows))
+        terrain[cell] = WALL if terrain[cell] != WALL else BLANK
+        clearance.update([cell])
+    print(f"update after one edit: {(time.perf_counter() - start) / edits * 1000:.2f} ms")
+    assert (clearance.values == ClearanceMap(terrain).values).all()
+
+    start_point, goal = (0, 0), (rows // 2, rows // 2)
+    print(f"{'size':>5} {'time (s)':>9} {'expanded':>9} {'us/node':>8} {'cost':>8}")
+    for size in sizes:
+        terrain[:size, :size] = BLANK
+        terrain[goal[0]:goal[0] + size, goal[1]:goal[1] + size] = BLANK
+        clearance.update([(row, column) for row in range(size) for column in range(size)]
+                         + [(goal[0] + row, goal[1] + column) for row in range(size) for column in range(size)])
+        start = time.perf_counter()
+        result = solvers.astar(terrain, start_point, goal, agent_size=size, clearance=clearance.values)
+        elapsed = time.perf_counter() - start
+        print(f"{size:5} {elapsed:9.3f} {result.expanded:9} {elapsed / result.expanded * 1e6:8.2f} {result.cost:8}")
+
+
+# A* on the blocks of a quadtree (then the cells inside them) against A* on the cells,
+# and updating the tree after painting one cell against building it again
+def bench_quadtree(rows=1024, queries=20, edits=200):
+    maps = {'noise': noise_terrain(new_terrain(rows), rng=0),
+            'noise + walls': random_walls(noise_terrain(new_terrain(rows), rng=0), density=0.01, rng=0)}
+    rng = random.Random(0)
+    print(f"{'map':>14} {'blocks/cells':>13} {'build (s)':>10} {'grid A* (s)':>12} {'expanded':>9} {'tree A* (s)':>12} {'expanded':>9} {'cost':>6} {'update (ms)':>12}")
+    for name, terrain in maps.items():
+        open_cells = [tuple(cell) for cell in np.argwhere(terrain != WALL).tolist()]
+        pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for query in range(queries)]
+
+        start = time.perf_counter()
+        tree = QuadTree(terrain)
+        build = time.perf_counter() - start
+        stats = tree.stats()
+
+        timings = []
+        for search in (lambda start_point, goal: solvers.astar(terrain, start_point, goal), tree.astar):
+            expanded = cost = 0
+            start = time.perf_counter()
+            for start_point, goal in pairs:
+                result = search(start_point, goal)
+                expanded += result.expanded
+                cost += result.cost if result.path else 0
+            timings.append((time.perf_counter() - start, expanded // queries, cost))
+        (grid_time, grid_expanded, grid_cost), (tree_time, tree_expanded, tree_cost) = timings
+
+        start = time.perf_counter()
+        for edit in range(edits):
+            cell = rng.choice(open_cells)
+            terrain[cell] = MUD if terrain[cell] == BLANK else BLANK
+            tree.update([cell])
+        update = (time.perf_counter() - start) / edits * 1000
+        print(f"{name:>14} {stats['blocks'] / stats['cells']:13.3f} {build:10.2f} {grid_time:12.2f} {grid_expanded:9} {tree_time:12.2f} {tree_expanded:9} {tree_cost / grid_cost:6.3f} {update:12.2f}")
+
+
+# Time and memory of A* paths returned as lists of cells, arrays of cell ids and runs
+def bench_paths(sizes=(256, 1024), queries=5):
+    print(f"{'rows':>6} {'map, format':>12} {'time (s)':>9} {'cells':>7} {'bytes':>9}")
+    for rows in sizes:
+        maps = {'open': new_terrain(rows), 'maze': prim_maze(rows - 1)}
+        for name, terrain in maps.items():
+            open_cells = np.argwhere(terrain == BLANK)
+            start_point, goal = tuple(open_cells[0].tolist()), tuple(open_cells[-1].tolist())
+            for path_format in solvers.PATH_FORMATS:
+                start = time.perf_counter()
+                for query in range(queries):
+                    result = solvers.astar(terrain, start_point, goal, path_format=path_format)
+                elapsed = (time.perf_counter() - start) / queries
+                path = result.path
+                if path_format == 'cells':
+                    size = sys.getsizeof(path) + sum(sys.getsizeof(cell) for cell in path)
+                    cells = len(path)
+                elif path_format == 'ids':
+                    size = path.nbytes
+                    cells = len(path)
+                else:
+                    first, runs = path
+                    size = sys.getsizeof(runs) + sum(sys.getsizeof(run) + sys.getsizeof(run[0]) for run in runs)
+                    cells = 1 + sum(count for step, count in runs)
+                print(f"{rows:6} {name + ' ' + path_format:>12} {elapsed:9.3f} {cells:7} {size:9}")
+
+
+# Time, nodes expanded and peak memory (traced by tracemalloc) of A* against IDA* with
+# different cache sizes and beam search with different widths, then A* against beam
+# search on a chunked map with a small memory budget
+def bench_memory(rows=256, queries=5, chunked_rows=4096, budget_mb=1):
+    terrain = random_walls(new_terrain(rows), density=0.1, rng=0)
+    rng = random.Random(0)
+    open_cells = [tuple(cell) for cell in np.argwhere(terrain == BLANK).tolist()]
+    pairs = []
+    while len(pairs) < queries:
+        start_point, goal = rng.choice(open_cells), rng.choice(open_cells)
+        if solvers.astar(terrain, start_point, goal).path:
+            pairs.append((start_point, goal))
+
+    searches = {'A*': solvers.astar}
+    for cache_size in (2**13, 2**16):
+        searches[f'IDA* cache {cache_size}'] = lambda terrain, start, goal, cache_size=cache_size: solvers.ida_star(terrain, start, goal, cache_size=cache_size)
+    for width in (16, 64, 256):
+        searches[f'beam {width}'] = lambda terrain, start, goal, width=width: solvers.beam_search(terrain, start, goal, width=width)
+
+    print(f"{'search':>16} {'time (s)':>9} {'expanded':>9} {'peak (KB)':>10} {'found':>6} {'cost':>6}")
+    for name, search in searches.items():
+        start = time.perf_counter()
+        results = [search(terrain, start_point, goal) for start_point, goal in pairs]
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        for start_point, goal in pairs:
+            search(terrain, start_point, goal)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        found = [result for result in results if result.path]
+        cost = sum(result.cost for result in found) / sum(solvers.astar(terrain, result.path[0], result.path[-1]).cost for result in found) if found else inf
+        print(f"{name:>16} {elapsed:9.2f} {sum(result.expanded for result in results) // queries:9} {peak // 1024:10} {len(found):6} {cost:6.3f}")
+
+    terrain = random_walls(new_terrain(chunked_rows), density=0.1, rng=0)
+    path = os.path.join(tempfile.mkdtemp(), 'memory.pfm')
+    save_map(path, terrain)
+    start_point, goal = (0, 0), (chunked_rows - 1, chunked_rows - 1)
+    print(f"{chunked_rows}x{chunked_rows} chunked map, {budget_mb} MB of chunks:")
+    for name, search in (('A*', solvers.astar), ('beam 64', searches['beam 64'])):
+        with ChunkedGrid(path, chunk_size=256, memory_budget=budget_mb * 2**20) as grid:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = search(grid, start_point, goal)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"{name:>16} {elapsed:9.2f} {result.expanded:9} {peak // 1024:10} {result.cost:8}")
+    os.remove(path)
+
+
+BENCHMARKS = {
+    'prim': bench_prim,
+    'generators': bench_generators,
+    'division': bench_division,
+    'chunked': bench_chunked,
+    'batch': bench_batch,
+    'striped': bench_striped,
+    'corridors': bench_corridors,
+    'pathdb': bench_pathdb,
+    'cache': bench_cache,
+    'diagonals': bench_diagonals,
+    'weighted': bench_weighted,
+    'ties': bench_ties,
+    'realtime': bench_realtime,
+    'cooperative': bench_cooperative,
+    'clearance': bench_clearance,
+    'quadtree': bench_quadtree,
+    'paths': bench_paths,
+    'memory': bench_memory,
+}
+
+if __name__ == '__main__':
+    names = sys.argv[1:]
+    if not names:
+        print("Available benchmarks:", ', '.join(BENCHMARKS))
+    for name in names:
+        print(f"--- {name} ---")
+        BENCHMARKS[name]()
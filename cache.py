@@ -0,0 +1,142 @@
+#A cache on disk for the results of preprocessing a map (path database tables, region
+#labels, ...) so they are built once per map rather than every time it's loaded.
+#
+#    cache = ArtifactCache('.pathfinder-cache', max_bytes=2**30)
+#    tables = cache.get_or_build(terrain, 'pathdb', lambda: build_tables(terrain), order='dfs')
+#
+#An artifact is a dict of numpy arrays. It is stored under a key made from a hash of the
+#terrain array, the artifact's name and its parameters, so a changed map or different
+#parameters never get a stale artifact. Each artifact is a directory holding one .npy
+#file per array and a meta.json, and is loaded memory-mapped, so only the parts that are
+#used are read from disk.
+#When the cache is bigger than max_bytes the least recently used artifacts are deleted.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# Bump to invalidate every artifact when the way they are built changes
+CACHE_VERSION = 1
+
+
+# Hash of a terrain array's shape and contents, read in blocks of rows so memmaps
+# bigger than memory can be hashed
+def terrain_hash(terrain, block_rows=1024):
+    digest = hashlib.sha256()
+    digest.update(repr((terrain.shape, str(terrain.dtype))).encode())
+    for row in range(0, terrain.shape[0], block_rows):
+        digest.update(np.ascontiguousarray(terrain[row:row + block_rows]).tobytes())
+    return digest.hexdigest()
+
+
+class ArtifactCache(object):
+    def __init__(self, directory='.pathfinder-cache', max_bytes=2**30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = self.misses = self.evictions = 0
+
+    # Key of an artifact from the terrain (the array or its terrain_hash()), name and parameters
+    def key(self, terrain, name, **parameters):
+        if not isinstance(terrain, str):
+            terrain = terrain_hash(terrain)
+        description = json.dumps([CACHE_VERSION, terrain, name, parameters], sort_keys=True, default=str)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    # Memory-map the arrays stored in an artifact directory, None if it isn't there
+    def load(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            arrays = {array: np.load(os.path.join(path, array + '.npy'), mmap_mode='r') for array in meta['arrays']}
+        except (OSError, ValueError, KeyError):
+            return None
+        # The modification time of the directory is when it was last used, for eviction
+        os.utime(path)
+        return arrays
+
+    # The arrays of an artifact (memory-mapped, read only), or None if it isn't cached
+    def get(self, terrain, name, **parameters):
+        arrays = self.load(self.path(self.key(terrain, name, **parameters)))
+        if arrays is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return arrays
+
+    # Store a dict of arrays. It is written to a temporary directory and renamed into
+    # place, so other processes never see half an artifact
+    def put(self, terrain, name, arrays, **parameters):
+        key = self.key(terrain, name, **parameters)
+        temporary = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            for array, value in arrays.items():
+                np.save(os.path.join(temporary, array + '.npy'), np.asarray(value))
+            with open(os.path.join(temporary, 'meta.json'), 'w') as f:
+                json.dump({'name': name, 'parameters': parameters, 'arrays': list(arrays), 'created': time.time()}, f, default=str)
+            try:
+                os.rename(temporary, self.path(key))
+            except OSError:
+                # Another process stored the same artifact first
+                shutil.rmtree(temporary)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        self.evict()
+        return key
+
+    # The cached artifact, or build() it (a function returning a dict of arrays) and store it
+    def get_or_build(self, terrain, name, build, **parameters):
+        terrain_key = terrain_hash(terrain)
+        arrays = self.get(terrain_key, name, **parameters)
+        if arrays is None:
+            built = build()
+            key = self.put(terrain_key, name, built, **parameters)
+            # Load it back memory-mapped, unless it was too big to keep
+            arrays = self.load(self.path(key)) or built
+        return arrays
+
+    # (last used, bytes, path) of every artifact in the cache
+    def entries(self):
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self.path(key)
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue
+        return entries
+
+    def size(self):
+        return sum(size for used, size, path in self.entries())
+
+    # Delete the least recently used artifacts until the cache fits in max_bytes
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for used, size, path in entries)
+        for used, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for used, size, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        entries = self.entries()
+        return {'artifacts': len(entries), 'bytes': sum(size for used, size, path in entries),
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
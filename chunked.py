@@ -0,0 +1,83 @@
+#A grid split into square chunks that are read from a map file (see mapfile.py) when
+#they are first used and evicted, least recently used first, once the chunks held in
+#memory go over a memory budget. Only the chunks a search actually touches are ever
+#read, so maps bigger than memory can be searched.
+#
+#A ChunkedGrid can be indexed like a terrain array (grid[row, column]) and has a .shape,
+#so the solvers in solvers.py work on it unchanged.
+
+import os
+from collections import OrderedDict
+
+from mapfile import read_header, HEADER_SIZE
+
+
+class ChunkedGrid(object):
+    def __init__(self, path, chunk_size=256, memory_budget=64 * 2**20):
+        assert chunk_size > 0 and chunk_size & (chunk_size - 1) == 0, "chunk_size must be a power of 2"
+        rows, columns, flags = read_header(path)
+        self.path = path
+        self.shape = (rows, columns)
+        self.chunk_size = chunk_size
+        self.shift = chunk_size.bit_length() - 1
+        self.mask = chunk_size - 1
+        self.max_chunks = max(1, memory_budget // (chunk_size * chunk_size))
+
+        self.fd = os.open(path, os.O_RDONLY)
+        # (chunk row, chunk column) -> (bytes of the chunk, width of the chunk)
+        self.chunks = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __getitem__(self, node):
+        row, column = node
+        key = (row >> self.shift, column >> self.shift)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.load_chunk(key)
+        else:
+            self.hits += 1
+            self.chunks.move_to_end(key)
+        data, width = chunk
+        return data[(row & self.mask) * width + (column & self.mask)]
+
+    # Read one chunk from the file, evicting the least recently used chunks if needed
+    def load_chunk(self, key):
+        rows, columns = self.shape
+        if not (0 <= key[0] << self.shift < rows and 0 <= key[1] << self.shift < columns):
+            raise IndexError(f"chunk {key} is outside the {rows}x{columns} grid")
+        self.misses += 1
+        while len(self.chunks) >= self.max_chunks:
+            self.chunks.popitem(last=False)
+            self.evictions += 1
+
+        top = key[0] << self.shift
+        left = key[1] << self.shift
+        height = min(self.chunk_size, rows - top)
+        width = min(self.chunk_size, columns - left)
+        data = b''.join(
+            os.pread(self.fd, width, HEADER_SIZE + (top + row) * columns + left)
+            for row in range(height)
+        )
+        chunk = (data, width)
+        self.chunks[key] = chunk
+        return chunk
+
+    # Bytes of terrain currently held in memory
+    def resident_bytes(self):
+        return sum(len(data) for data, width in self.chunks.values())
+
+    def stats(self):
+        return {'chunks': len(self.chunks), 'resident_bytes': self.resident_bytes(),
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.chunks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,77 @@
+#Clearance maps for agents bigger than one cell. An agent of size n stands on an n x n
+#square of cells with its own cell in the top left corner, so it fits on a cell when the
+#clearance of the cell (the side of the biggest open square starting there and going
+#down and right) is at least n. Searches then check one number per neighbour instead of
+#the n * n cells under the agent.
+#
+#    clearance = ClearanceMap(terrain)
+#    result = solvers.astar(terrain, start, goal, agent_size=3, clearance=clearance.values)
+#    terrain[row, column] = WALL
+#    clearance.update([(row, column)])
+#
+#The map is built from the wall mask with numpy, a row at a time from the bottom:
+#    clearance[r, c] = min(clearance[r + 1, c + 1] + 1, open cells to the right of (r, c), open cells below (r, c))
+#After the terrain is edited update() works out the rows again from the lowest edited row
+#up, and stops at the first row above the edits that comes out the same as before.
+
+import numpy as np
+
+from terrain import wall_mask
+
+
+# Number of open cells from each cell to the next wall to the right, along each row
+def runs_right(open_cells):
+    columns = open_cells.shape[-1]
+    positions = np.arange(columns)
+    walls = np.where(open_cells, columns, positions)
+    return np.minimum.accumulate(walls[..., ::-1], axis=-1)[..., ::-1] - positions
+
+
+# Clearance of every cell of a terrain array (0 for walls)
+def clearance_map(terrain):
+    return ClearanceMap(terrain).values
+
+
+class ClearanceMap(object):
+    def __init__(self, terrain):
+        self.terrain = terrain
+        open_cells = ~wall_mask(np.asarray(terrain))
+        rows, columns = open_cells.shape
+        self.right = runs_right(open_cells).astype(np.int32)
+        # Open cells from each cell down to the next wall
+        self.down = np.zeros((rows, columns), dtype=np.int32)
+        self.values = np.zeros((rows, columns), dtype=np.int32)
+        for row in range(rows - 1, -1, -1):
+            self.compute_row(row, open_cells[row])
+
+    # Work out the runs down and the clearance of one row from the row below it.
+    # Returns whether either changed
+    def compute_row(self, row, open_row):
+        if row + 1 < self.values.shape[0]:
+            down = (self.down[row + 1] + 1) * open_row
+            diagonal = np.append(self.values[row + 1, 1:] + 1, 1)
+        else:
+            down = open_row.astype(np.int32)
+            diagonal = np.ones_like(down)
+        values = np.minimum(np.minimum(diagonal, self.right[row]), down)
+        changed = not (np.array_equal(down, self.down[row]) and np.array_equal(values, self.values[row]))
+        self.down[row] = down
+        self.values[row] = values
+        return changed
+
+    # Bring the map up to date after the cells given as (row, column) were edited
+    def update(self, cells):
+        if not len(cells):
+            return
+        edited_rows = sorted({row for row, column in cells}, reverse=True)
+        for row in edited_rows:
+            self.right[row] = runs_right(~wall_mask(np.asarray(self.terrain[row])))
+        highest = edited_rows[-1]
+        for row in range(edited_rows[0], -1, -1):
+            changed = self.compute_row(row, ~wall_mask(np.asarray(self.terrain[row])))
+            if not changed and row < highest:
+                break
+
+    # Whether an agent of a size fits with its top left corner on a cell
+    def fits(self, cell, size):
+        return self.values[cell] >= size
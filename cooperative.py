@@ -0,0 +1,306 @@
+#Cooperative pathfinding for many agents on one terrain array (Silver's cooperative A*).
+#Agents are planned one after another. Each one searches in space and time, with a move
+#or a wait every tick, and avoids the cells and moves already reserved by the agents
+#planned before it. Its path is then reserved in turn, so no two agents are ever in the
+#same cell at the same time or swap cells in one tick.
+#
+#    planner = CooperativePlanner(terrain)
+#    results = planner.plan([(start, goal), (start, goal), ...])
+#    results = planner.plan(agents, window=16)
+#
+#Without a window every agent is planned all the way to its goal and then stays there.
+#With window=W (windowed cooperative A*) every agent only plans W ticks ahead, the agents
+#move W // 2 ticks and then all of them plan again, in a different order. The searches are
+#much smaller and an agent at its goal can step aside for the others, but the agents can
+#end up going round in circles and the paths are longer.
+#
+#The heuristic is the true distance to the goal (ignoring the other agents), found by a
+#search back from the goal that is resumed whenever a distance it hasn't reached yet is
+#asked for. Moves cost what the cell entered costs and take one tick; waiting costs 1.
+#Only 4-way movement is supported.
+
+from math import inf
+
+from priority_queue import AStarQueue
+from solvers import COST_LIST, Result, get_neighbours
+
+WAIT_COST = 1
+
+
+# Distances to a goal, from a Dijkstra search backwards from the goal that only runs as
+# far as it has to to answer each distance() call
+class TrueDistance(object):
+    def __init__(self, terrain, goal):
+        self.terrain = terrain
+        self.rows, self.columns = terrain.shape
+        self.queue = AStarQueue()
+        self.queue.push(0, 0, goal)
+        self.distances = {goal: 0}
+        self.closed = {}
+
+    def distance(self, node):
+        closed = self.closed
+        if node in closed:
+            return closed[node]
+        terrain = self.terrain
+        distances = self.distances
+        queue = self.queue
+        while queue.show():
+            priority, distance, current = queue.pop()
+            if current in closed:
+                continue
+            closed[current] = distance
+            # Going forwards the cost of a move is the cost of the cell entered: current
+            cost = COST_LIST[terrain[current]]
+            for neighbour in get_neighbours(current, self.rows, self.columns):
+                new_distance = distance + cost
+                if COST_LIST[terrain[neighbour]] != inf and new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    queue.push(new_distance, new_distance, neighbour)
+            if current == node:
+                return distance
+        closed[node] = inf
+        return inf
+
+
+# The cells and moves that agents already planned will use, by tick
+class ReservationTable(object):
+    def __init__(self):
+        # (cell, tick) -> agent
+        self.cells = {}
+        # (from, to, tick the move ends) -> agent
+        self.moves = {}
+        # cell -> tick an agent stops there for good
+        self.parked = {}
+        # Last tick any cell is reserved
+        self.last = {}
+        # After this tick nothing changes any more
+        self.horizon = 0
+
+    def is_free(self, cell, tick):
+        return (cell, tick) not in self.cells and tick < self.parked.get(cell, inf)
+
+    # Whether a move from cell to neighbour ending at tick doesn't swap with another agent
+    def can_move(self, cell, neighbour, tick):
+        return (neighbour, cell, tick) not in self.moves
+
+    # Reserve a path of cells, one per tick from tick 0. With park=True the agent stays
+    # in the last cell once it gets there
+    def reserve(self, path, agent, park=True):
+        cells = self.cells
+        last = self.last
+        for tick, cell in enumerate(path):
+            cells[cell, tick] = agent
+            last[cell] = max(last.get(cell, -1), tick)
+            if tick:
+                self.moves[path[tick - 1], cell, tick] = agent
+        if park:
+            self.parked[path[-1]] = len(path) - 1
+            last[path[-1]] = inf
+        self.horizon = max(self.horizon, len(path))
+
+    def clear(self):
+        self.__init__()
+
+
+class CooperativePlanner(object):
+    def __init__(self, terrain):
+        self.terrain = terrain
+        self.rows, self.columns = terrain.shape
+        # Backward searches are kept between plans for agents that share a goal
+        self.true_distances = {}
+
+    def true_distance(self, goal):
+        if goal not in self.true_distances:
+            self.true_distances[goal] = TrueDistance(self.terrain, goal)
+        return self.true_distances[goal].distance
+
+    # Space-time A* for one agent against a reservation table. Without a window it stops
+    # at the goal, once no later agent is going to pass through it; with one it stops
+    # `window` ticks ahead. Returns a Result whose path has one cell per tick
+    def search(self, table, start, goal, window=None):
+        terrain = self.terrain
+        rows, columns = self.rows, self.columns
+        heuristic = self.true_distance(goal)
+        # (Another agent already stopping at the goal would keep it forever)
+        if heuristic(start) == inf or not table.is_free(start, 0) or (window is None and goal in table.parked):
+            return Result(None, inf, 0)
+
+        queue = AStarQueue('larger-g')
+        queue.push(heuristic(start), 0, (start, 0))
+        came_from = {(start, 0): None}
+        distances = {(start, 0): 0}
+        closed = set()
+        # Past the last reserved tick the tick no longer matters, so states are closed by cell
+        horizon = table.horizon if window is None else window
+
+        while queue.show():
+            priority, distance, state = queue.pop()
+            node, tick = state
+            key = (node, min(tick, horizon))
+            if key in closed:
+                continue
+            closed.add(key)
+            if tick == window or (window is None and node == goal and table.last.get(goal, -1) <= tick):
+                path = []
+                while state is not None:
+                    path.append(state[0])
+                    state = came_from[state]
+                path.reverse()
+                return Result(path, distance, len(closed))
+
+            next_tick = tick + 1
+            # Waiting in place, which is free at the goal in a window
+            moves = [(node, 0 if window is not None and node == goal else WAIT_COST)]
+            for neighbour in get_neighbours(node, rows, columns):
+                cost = COST_LIST[terrain[neighbour]]
+                if cost != inf:
+                    moves.append((neighbour, cost))
+            for neighbour, cost in moves:
+                if not table.is_free(neighbour, next_tick) or not table.can_move(node, neighbour, next_tick):
+                    continue
+                new_state = (neighbour, next_tick)
+                if (neighbour, min(next_tick, horizon)) in closed:
+                    continue
+                new_distance = distance + cost
+                if new_distance < distances.get(new_state, inf):
+                    distances[new_state] = new_distance
+                    came_from[new_state] = state
+                    queue.push(new_distance + heuristic(neighbour), new_distance, new_state)
+
+        return Result(None, inf, len(closed))
+
+    # Plan paths for a list of (start, goal) agents, in that order of priority. Returns a
+    # Result per agent, with the path as one cell per tick (path[t] is where the agent is
+    # at tick t, and it stays at the end of its path). Agents that couldn't be planned
+    # get a path of None and stay at their start. With a window, an agent still short of
+    # its goal after max_cycles gets the cells it moved through and a cost of inf
+    def plan(self, agents, window=None, max_cycles=None):
+        if window is not None:
+            return self.plan_windowed(agents, window, max_cycles)
+        # Agents that can't be planned stay at their start for good. Their starts are
+        # reserved first and the others planned again, until everyone planned fits
+        stuck = {agent: Result(None, inf, 0) for agent in self.unreachable(agents)}
+        while True:
+            table = ReservationTable()
+            for agent in stuck:
+                table.reserve([agents[agent][0]], agent)
+            results = []
+            failed = False
+            for agent, (start, goal) in enumerate(agents):
+                if agent in stuck:
+                    results.append(stuck[agent])
+                    continue
+                result = self.search(table, start, goal)
+                if result.path is None:
+                    stuck[agent] = result
+                    failed = True
+                else:
+                    table.reserve(result.path, agent)
+                results.append(result)
+            if not failed:
+                return results
+
+    # Agents that couldn't reach their goal even with the map to themselves
+    def unreachable(self, agents):
+        return [agent for agent, (start, goal) in enumerate(agents) if self.true_distance(goal)(start) == inf]
+
+    def plan_windowed(self, agents, window, max_cycles=None):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        steps = max(1, window // 2)
+        if max_cycles is None:
+            max_cycles = 4 * (self.rows + self.columns) // steps + 1
+        positions = [start for start, goal in agents]
+        paths = [[start] for start, goal in agents]
+        costs = [0] * len(agents)
+        expanded = [0] * len(agents)
+        # Agents that can't reach their goal are never planned, and stand at their start
+        stuck = set(self.unreachable(agents))
+        order = [agent for agent in range(len(agents)) if agent not in stuck]
+
+        for cycle in range(max_cycles):
+            if all(positions[agent] == agents[agent][1] for agent in order):
+                break
+            # Agents that don't fit in the reservations wait where they are. Their waits
+            # are reserved first and the others planned again, until everyone planned fits
+            waiting = []
+            while True:
+                table = ReservationTable()
+                for agent in stuck:
+                    table.reserve([positions[agent]], agent)
+                plans = {}
+                for agent in waiting:
+                    plans[agent] = [positions[agent]] * (window + 1)
+                    table.reserve(plans[agent], agent, park=False)
+                failed = []
+                for agent in order:
+                    if agent in plans:
+                        continue
+                    result = self.search(table, positions[agent], agents[agent][1], window)
+                    expanded[agent] += result.expanded
+                    if result.path is None:
+                        failed.append(agent)
+                        continue
+                    table.reserve(result.path, agent, park=False)
+                    plans[agent] = result.path
+                if not failed:
+                    break
+                waiting.extend(failed)
+
+            for agent, plan in plans.items():
+                goal = agents[agent][1]
+                for previous, node in zip(plan[:steps], plan[1:steps + 1]):
+                    if node != previous:
+                        costs[agent] += COST_LIST[self.terrain[node]]
+                    elif node != goal:
+                        costs[agent] += WAIT_COST
+                    paths[agent].append(node)
+                positions[agent] = plan[steps]
+            # Someone else goes first next time, after the agents that had to wait
+            order.append(order.pop(0))
+            for agent in reversed(waiting):
+                order.remove(agent)
+                order.insert(0, agent)
+
+        results = []
+        for agent, (start, goal) in enumerate(agents):
+            path = paths[agent]
+            if agent in stuck:
+                results.append(Result(None, inf, expanded[agent]))
+                continue
+            # Short of the goal after max_cycles: where it went, so others can be checked against it
+            if path[-1] != goal:
+                results.append(Result(path, inf, expanded[agent]))
+                continue
+            # Drop the ticks spent waiting at the goal at the end
+            while len(path) > 1 and path[-2] == goal:
+                path.pop()
+            results.append(Result(path, costs[agent], expanded[agent]))
+        return results
+
+
+# Ticks where two paths (one cell per tick, staying at the end once finished) are in the
+# same cell or swap cells, as (tick, agent, other agent). With the agents' starts given,
+# an agent without a path stands at its start the whole time
+def find_conflicts(paths, starts=None):
+    if starts is not None:
+        paths = [path if path else [start] for path, start in zip(paths, starts)]
+    paths = [(agent, path) for agent, path in enumerate(paths) if path]
+    length = max((len(path) for agent, path in paths), default=0)
+    conflicts = []
+    previous = {}
+    for tick in range(length):
+        cells = {}
+        for agent, path in paths:
+            cell = path[min(tick, len(path) - 1)]
+            if cell in cells:
+                conflicts.append((tick, cells[cell], agent))
+            cells[cell] = agent
+            if tick:
+                before = path[min(tick - 1, len(path) - 1)]
+                other = cells.get(before) if before != cell else None
+                if other is not None and other != agent and previous.get(other) == cell:
+                    conflicts.append((tick, other, agent))
+        previous = {agent: path[min(tick, len(path) - 1)] for agent, path in paths}
+    return conflicts
@@ -0,0 +1,163 @@
+#Corridor compression for maze-like maps. Most open cells of a maze have exactly two open
+#neighbours, so a search that steps through them one at a time does a push and a pop per
+#corridor cell for nothing. CorridorGraph keeps only the junctions and dead ends (cells
+#with any other number of open neighbours) as nodes, joined by weighted edges that stand
+#for the corridors between them. Searches run on that graph and the corridors are walked
+#again to turn the result back into a path of cells.
+#
+#    graph = CorridorGraph(terrain)
+#    result = graph.astar(start, goal)
+#
+#The graph has to be built again if the terrain changes.
+
+from math import inf
+
+import numpy as np
+
+from priority_queue import AStarQueue
+from terrain import COSTS
+from solvers import Result, manhattan
+
+STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class CorridorGraph(object):
+    def __init__(self, terrain):
+        terrain = np.asarray(terrain)
+        self.shape = terrain.shape
+        costs = COSTS[terrain]
+        passable = costs < inf
+        padded = np.pad(passable, 1)
+        degree = (padded[2:, 1:-1].astype(np.int8) + padded[:-2, 1:-1] + padded[1:-1, 2:] + padded[1:-1, :-2])
+        self.costs = costs.tolist()
+        self.passable = passable.tolist()
+
+        self.nodes = set(map(tuple, np.argwhere(passable & (degree != 2)).tolist()))
+        # node -> list of (node at the other end, cost, first step out of the node)
+        self.edges = {}
+        rows, columns = self.shape
+        walked = bytearray(rows * columns)
+        for node in list(self.nodes):
+            self.add_edges(node, walked)
+
+        # Corridors that loop back on themselves without a junction: make one cell of each a node
+        corridors = passable & (degree == 2)
+        for row, column in np.argwhere(corridors & ~np.frombuffer(walked, dtype=bool).reshape(rows, columns)).tolist():
+            if not walked[row * columns + column]:
+                self.nodes.add((row, column))
+                walked[row * columns + column] = 1
+                self.add_edges((row, column), walked)
+
+    # The steps that lead from a cell to an open neighbour
+    def open_steps(self, cell):
+        rows, columns = self.shape
+        for step in STEPS:
+            row, column = cell[0] + step[0], cell[1] + step[1]
+            if 0 <= row < rows and 0 <= column < columns and self.passable[row][column]:
+                yield step
+
+    # Follow the corridor that leaves cell by step until it reaches a node (or target).
+    # Returns the cell it stopped at, the cost of getting there and the cells entered
+    def walk(self, cell, step, target=None):
+        rows, columns = self.shape
+        costs = self.costs
+        passable = self.passable
+        nodes = self.nodes
+        previous = cell
+        node = (cell[0] + step[0], cell[1] + step[1])
+        cost = 0
+        cells = []
+        while True:
+            cost += costs[node[0]][node[1]]
+            cells.append(node)
+            if node in nodes or node == target:
+                return node, cost, cells
+            row, column = node
+            for row_step, column_step in STEPS:
+                neighbour = (row + row_step, column + column_step)
+                if 0 <= neighbour[0] < rows and 0 <= neighbour[1] < columns and passable[neighbour[0]][neighbour[1]] and neighbour != previous:
+                    break
+            previous, node = node, neighbour
+
+    def add_edges(self, node, walked):
+        columns = self.shape[1]
+        edges = self.edges.setdefault(node, [])
+        for step in self.open_steps(node):
+            end, cost, cells = self.walk(node, step)
+            for row, column in cells:
+                walked[row * columns + column] = 1
+            if end != node:
+                edges.append((end, cost, step))
+
+    # Edges joining start and goal to the graph when they are in the middle of a corridor
+    def query_edges(self, start, goal):
+        extra = {}
+        if goal not in self.nodes:
+            for step in self.open_steps(goal):
+                end, cost, cells = self.walk(goal, step, target=start)
+                # Coming the other way the goal is entered and the end isn't
+                before = cells[-2] if len(cells) > 1 else goal
+                cost += self.costs[goal[0]][goal[1]] - self.costs[end[0]][end[1]]
+                extra.setdefault(end, []).append((goal, cost, (before[0] - end[0], before[1] - end[1])))
+        if start not in self.nodes:
+            for step in self.open_steps(start):
+                end, cost, cells = self.walk(start, step, target=goal)
+                if end != start:
+                    extra.setdefault(start, []).append((end, cost, step))
+        return extra
+
+    # Dijkstra's algorithm (or A* with astar=True) on the graph, with the path expanded to cells
+    def dijkstra(self, start, goal, astar=False):
+        if not (self.passable[start[0]][start[1]] and self.passable[goal[0]][goal[1]]):
+            return Result(None, inf, 0)
+        extra = self.query_edges(start, goal)
+
+        def heuristic(node):
+            return manhattan(node, goal) if astar else 0
+
+        queue = AStarQueue()
+        queue.push(heuristic(start), 0, start)
+        distances = {start: 0}
+        # node -> (previous node, first step out of it)
+        came_from = {start: None}
+        visited_nodes = set()
+
+        while queue.show():
+            priority, distance, node = queue.pop()
+            if node in visited_nodes:
+                continue
+            visited_nodes.add(node)
+            if node == goal:
+                return Result(self.expand(came_from, goal), distance, len(visited_nodes))
+
+            for neighbour, cost, step in self.edges.get(node, []) + extra.get(node, []):
+                if neighbour in visited_nodes:
+                    continue
+                new_distance = distance + cost
+                if new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    came_from[neighbour] = (node, step)
+                    queue.push(new_distance + heuristic(neighbour), new_distance, neighbour)
+
+        return Result(None, inf, len(visited_nodes))
+
+    def astar(self, start, goal):
+        return self.dijkstra(start, goal, astar=True)
+
+    # Walk the corridors of the edges in came_from to get the path of cells to goal
+    def expand(self, came_from, goal):
+        hops = []
+        node = goal
+        while came_from[node] is not None:
+            previous, step = came_from[node]
+            hops.append((previous, step, node))
+            node = previous
+        path = [node]
+        for previous, step, node in reversed(hops):
+            end, cost, cells = self.walk(previous, step, target=node)
+            path.extend(cells)
+        return path
+
+    def stats(self):
+        return {'cells': sum(map(sum, self.passable)), 'nodes': len(self.nodes),
+                'edges': sum(len(edges) for edges in self.edges.values())}
@@ -0,0 +1,327 @@
+#Array based maze and terrain generators.
+#Each generator fills a terrain array (see terrain.py) in place and returns it,
+#so it can write straight into a grid's storage, including a numpy.memmap.
+
+import random
+
+import numpy as np
+
+from terrain import BLANK, WALL, MUD
+
+
+def get_rng(rng=None):
+    if rng is None or isinstance(rng, (int, np.integer)):
+        return np.random.default_rng(rng)
+    return rng
+
+
+# Random walls: every cell becomes a wall with probability density
+# (the vectorised version of the random.random() > 0.2 loop in prim())
+def random_walls(terrain, density=0.2, rng=None):
+    rng = get_rng(rng)
+    # 16 bit random integers are plenty for a probability and much cheaper than floats
+    mask = rng.integers(0, 1 << 16, terrain.shape, dtype=np.uint16) < int(density * (1 << 16))
+    terrain[...] = BLANK
+    np.copyto(terrain, WALL, where=mask)
+    return terrain
+
+
+# Fractal value noise in [0, 1), built as a pyramid: start from a coarse random lattice,
+# upsample by 2 with linear interpolation and add a finer layer of noise with half the
+# amplitude, octaves times. After the last octave the field is only interpolated.
+def value_noise(shape, scale=64, octaves=3, persistence=0.5, rng=None):
+    rng = get_rng(rng)
+    rows, columns = shape
+    levels = max(0, int(np.ceil(np.log2(max(scale, 1)))))
+
+    field = rng.random((-(-rows >> levels) + 1, -(-columns >> levels) + 1), dtype=np.float32)
+    amplitude = 1.0
+    total = 1.0
+    for level in range(levels):
+        field = upsample(field)
+        if level < octaves - 1:
+            amplitude *= persistence
+            total += amplitude
+            field += amplitude * rng.random(field.shape, dtype=np.float32)
+
+    field = field[:rows, :columns]
+    field *= 1 / total
+    return field
+
+
+# Double the resolution of a 2D field with linear interpolation between neighbours
+def upsample(field):
+    rows, columns = field.shape
+    out = np.empty((rows*2 - 1, columns), dtype=field.dtype)
+    out[0::2] = field
+    np.add(field[:-1], field[1:], out=out[1::2])
+    out[1::2] *= 0.5
+
+    wide = np.empty((rows*2 - 1, columns*2 - 1), dtype=field.dtype)
+    wide[:, 0::2] = out
+    np.add(out[:, :-1], out[:, 1:], out=wide[:, 1::2])
+    wide[:, 1::2] *= 0.5
+    return wide
+
+
+# Noise based terrain: mud wherever the value noise is above threshold
+# (the array version of random_terrain() in grid.py)
+def noise_terrain(terrain, threshold=0.6, scale=64, octaves=3, rng=None):
+    noise = value_noise(terrain.shape, scale=scale, octaves=octaves, rng=rng)
+    terrain[...] = BLANK
+    np.copyto(terrain, MUD, where=noise > threshold)
+    return terrain
+
+
+# Split the interval [0, length) in half again and again (like recursive_division())
+# and return, for each level, the intervals as arrays (low, length, divider) where divider
+# is -1 for intervals that are too small to be split any further. The last level holds
+# the final intervals, none of which split
+def split_levels(length, min_size):
+    low = np.array([0])
+    size = np.array([length])
+    levels = []
+    while True:
+        splits = size >= min_size
+        if not splits.any():
+            break
+        divider = np.where(splits, low + size // 2, -1)
+        levels.append((low, size, divider))
+
+        # Children of split intervals replace them, the rest carry over unchanged
+        half = size // 2
+        low = np.concatenate((low[~splits], low[splits], divider[splits] + 1))
+        size = np.concatenate((size[~splits], half[splits], size[splits] - half[splits] - 1))
+    levels.append((low, size, np.full_like(low, -1)))
+    return levels
+
+
+# Pick one position per range [low, high) out of the sorted array allowed.
+# Returns -1 for a range that has no allowed position in it
+def pick_positions(allowed, low, high, rng):
+    first = np.searchsorted(allowed, low)
+    last = np.searchsorted(allowed, high)
+    count = last - first
+    pick = first + (rng.random(len(low)) * count).astype(np.int64)
+    return np.where(count > 0, allowed[np.minimum(pick, len(allowed) - 1)], -1)
+
+
+# Block-wise recursive division. Because every chamber is halved, the wall lines of each
+# level only depend on the row (or column) intervals, so all the walls can be written
+# as whole rows and columns at once. Each chamber at each level then gets gaps in 3 of
+# the 4 arms of its + shaped wall (or in its only wall), placed away from any wall line
+# that crosses the arm later so no gap is ever closed again.
+def division_blocks(terrain, min_size=5, rng=None):
+    rng = get_rng(rng)
+    rows, columns = terrain.shape
+    terrain[...] = BLANK
+
+    row_levels = split_levels(rows, min_size)
+    column_levels = split_levels(columns, min_size)
+
+    row_walls = np.unique(np.concatenate([divider[divider >= 0] for low, size, divider in row_levels]))
+    column_walls = np.unique(np.concatenate([divider[divider >= 0] for low, size, divider in column_levels]))
+    terrain[row_walls, :] = WALL
+    terrain[:, column_walls] = WALL
+
+    # Gaps can only go where no perpendicular wall line will cross
+    open_columns = np.setdiff1d(np.arange(columns), column_walls)
+    open_rows = np.setdiff1d(np.arange(rows), row_walls)
+
+    # Once one direction runs out of levels its final intervals carry on without splitting
+    for level in range(max(len(row_levels), len(column_levels)) - 1):
+        r_low, r_size, r_div = row_levels[min(level, len(row_levels) - 1)]
+        c_low, c_size, c_div = column_levels[min(level, len(column_levels) - 1)]
+
+        # Every pair of row interval and column interval is a chamber
+        ri, ci = np.meshgrid(np.arange(len(r_low)), np.arange(len(c_low)), indexing='ij')
+        ri, ci = ri.ravel(), ci.ravel()
+        top, height, row_div = r_low[ri], r_size[ri], r_div[ri]
+        left, width, column_div = c_low[ci], c_size[ci], c_div[ci]
+        has_row, has_column = row_div >= 0, column_div >= 0
+        keep = has_row | has_column
+        top, height, row_div, has_row = top[keep], height[keep], row_div[keep], has_row[keep]
+        left, width, column_div, has_column = left[keep], width[keep], column_div[keep], has_column[keep]
+        count = len(top)
+        if count == 0:
+            continue
+
+        # Arms: 0/1 = left/right part of the row wall, 2/3 = top/bottom part of the column wall.
+        # A chamber with both walls skips one random arm, a chamber with one wall uses
+        # the whole wall as a single arm
+        both = has_row & has_column
+        skip = np.where(both, rng.integers(0, 4, count), -1)
+        split_column = np.where(has_column, column_div, left + width)
+        split_row = np.where(has_row, row_div, top + height)
+
+        arms = (
+            (has_row, open_columns, left, split_column, row_div, True),
+            (has_row & has_column, open_columns, column_div + 1, left + width, row_div, True),
+            (has_column, open_rows, top, split_row, column_div, False),
+            (has_row & has_column, open_rows, row_div + 1, top + height, column_div, False),
+        )
+        for arm, (exists, allowed, low, high, line, horizontal) in enumerate(arms):
+            use = exists & (skip != arm)
+            if not use.any():
+                continue
+            positions = pick_positions(allowed, low[use], high[use], rng)
+            found = positions >= 0
+            if horizontal:
+                terrain[line[use][found], positions[found]] = BLANK
+            else:
+                terrain[positions[found], line[use][found]] = BLANK
+
+    return terrain
+
+
+# Recursive division with an explicit stack instead of recursion, so it doesn't hit the
+# recursion limit on big grids. Each chamber (top, left, height, width) is halved by a
+# row wall and a column wall, written as slices, and 3 of the 4 arms of the + get a gap.
+# A wall is never built against a gap in the wall it runs into (which would block the gap):
+# the cell just past each end of a wall is either the edge of the grid, a wall or a gap,
+# so the terrain itself tells us where the gaps are and the wall is moved along by one.
+# on_change(rows, columns) is called with the slices of every wall and gap as they are made.
+# This is still one Python step per chamber (about rows*columns/min_size**2 of them), so it
+# only suits the GUI and maps up to a few thousand rows: 0.27s at 1000x1000, 3.9s at 4096x4096
+# and 20s at 10000x10000. division_blocks() makes the same kind of maze in 0.06s, 0.36s and 1.3s
+def recursive_division(terrain, min_size=5, rng=None, on_change=None):
+    rng = random.Random(int(get_rng(rng).integers(1 << 62)))
+    rows, columns = terrain.shape
+    terrain[...] = BLANK
+
+    def is_gap(row, column):
+        return 0 <= row < rows and 0 <= column < columns and terrain[row, column] == BLANK
+
+    def make_gap(row, column):
+        terrain[row, column] = BLANK
+        if on_change:
+            on_change(slice(row, row+1), slice(column, column+1))
+
+    chambers = [(0, 0, rows, columns)]
+    while chambers:
+        top, left, height, width = chambers.pop()
+        bottom, right = top + height, left + width
+
+        # Pick the dividing column and row near the middle, avoiding gaps at either end
+        column_div = row_div = None
+        if width >= min_size:
+            for column in (left + width//2, left + width//2 + 1, left + width//2 - 1):
+                if not is_gap(top-1, column) and not is_gap(bottom, column):
+                    column_div = column
+                    break
+        if height >= min_size:
+            for row in (top + height//2, top + height//2 + 1, top + height//2 - 1):
+                if not is_gap(row, left-1) and not is_gap(row, right):
+                    row_div = row
+                    break
+
+        if column_div is None and row_div is None:
+            continue
+
+        # Draw the walls as whole slices
+        if column_div is not None:
+            terrain[top:bottom, column_div] = WALL
+            if on_change:
+                on_change(slice(top, bottom), slice(column_div, column_div+1))
+        if row_div is not None:
+            terrain[row_div, left:right] = WALL
+            if on_change:
+                on_change(slice(row_div, row_div+1), slice(left, right))
+
+        # Arms of the wall(s) as (fixed row, fixed column, low, high) ranges to put a gap in
+        column_split = column_div if column_div is not None else right
+        row_split = row_div if row_div is not None else bottom
+        arms = []
+        if row_div is not None:
+            arms.append((row_div, None, left, column_split))
+            if column_div is not None:
+                arms.append((row_div, None, column_div + 1, right))
+        if column_div is not None:
+            arms.append((None, column_div, top, row_split))
+            if row_div is not None:
+                arms.append((None, column_div, row_div + 1, bottom))
+        if len(arms) == 4:
+            arms.pop(rng.randrange(4))
+
+        for row, column, low, high in arms:
+            if high <= low:
+                continue
+            if row is not None:
+                make_gap(row, rng.randrange(low, high))
+            else:
+                make_gap(rng.randrange(low, high), column)
+
+        # Push the (up to 4) new chambers
+        row_ranges = ((top, row_split - top), (row_split + 1, bottom - row_split - 1)) if row_div is not None else ((top, height),)
+        column_ranges = ((left, column_split - left), (column_split + 1, right - column_split - 1)) if column_div is not None else ((left, width),)
+        for chamber_top, chamber_height in row_ranges:
+            for chamber_left, chamber_width in column_ranges:
+                if chamber_height > 0 and chamber_width > 0:
+                    chambers.append((chamber_top, chamber_left, chamber_height, chamber_width))
+
+    return terrain
+
+
+# Eller's algorithm: a perfect maze generated one row at a time, keeping only the set
+# label of each cell in the current row, so memory is proportional to the width.
+# Yields the terrain rows (uint8 arrays of 2*width+1 cells) of a (2*height+1) x (2*width+1)
+# maze with the cells on odd coordinates (the same layout as better_prim()).
+# horizontal / vertical are the chances of joining a cell to its east / south neighbour
+def eller_rows(width, height, rng=None, horizontal=0.5, vertical=0.3):
+    rng = random.Random(int(get_rng(rng).integers(1 << 62)))
+    columns = 2*width + 1
+
+    yield np.full(columns, WALL, dtype=np.uint8)
+
+    labels = [0] * width
+    next_label = 1
+    for maze_row in range(height):
+        last = maze_row == height - 1
+
+        # Cells that weren't joined from above start in a set of their own
+        for cell in range(width):
+            if not labels[cell]:
+                labels[cell] = next_label
+                next_label += 1
+
+        # Join neighbouring cells that are in different sets (always on the last row).
+        # Sets are merged with a small union-find over this row's labels
+        parent = {}
+
+        def find(label):
+            root = label
+            while root in parent:
+                root = parent[root]
+            while label != root:
+                parent[label], label = root, parent[label]
+            return root
+
+        cell_row = np.full(columns, WALL, dtype=np.uint8)
+        cell_row[1::2] = BLANK
+        for cell in range(width - 1):
+            here, east = find(labels[cell]), find(labels[cell + 1])
+            if here != east and (last or rng.random() < horizontal):
+                parent[east] = here
+                cell_row[2*cell + 2] = BLANK
+        labels = [find(label) for label in labels]
+        yield cell_row
+
+        below = np.full(columns, WALL, dtype=np.uint8)
+        if last:
+            yield below
+            return
+
+        # Every set carries on downwards through at least one of its cells
+        members = {}
+        for cell, label in enumerate(labels):
+            members.setdefault(label, []).append(cell)
+        next_labels = [0] * width
+        for label, cells in members.items():
+            down = [cell for cell in cells if rng.random() < vertical]
+            if not down:
+                down = [rng.choice(cells)]
+            for cell in down:
+                next_labels[cell] = label
+                below[2*cell + 1] = BLANK
+        labels = next_labels
+        yield below
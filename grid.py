@@ -11,8 +11,15 @@
 import pygame
 import time
 from priority_queue import PrioritySet, PriorityQueue, AStarQueue
+from random_set import RandomSet
+from terrain import NODETYPES, START, END, MUD, new_terrain
+from mapfile import save_map, load_map, MapFileError
+from generators import random_walls, noise_terrain, recursive_division as generate_division
+from solvers import manhattan, octile, trace_parents, CORNER_CUTTING
+import numpy as np
 from math import inf
 import random
+from array import array
 from collections import deque
 
 # Define some colors
@@ -73,15 +80,30 @@ class Node():
 
     distance_modifiers = {'blank': 1, 'start': 1, 'end': 1, 'wall': inf, 'mud': 3, 'dormant': inf}
 
+    # The visited and path overlays are stamped with the search generation they were set
+    # in. clear_visited() starts a new generation, so every older stamp counts as cleared
+    generation = 1
+
     def __init__(self, nodetype, text='', colors=colors, dmf=distance_modifiers):
         self.nodetype = nodetype
         self.rcolor = colors['regular'][self.nodetype]
         self.vcolor = colors['visited'][self.nodetype]
         self.pcolor = colors['path'][self.nodetype]
-        self.is_visited = True if nodetype == 'start' else True if nodetype == 'end' else False
-        self.is_path = True if nodetype == 'start' else True if nodetype == 'end' else False
+        self.visited_generation = Node.generation if nodetype in ('start', 'end') else 0
+        self.path_generation = Node.generation if nodetype in ('start', 'end') else 0
         self.distance_modifier = dmf[self.nodetype]
-        self.color = self.pcolor if self.is_path else self.vcolor if self.is_visited else self.rcolor
+
+    @property
+    def is_visited(self):
+        return self.visited_generation == Node.generation
+
+    @property
+    def is_path(self):
+        return self.path_generation == Node.generation
+
+    @property
+    def color(self):
+        return self.pcolor if self.is_path else self.vcolor if self.is_visited else self.rcolor
 
     def update(self, nodetype=False, is_visited='unchanged', is_path='unchanged', colors=colors, dmf=distance_modifiers, nodetypes=nodetypes):
         if nodetype:
@@ -93,17 +115,16 @@ class Node():
 
         if is_visited != 'unchanged':
             assert type(is_visited) == bool, "'is_visited' must be boolean: True or False" 
-            self.is_visited = is_visited
+            self.visited_generation = Node.generation if is_visited else 0
 
         if is_path != 'unchanged':
             assert type(is_path) == bool, "'is_path' must be boolean: True or False" 
-            self.is_path = is_path
+            self.path_generation = Node.generation if is_path else 0
 
         self.rcolor = colors['regular'][self.nodetype]
         self.vcolor = colors['visited'][self.nodetype]
         self.pcolor = colors['path'][self.nodetype]
         self.distance_modifier = dmf[self.nodetype]
-        self.color = self.pcolor if self.is_path else self.vcolor if self.is_visited else self.rcolor
 
 # This sets the WIDTH and HEIGHT of each grid location
 WIDTH = 7
@@ -134,8 +155,17 @@ grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
 grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
 
 DIAGONALS = False
+# Whether diagonal moves may pass the corner of a wall, one of solvers.CORNER_CUTTING
+CORNER_RULE = 'never'
+# The A* heuristic is multiplied by this: above 1 the search is more direct, but the
+# path can cost up to this many times the shortest. W switches between HEURISTIC_WEIGHTS
+HEURISTIC_WEIGHT = 1
+HEURISTIC_WEIGHTS = [1, 1.5, 2, 5]
 VISUALISE = False
 
+# Where the grid is saved to / loaded from with the S and L keys
+MAP_PATH = 'map.pfm'
+
 # Used for handling click & drag
 mouse_drag = False
 drag_start_point = False
@@ -176,17 +206,1217 @@ terrainButton = Button(GREY, (SCREEN_WIDTH/3)*2, SCREEN_WIDTH + BUTTON_HEIGHT*2,
 visToggleButton = Button(GREY, SCREEN_WIDTH/3, SCREEN_WIDTH + BUTTON_HEIGHT*2, SCREEN_WIDTH/3, BUTTON_HEIGHT, f"Visualise: {str(VISUALISE)}")
 
 pygame.display.set_caption("Pathfinder")
- 
+
+### UTILITY FUNCTIONS ###
+def RandomMaze():
+    global grid
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    grid = prim()
+    
+def PrimMaze():
+    global grid
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    grid = prim()
+
+# Cells marked visited or on the path since the last clear_visited(), so only they are drawn again
+overlay_cells = []
+
+# Mark a cell as visited or on the path in the current search generation
+def mark_overlay(mazearray, row, column, **overlays):
+    node = mazearray[row][column]
+    if not (node.is_visited or node.is_path):
+        overlay_cells.append((row, column))
+    node.update(**overlays)
+
+# Clear the visited cells and path, keeping the board. Starting a new generation clears
+# every cell at once, then only the cells the last search coloured are drawn again
+def clear_visited():
+    global overlay_cells
+    Node.generation += 1
+    draw_squares(overlay_cells)
+    overlay_cells = []
+
+def update_path(algorithm_run=None):
+    if algorithm_run is None:
+        algorithm_run = globals()['algorithm_run']
+
+    clear_visited()
+    
+    valid_algorithms = ['dijkstra', 'astar', 'dfs', 'bfs','greedy']
+
+    assert algorithm_run in valid_algorithms, f"last algorithm used ({algorithm_run}) is not in valid algorithms: {valid_algorithms}"
+
+    if algorithm_run == 'dijkstra':
+        path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False)
+    elif algorithm_run == 'astar':
+        path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False, astar=True)
+    elif algorithm_run == 'greedy':
+        path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False, greedy = True)
+    elif algorithm_run == 'dfs':
+        path_found = xfs(grid, START_POINT, END_POINT, x='d', visualise=False)
+    elif algorithm_run == 'bfs':
+        path_found = xfs(grid, START_POINT, END_POINT, x='b', visualise=False)
+    else:
+        path_found = False
+    return path_found
+
+def random_terrain(mazearray=None, threshold=0.6, visualise=None):
+    if mazearray is None:
+        mazearray = grid
+    if visualise is None:
+        visualise = VISUALISE
+
+    # Mud goes wherever a smooth noise field (generated for the whole grid at once)
+    # is above the threshold, giving a few blobby patches of mud
+    terrain = noise_terrain(new_terrain(ROWS), threshold=threshold, scale=max(1, ROWS//6))
+
+    for row, column in zip(*np.nonzero(terrain == MUD)):
+        if mazearray[row][column].nodetype != 'start' and mazearray[row][column].nodetype != 'end':
+            mazearray[row][column].update(nodetype='mud')
+            draw_square(row,column,mazearray=mazearray)
+
+    if visualise:
+        pygame.display.flip()
+
+# Copy a terrain array (see terrain.py) into a grid of Nodes, leaving the start and end points alone.
+# Only the nodes whose type changes are touched, and their attributes are set straight from a
+# table per terrain code rather than through Node.update for every cell
+def load_terrain(terrain, mazearray=None, colors=Node.colors, dmf=Node.distance_modifiers):
+    if mazearray is None:
+        mazearray = grid
+    kinds = [(nodetype, colors['regular'][nodetype], colors['visited'][nodetype], colors['path'][nodetype], dmf[nodetype])
+             for nodetype in NODETYPES]
+    for row, (codes, nodes) in enumerate(zip(terrain.tolist(), mazearray)):
+        for column, (code, node) in enumerate(zip(codes, nodes)):
+            nodetype = NODETYPES[code]
+            if node.nodetype == nodetype or (row,column) == START_POINT or (row,column) == END_POINT:
+                continue
+            # Node.update never turns the start into a wall
+            if node.nodetype == 'start' and nodetype == 'wall':
+                continue
+            node.nodetype, node.rcolor, node.vcolor, node.pcolor, node.distance_modifier = kinds[code]
+
+# Copy a grid of Nodes into a new terrain array
+def grid_to_terrain(mazearray=None):
+    if mazearray is None:
+        mazearray = grid
+    codes = {nodetype: code for code, nodetype in enumerate(NODETYPES)}
+    return np.array([[codes[node.nodetype] for node in row] for row in mazearray], dtype=np.uint8)
+
+# Function for moving an item between two dicts
+def dict_move(from_dict, to_dict, item):
+    to_dict[item] = from_dict[item]
+    from_dict.pop(item)
+    return from_dict, to_dict
+
+# + represents non-diagonal neighbours, x diagonal neighbours
+NEIGHBOUR_STEPS = (((1,0),"+"), ((-1,0),"+"), ((0,1),"+"), ((0,-1),"+"))
+DIAGONAL_STEPS = (((1,1),"x"), ((1,-1),"x"), ((-1,1),"x"), ((-1,-1),"x"))
+
+def get_neighbours(node, max_width=ROWS-1, diagonals=False):
+    steps = NEIGHBOUR_STEPS + DIAGONAL_STEPS if diagonals else NEIGHBOUR_STEPS
+    for (row_step, column_step), ntype in steps:
+        row, column = node[0] + row_step, node[1] + column_step
+        if 0 <= row <= max_width and 0 <= column <= max_width:
+            yield (row, column), ntype
+
+# For Pygame: the size on screen of a square for the current number of ROWS
+def square_size():
+    height = screen.get_height()*(2/3)
+    if(ROWS==200):
+        height = 3
+    elif(ROWS ==150):
+        height = 5
+    elif(ROWS==100):
+        height=5
+    elif(ROWS==50):
+        height=6
+    elif(ROWS==250):
+        height = 2
+    elif(ROWS==300):
+        height =2
+    elif(ROWS==350):
+        height =1
+    return height
+
+# For Pygame: this draws a square in the given location (for when properties updated)
+def draw_square(row,column,mazearray=None):
+    if mazearray is None:
+        mazearray = grid
+    height = square_size()
+    
+    pygame.draw.rect(
+        screen,
+        grid[row][column].color,
+        [
+            height * column,
+            height* row,
+            height,
+            height
+        ]
+    )
+    pygame.event.pump()
+
+# For Pygame: draw a list of (row, column) squares, working out their size and
+# handling events once rather than for every square
+def draw_squares(cells):
+    height = square_size()
+    for row, column in cells:
+        pygame.draw.rect(screen, grid[row][column].color, [height * column, height * row, height, height])
+    pygame.event.pump()
+
+# For Pygame: the rectangle of the screen a square is drawn in
+def square_rect(row, column):
+    height = square_size()
+    return pygame.Rect(height * column, height * row, height, height)
+
+# For Pygame: the rectangle of the screen the grid is drawn in
+def grid_rect():
+    return pygame.Rect(0, 0, square_size() * ROWS, square_size() * ROWS)
+
+# For Pygame: this updates the screen for the given square
+# (as opposed to pygame.display.flip() which updates the entire screen)
+def update_square(row,column):
+    pygame.display.update(
+        (MARGIN + WIDTH) * column + MARGIN,
+        (MARGIN + HEIGHT) * row + MARGIN,
+        WIDTH,
+        HEIGHT
+    )
+    pygame.event.pump()
+
+### MAZE CREATION ALGORITHMS ###
+
+# randomized Prim's algorithm for creating random mazes
+def prim(mazearray=False, start_point=False, visualise=None):
+    if visualise is None:
+        visualise = VISUALISE
+
+    # If a maze isn't input, we just create a grid full of walls
+    if not mazearray:
+        mazearray = []
+        for row in range(ROWS):
+            mazearray.append([])
+            for column in range(ROWS):
+                mazearray[row].append(Node('wall'))
+                if visualise:
+                    draw_square(row,column,mazearray=mazearray)
+
+    n = len(mazearray) - 1
+
+    if not start_point:
+        start_point = (random.randrange(0,n,2),random.randrange(0,n,2))
+    #     START_POINT = start_point
+    # mazearray[start_point[0]][start_point[1]].update(nodetype='start')
+    
+    if visualise:
+        draw_square(start_point[0], start_point[1], mazearray=mazearray)
+        pygame.display.flip()
+
+    walls = RandomSet()
+
+    neighbours = get_neighbours(start_point, n)
+
+    # Knock out about 80% of the walls in one go
+    load_terrain(random_walls(new_terrain(ROWS), density=0.2), mazearray)
+
+    for neighbour, ntype in neighbours:
+        if mazearray[neighbour[0]][neighbour[1]].nodetype == 'wall':
+            walls.add(neighbour)
+            # walls.append(neighbour)
+
+    # While there are walls in the list:
+    # Pick a random wall from the list. If only one of the cells that the wall divides is visited, then:
+    # # Make the wall a passage and mark the unvisited cell as part of the maze.
+    # # Add the neighboring walls of the cell to the wall list.
+    # Remove the wall from the list.
+    while len(walls) > 0:                
+        wall = walls.choice()
+        wall_neighbours = get_neighbours(wall, n)
+        neighbouring_walls = set()
+        pcount = 0
+        for wall_neighbour, ntype in wall_neighbours:
+            if wall_neighbour == (start_point or END_POINT):
+                continue
+            if mazearray[wall_neighbour[0]][wall_neighbour[1]].nodetype != 'wall':
+                pcount += 1
+            else:
+                neighbouring_walls.add(wall_neighbour)
+                
+        if pcount <= 1:
+            #mazearray[wall[0]][wall[1]].update(nodetype='blank')
+            if visualise:
+                draw_square(wall[0],wall[1],mazearray)
+                update_square(wall[0],wall[1])
+                time.sleep(0.000001)
+
+            walls.update(neighbouring_walls)
+
+        
+        walls.remove(wall)            
+
+    mazearray[END_POINT[0]][END_POINT[1]].update(nodetype='end')
+    mazearray[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+
+    return mazearray
+
+# randomized Prim's algorithm for creating random mazes
+# This version maintains the traditional "maze" look, where a route cannot
+# be diagonally connected to another point on the route
+def better_prim(mazearray=False, start_point=False, visualise=None):
+    if visualise is None:
+        visualise = VISUALISE
+
+    # If a maze isn't input, we just create a grid full of walls
+    if not mazearray:
+        mazearray = []
+        for row in range(ROWS):
+            mazearray.append([])
+            for column in range(ROWS):
+                if row % 2 != 0 and column % 2 != 0:
+                    mazearray[row].append(Node('dormant'))
+                else:
+                    mazearray[row].append(Node('wall'))
+                if visualise:
+                    draw_square(row,column,mazearray=mazearray)
+
+    n = len(mazearray) - 1
+
+    if not start_point:
+        start_point = (random.randrange(1,n,2),random.randrange(1,n,2))
+        mazearray[start_point[0]][start_point[1]].update(nodetype='blank')
+    
+    if visualise:
+        draw_square(start_point[0], start_point[1], mazearray=mazearray)
+        pygame.display.flip()
+
+    walls = RandomSet()
+
+    starting_walls = get_neighbours(start_point, n)
+
+    for wall, ntype in starting_walls:
+        if mazearray[wall[0]][wall[1]].nodetype == 'wall':
+            walls.add(wall)
+
+    # While there are walls in the list (set):
+    # Pick a random wall from the list. If only one of the cells that the wall divides is visited, then:
+    # # Make the wall a passage and mark the unvisited cell as part of the maze.
+    # # Add the neighboring walls of the cell to the wall list.
+    # Remove the wall from the list.
+    while len(walls) > 0:
+        wall = walls.choice()
+        visited = 0
+        add_to_maze = []
+
+        for wall_neighbour, ntype in get_neighbours(wall,n):
+            if mazearray[wall_neighbour[0]][wall_neighbour[1]].nodetype == 'blank':
+                visited += 1
+
+        if visited <= 1:
+            mazearray[wall[0]][wall[1]].update(nodetype='blank')
+            
+            if visualise:
+                draw_square(wall[0],wall[1],mazearray)
+                update_square(wall[0],wall[1])
+                time.sleep(0.0001)
+            
+            # A 'dormant' node (below) is a different type of node I had to create for this algo
+            # otherwise the maze generated doesn't look like a traditional maze.
+            # Every dormant eventually becomes a blank node, while the regular walls
+            # sometimes become a passage between blanks and are sometimes left as walls
+            for neighbour, ntype in get_neighbours(wall,n):
+                if mazearray[neighbour[0]][neighbour[1]].nodetype == 'dormant':
+                    add_to_maze.append((neighbour[0],neighbour[1]))
+            
+            if len(add_to_maze) > 0:
+                cell = add_to_maze.pop()
+                mazearray[cell[0]][cell[1]].update(nodetype='blank')
+                
+                if visualise:
+                    draw_square(cell[0],cell[1],mazearray)
+                    update_square(cell[0],cell[1])
+                    time.sleep(0.0001)
+                
+                for cell_neighbour, ntype in get_neighbours(cell,n):
+                    if mazearray[cell_neighbour[0]][cell_neighbour[1]].nodetype == 'wall':
+                        walls.add(cell_neighbour)
+
+        walls.remove(wall)
+
+    mazearray[END_POINT[0]][END_POINT[1]].update(nodetype='end')
+    mazearray[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+
+    return mazearray
+
+# Recursive division algorithm
+N, S, E, W = 1, 2, 4, 8
+HORIZONTAL, VERTICAL = 0, 1
+
+def recursive_division2(grid = None, mx = 0, my=0, ax=ROWS, ay = ROWS):
+    if grid is None:
+        grid = globals()['grid']
+    dx = ax - mx
+    dy = ay - my
+    if dx < 2 or dy < 2:
+        # make a hallway
+        if dx > 1:
+            y = my
+            for x in range(mx, ax-1):
+                grid[y][x].update(nodetype='wall')
+                grid[y][x+1].update(nodetype='wall')
+        elif dy > 1:
+            x = mx
+            for y in range(my, ay-1):
+                grid[y][x].update(nodetype='wall')
+                grid[y+1][x].update(nodetype='wall')
+        return
+
+    wall = HORIZONTAL if dy > dx else (VERTICAL if dx > dy else random.randrange(2))
+
+    xp = random.randrange(mx, ax-(wall == VERTICAL))
+    yp = random.randrange(my, ay-(wall == HORIZONTAL))
+
+    x, y = xp, yp
+    if wall == HORIZONTAL:
+        ny = y + 1
+        grid[y][x].update(nodetype='wall')
+        grid[ny][x].update(nodetype='wall')
+
+        #recursive_division2(grid, mx, my, ax, ny)
+        #recursive_division2(grid, mx, ny, ax, ay)
+    else:
+        nx = x + 1
+        grid[y][x].update(nodetype='wall')
+        grid[y][nx].update(nodetype='wall')
+
+        #recursive_division2(grid, mx, my, nx, ay)
+        #recursive_division2(grid, nx, my, ax, ay)
+def recursive_division(mazearray=None, visualise=None):
+    if mazearray is None:
+        mazearray = grid
+    if visualise is None:
+        visualise = VISUALISE
+
+    sleep = 0.001
+
+    # Copy each wall and gap into the Node grid as the generator makes it
+    def on_change(rows, columns):
+        for row in range(rows.start, rows.stop):
+            for column in range(columns.start, columns.stop):
+                if (row,column) != START_POINT and (row,column) != END_POINT:
+                    mazearray[row][column].update(nodetype=NODETYPES[terrain[row, column]])
+                    draw_square(row, column, mazearray=mazearray)
+                    if visualise:
+                        update_square(row, column)
+        if visualise:
+            time.sleep(sleep)
+
+    terrain = new_terrain(ROWS)
+    generate_division(terrain, on_change=on_change)
+
+### PATHFINDING ALGORITHMS ###
+
+#Changes: Added Greedy Best-First Search algorithm
+
+# Dijkstra's pathfinding algorithm, with the option to switch to A* by adding a heuristic of expected distance to end node
+def dijkstra(mazearray, start_point=(0,0), goal_node=False, display=pygame.display, visualise=None, diagonals=None, astar=False, greedy = False, corner_cutting=None, weight=None):
+    global astarTime
+    global astarNodes
+    if visualise is None:
+        visualise = VISUALISE
+    if diagonals is None:
+        diagonals = DIAGONALS
+    if corner_cutting is None:
+        corner_cutting = CORNER_RULE
+    if weight is None:
+        weight = HEURISTIC_WEIGHT
+    heuristic = 0
+    distance = 0
+
+    # Get the dimensions of the (square) maze
+    n = len(mazearray) - 1
+    
+    # Create the various data structures with speed in mind
+    visited_nodes = set()
+    unvisited_nodes = set([(x,y) for x in range(n+1) for y in range(n+1)])
+    queue = AStarQueue()
+
+    queue.push(distance+heuristic, distance, start_point)
+    v_distances = {}
+    # Track parent nodes: the parent's id (row * columns + column) for each node's id, -1 for none
+    columns = n + 1
+    came_from = array('i', [-1]) * (columns * columns)
+    # The shortest distance each node has been pushed with, so it is only pushed again (with a new parent) for a shorter one
+    queued_distances = array('d', [inf]) * (columns * columns)
+    queued_distances[start_point[0] * columns + start_point[1]] = 0
+
+    #print(greedy)
+
+    # If a goal_node is not set, put it in the bottom right (1 square away from either edge)
+    if not goal_node:
+        goal_node = (n,n)
+    priority, current_distance, current_node = queue.pop()
+    start = time.perf_counter()
+    
+    # Main algorithm loop
+    while current_node != goal_node and len(unvisited_nodes) > 0:
+        if current_node in visited_nodes:
+            if len(queue.show()) == 0:
+                return False
+            else:
+                priority, current_distance, current_node = queue.pop()
+                continue
+        
+        # Call to check neighbours of the current node
+        for neighbour in get_neighbours(current_node, n, diagonals=diagonals):
+            neighbours_loop(
+                neighbour, 
+                mazearr=mazearray, 
+                visited_nodes=visited_nodes, 
+                unvisited_nodes=unvisited_nodes, 
+                queue=queue, 
+                v_distances=v_distances, 
+                current_node=current_node,
+                current_distance=current_distance,
+                diags=diagonals,
+                astar=astar,
+                greedy = greedy,
+                came_from = came_from,
+                queued_distances = queued_distances,
+                corner_cutting=corner_cutting,
+                weight=weight
+            )
+
+        # When we have checked the current node, add and remove appropriately
+        visited_nodes.add(current_node)
+        unvisited_nodes.discard(current_node)
+        
+        # Add the distance to the visited distances dictionary (used for traceback)
+        v_distances[current_node] = current_distance
+        
+        # Pygame part: visited nodes mark visited nodes as green
+        if (current_node[0],current_node[1]) != start_point:
+            mark_overlay(mazearray, current_node[0], current_node[1], is_visited=True)
+            draw_square(current_node[0],current_node[1],mazearray=mazearray)
+
+            # If we want to visualise it (rather than run instantly)
+            # then we update the grid with each loop
+            if visualise:
+                update_square(current_node[0],current_node[1])
+                time.sleep(0.00001)
+        
+        # If there are no nodes in the queue then we return False (no path)
+        if len(queue.show()) == 0:
+            return False
+        # Otherwise we take the minimum distance as the new current node
+        else:
+            priority, current_distance, current_node = queue.pop()
+    
+    # current_distance is the distance the goal node was popped from the queue with
+    v_distances[goal_node] = current_distance
+    visited_nodes.add(goal_node)
+
+    # Draw the path back from goal node to start node
+    trace_back(goal_node, start_point, v_distances, visited_nodes, n, mazearray, diags=diagonals, visualise=visualise, came_from =came_from)
+
+    end = time.perf_counter()
+    num_visited = len(visited_nodes)
+    time_taken = end-start
+    astarTime += time_taken
+    astarNodes += num_visited
+
+    # Print timings
+    #print(f"Program finished in {time_taken:.4f} seconds after checking {num_visited} nodes. That is {time_taken/num_visited:.8f} seconds per node.")
+    
+    # The commented out line returns the distance to the end node
+    # return False if v_distances[goal_node] == float('inf') else v_distances[goal_node]
+    return False if v_distances[goal_node] == float('inf') else True
+
+
+# (DIJKSTRA/A*) loop to check all neighbours of the "current node"
+def neighbours_loop(neighbour, mazearr, visited_nodes, unvisited_nodes, queue, v_distances, current_node, current_distance, diags=False, astar=False, greedy = False, came_from=None, queued_distances=None, corner_cutting='never', weight=1):
+    
+    neighbour, ntype = neighbour
+
+    heuristic = 0
+    #print("here")
+    if astar or greedy:
+        # Manhattan distance overestimates when diagonal moves are allowed, octile doesn't
+        heuristic = octile(neighbour, END_POINT) if diags else manhattan(neighbour, END_POINT)
+        heuristic *= weight # if this goes above 1 then the shortest path is not guaranteed, but the attempted route becomes more direct
+    
+    # If the neighbour has already been visited 
+    if neighbour in visited_nodes:
+        pass
+    elif mazearr[neighbour[0]][neighbour[1]].nodetype == 'wall':
+        visited_nodes.add(neighbour)
+        unvisited_nodes.discard(neighbour)
+    else:
+        if ntype == "x":
+            # A diagonal move passes two cells, count how many of them are walls
+            blocked = (mazearr[current_node[0]][neighbour[1]].nodetype == 'wall') + (mazearr[neighbour[0]][current_node[1]].nodetype == 'wall')
+            if blocked > CORNER_CUTTING[corner_cutting]:
+                return
+        modifier = mazearr[neighbour[0]][neighbour[1]].distance_modifier
+        # Diagonal moves are sqrt(2) times as long
+        length = 1 if ntype == "+" else 2**0.5
+        cost = length
+        if not (greedy):
+            cost = current_distance+(length*modifier)
+        # Only push the neighbour (and point it back at this node) if this way is shorter
+        columns = len(mazearr)
+        node_id = neighbour[0] * columns + neighbour[1]
+        if cost >= queued_distances[node_id]:
+            return
+        queued_distances[node_id] = cost
+        came_from[node_id] = current_node[0] * columns + current_node[1]
+        queue.push(cost+heuristic, cost, neighbour)
+
+# (DIJKSTRA/A*) trace a path back from the end node to the start node after the algorithm has been run
+def trace_back(goal_node, start_node, v_distances, visited_nodes, n, mazearray, diags=False, visualise=None, came_from=None):
+    global astarPath
+    # Follow the parents back to the start, then mark and draw the path in one go
+    columns = n + 1
+    path = trace_parents(came_from, goal_node, columns)
+    rows, path_columns = np.divmod(path[:-1], columns)
+    cells = list(zip(rows.tolist(), path_columns.tolist()))
+    for row, column in cells:
+        mark_overlay(mazearray, row, column, is_path=True)
+    draw_squares(cells)
+    astarPath = len(path) - 1
+    pygame.display.flip()
+
+    mark_overlay(mazearray, start_node[0], start_node[1], is_path=True)
+
+
+def xfs(mazearray, start_point, goal_node, x, display=pygame.display, visualise=None, diagonals=None, corner_cutting=None):
+    '''
+    This is a function where you choose x='b' or x='d' to run bfs (breadth-first search) or
+    dfs (depth-first search) on your chosen mazearray (grid format), with chosen start_point (x,y)
+    and chosen goal_node (x,y)
+    '''
+    global astarNodes
+    global astarTime
+    global astarPath
+    if visualise is None:
+        visualise = VISUALISE
+    if diagonals is None:
+        diagonals = DIAGONALS
+    if corner_cutting is None:
+        corner_cutting = CORNER_RULE
+
+    #print("start")
+    assert x == 'b' or x == 'd', "x should equal 'b' or 'd' to make this bfs or dfs"
+
+    # Get the dimensions of the (square) maze
+    n = len(mazearray) - 1
+    
+    # Create the various data structures with speed in mind
+    mydeque = deque()
+    mydeque.append(start_point)
+    visited_nodes = set([])
+    path_dict = {start_point: None}
+    
+    stop = False
+
+    start = time.perf_counter()
+
+    # Main algorithm loop
+    while len(mydeque) > 0 and stop!= True:
+        #print(len(mydeque))
+        if x == 'd':
+            current_node = mydeque.pop()
+        elif x == 'b':
+            current_node = mydeque.popleft()
+      
+        if current_node == goal_node:
+            count = 0
+            # Trace back to start using path_dict
+            path_node = goal_node
+            while stop != True:
+                path_node = path_dict[path_node]
+                mark_overlay(mazearray, path_node[0], path_node[1], is_path=True)
+                draw_square(path_node[0],path_node[1],mazearray=mazearray)
+                count +=1
+                if visualise:
+                    update_square(path_node[0],path_node[1])
+                if path_node == start_point:
+                    #print(count)
+                    astarPath = count
+                    stop = True
+            #print("stopped")
+            
+        
+        if mazearray[current_node[0]][current_node[1]].nodetype == 'wall':
+            continue
+        
+        if current_node not in visited_nodes:
+            visited_nodes.add(current_node)
+            mark_overlay(mazearray, current_node[0], current_node[1], is_visited=True)
+            draw_square(current_node[0],current_node[1],mazearray=mazearray)
+            if visualise:
+                update_square(current_node[0],current_node[1])
+                time.sleep(0.001)
+            
+            for neighbour, ntype in get_neighbours(current_node, n, diagonals=diagonals):
+                if ntype == "x":
+                    # A diagonal move passes two cells, count how many of them are walls
+                    blocked = (mazearray[current_node[0]][neighbour[1]].nodetype == 'wall') + (mazearray[neighbour[0]][current_node[1]].nodetype == 'wall')
+                    if blocked > CORNER_CUTTING[corner_cutting]:
+                        continue
+                # Visited nodes are never expanded again, so don't queue them. BFS reaches
+                # a node first along a shortest path, so it only queues each node once
+                if neighbour not in visited_nodes and (x == 'd' or neighbour not in path_dict):
+                    mydeque.append(neighbour)
+                    # Used for tracing back
+                    path_dict[neighbour] = current_node
+        #print(len(mydeque))
+    #print("stop")
+    end = time.perf_counter()
+    num_visited = len(visited_nodes)
+    time_taken = end-start
+    astarTime += time_taken
+    astarNodes += num_visited
+    #print(f"Program finished in {time_taken:.4f} seconds after checking {num_visited} nodes. That is {time_taken/num_visited:.8f} seconds per node.")
+   # print("here")
+    pygame.display.flip()
+    return False
+
+
+# Update the GUI 
+def update_gui(draw_background=True, draw_buttons=True, draw_grid=True):
+    
+    if draw_background:
+        # Draw a black background to set everything on
+        screen.fill(BLACK)
+        pass
+
+    if draw_buttons:
+        # Draw Button below grid
+        for button in button_handlers:
+            button.draw(screen, (0,0,0))
+
+    if draw_grid:
+        # Draw the grid
+        for row in range(ROWS):
+            for column in range(ROWS):
+                color = grid[row][column].color
+                draw_square(row,column)
+### BUTTON HANDLERS ###
+
+# When the Dijkstra Button is clicked
+def run_dijkstra():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    clear_visited()
+    if VISUALISE:    
+        pygame.display.flip()
+    astarNodes =0
+    astarTime = 0
+    #for x in range(30):
+    path_found = dijkstra(grid, START_POINT, END_POINT)
+    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+    algorithm_run = 'dijkstra'
+
+    time_taken = astarTime/30
+    num_visited = astarNodes/30
+    if(time_taken == 0 or num_visited == 0):
+        print("no solution")
+    
+    else:
+        pass
+        #print(f"Dijkstra finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
+
+# When the DFS Button is clicked
+def run_dfs():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    clear_visited()
+    if VISUALISE:
+        pygame.display.flip()
+    astarTime = 0
+    astarNodes = 0
+    #for x in range(30):
+    path_found = xfs(grid, START_POINT, END_POINT, x='d')
+    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+    algorithm_run = 'dfs'
+
+    time_taken = astarTime/30
+    num_visited = astarNodes/30
+    if(time_taken == 0 or num_visited == 0):
+        print("no solution")
+    
+    else:
+        pass
+        #print(f"DFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
+
+# When the DFS Button is clicked
+def run_bfs():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    clear_visited()
+    if VISUALISE:
+        pygame.display.flip()
+    astarTime = 0
+    astarNodes = 0
+    #for x in range(30):
+    path_found = xfs(grid, START_POINT, END_POINT, x='b')
+    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+    algorithm_run = 'bfs'
+
+    time_taken = astarTime/30
+    num_visited = astarNodes/30 
+    if(time_taken == 0 or num_visited == 0):
+        print("no solution")
+    
+    else: 
+        pass
+        #print(f"BFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
+# When the A* Button is clicked
+def run_astar():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    clear_visited()
+    if VISUALISE:
+        pygame.display.flip()
+    astarTime =0
+    astarNodes = 0
+    for x in range(10):
+        path_found = dijkstra(grid, START_POINT, END_POINT, astar=True)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'astar'
+
+    time_taken = astarTime/10
+    num_visited = astarNodes/10
+    if(time_taken == 0 or num_visited == 0):
+        print("no solution")
+    
+    else:
+        print(f"A-Star finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
+# When the Greedy Button is clicked
+def run_greedy():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    clear_visited()
+    if VISUALISE:
+        pygame.display.flip()
+    astarTime =0
+    astarNodes = 0
+    for x in range(10):
+        path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'greedy'
+
+    time_taken = astarTime/10
+    num_visited = astarNodes/10
+    if(time_taken == 0 or num_visited == 0):
+        print("no solution")
+    
+    else:
+        print(f"Greedy BFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
+        #pass
+
+# When the Reset Button is clicked
+def run_benchmark():
+    global path_found
+    global algorithm_run
+    global astarTime
+    global astarNodes
+    global astarPath
+    #path_found = False
+    #algorithm_run = False
+    #for row in range(ROWS):
+    #    for column in range(ROWS):
+    #        if (row,column) != START_POINT and (row,column) != END_POINT:
+    #            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    aTime = 0
+    aSpace = 0
+    aPath = 0
+
+    gTime = 0
+    gSpace = 0
+    gPath = 0
+
+    bTime = 0
+    bSpace = 0
+    bPath = 0
+
+    dTime = 0
+    dSpace = 0
+    dPath = 0
+
+    dsTime = 0
+    dsSpace = 0
+    dsPath = 0
+
+    data = []
+    for i in range(10):
+        data.append([])
+        for j in range(5):
+            data[i].append([])
+            for k in range(3):
+                data[i][j].append(0)
+
+    for x in range(10):
+        PrimMaze()
+        clear_visited()
+        update_gui(draw_background=False, draw_buttons=False)
+        
+        astarTime =0
+        astarNodes = 0
+        astarPath = 0
+        #for x in range(10):
+        path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'greedy'
+
+        while astarTime == 0 or astarNodes ==0:
+            PrimMaze()
+            clear_visited()
+            update_gui(draw_background=False, draw_buttons=False)
+            
+            astarTime =0
+            astarNodes = 0
+            astarPath = 0
+            #for x in range(10):
+            path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
+            grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+            algorithm_run = 'greedy'
+
+
+
+        print(f"Run {x}: Maze size: {ROWS}, Maze type: Prim's")
+        print("Order: A-star, Greedy, BFS, DFS, Dijkstra")
+
+        print("-----")
+        clear_visited()
+        if VISUALISE:
+            pygame.display.flip()
+        astarTime =0
+        astarNodes = 0
+        astarPath = 0
+        #for x in range(10):
+        path_found = dijkstra(grid, START_POINT, END_POINT, astar=True)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'astar'
+        print(astarTime)
+        print(astarPath)
+        print(astarNodes)
+        
+        aTime += astarTime
+        aSpace += astarNodes
+        aPath += astarPath
+
+        print("-----")
+        clear_visited()
+        
+        astarTime =0
+        astarNodes = 0
+        astarPath = 0
+        #for x in range(10):
+        path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'greedy'
+        print(astarTime)
+        print(astarPath)
+        print(astarNodes)
+        
+        gTime += astarTime
+        gSpace += astarNodes
+        gPath += astarPath
+
+        print("-----")
+        clear_visited()
+        if VISUALISE:
+            pygame.display.flip()
+        astarTime = 0
+        astarNodes = 0
+        astarPath = 0
+        #for x in range(30):
+        path_found = xfs(grid, START_POINT, END_POINT, x='b')
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'bfs'
+        print(astarTime)
+        print(astarPath)
+        print(astarNodes)
+        
+        bTime += astarTime
+        bSpace += astarNodes
+        bPath += astarPath
+
+        print("-----")
+        clear_visited()
+        if VISUALISE:
+            pygame.display.flip()
+        astarTime = 0
+        astarNodes = 0
+        astarPath = 0
+        #for x in range(30):
+        path_found = xfs(grid, START_POINT, END_POINT, x='d')
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'dfs'
+        print(astarTime)
+        print(astarPath)
+        print(astarNodes)
+        
+        dTime += astarTime
+        dSpace += astarPath
+        dPath += astarPath
+
+        print("-----")
+        clear_visited()
+        if VISUALISE:    
+            pygame.display.flip()
+        astarNodes =0
+        astarTime = 0
+        astarPath = 0
+        #for x in range(30):
+        path_found = dijkstra(grid, START_POINT, END_POINT)
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        algorithm_run = 'dijkstra'
+        print(astarTime)
+        print(astarPath)
+        print(astarNodes)
+        
+        dsTime += astarTime
+        dsSpace += astarNodes
+        dsPath += astarPath
+        print("-----")
+    print("Calculated averaged values. Order: Time, Space, Path Length, Total-Cost")
+    print("A-star")
+    print(aTime/10)
+    print(aSpace/10)
+    print(aPath/10)
+    print((aTime/10)*100 + (aPath/10))
+    print("Greedy BFS")
+    print(gTime/10)
+    print(gSpace/10)
+    print(gPath/10)
+    print((gTime/10)*100 + (gPath/10))
+    print("BFS")
+    print(bTime/10)
+    print(bSpace/10)
+    print(bPath/10)
+    print((bTime/10)*100 + (bPath/10))
+    print("DFS")
+    print(dTime/10)
+    print(dSpace/10)
+    print(dPath/10)
+    print((dTime/10)*100 + (dPath/10))
+    print("Dijkstra")
+    print(dsTime/10)
+    print(dsSpace/10)
+    print(dsPath/10)
+    print((dsTime/10)*100 + (dsPath/10))
+    print("-----")
+    
+
+    for map in data:
+        #cost = 0
+        for trial in map:
+            cost = 0
+            cost = trial[0]*100 + trial[1]
+
+# When the Prim Button is clicked
+def generate_prim():
+    global grid
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    grid = better_prim()
+
+# When the Better Prim is clicked
+def generate_alt_prim():
+    global grid
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    grid = prim()
+
+# When the Random Maze (recursive division) Button is clicked
+def generate_recursive_division():
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+                draw_square(row%5,column%5)
+    if VISUALISE:
+        pygame.display.flip()
+    recursive_division()
+
+# When the Random Terrain Button is clicked
+def generate_terrain():
+    global path_found
+    global algorithm_run
+    path_found = False
+    algorithm_run = False
+    for row in range(ROWS):
+        for column in range(ROWS):
+            if (row,column) != START_POINT and (row,column) != END_POINT:
+                grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
+    update_gui(draw_background=False, draw_buttons=False)
+    random_terrain()
+
+# When the Visualisation Toggle Button is clicked
+def toggle_visualise():
+    global VISUALISE
+    if VISUALISE:
+        VISUALISE = False
+    else:
+        VISUALISE = True
+    visToggleButton.text = f"Visualise: {str(VISUALISE)}"
+
+# When D is pressed: switch diagonal moves on or off for Dijkstra, A* and Greedy
+def toggle_diagonals():
+    global DIAGONALS
+    DIAGONALS = not DIAGONALS
+    print(f"Diagonal moves: {DIAGONALS}")
+
+# When C is pressed: switch to the next corner cutting rule for diagonal moves
+def cycle_corner_rule():
+    global CORNER_RULE
+    rules = list(CORNER_CUTTING)
+    CORNER_RULE = rules[(rules.index(CORNER_RULE) + 1) % len(rules)]
+    print(f"Corner cutting: {CORNER_RULE}")
+
+# When W is pressed: switch to the next heuristic weight for A*
+def cycle_heuristic_weight():
+    global HEURISTIC_WEIGHT
+    HEURISTIC_WEIGHT = HEURISTIC_WEIGHTS[(HEURISTIC_WEIGHTS.index(HEURISTIC_WEIGHT) + 1) % len(HEURISTIC_WEIGHTS)]
+    print(f"A* heuristic weight: {HEURISTIC_WEIGHT}")
+
+# When S is pressed: save the grid to MAP_PATH
+def save_grid():
+    save_map(MAP_PATH, grid_to_terrain())
+    print(f"Saved the grid to {MAP_PATH}")
+
+# When L is pressed: load the grid saved in MAP_PATH
+def load_grid():
+    global START_POINT
+    global END_POINT
+    global path_found
+    global algorithm_run
+
+    try:
+        terrain, costs = load_map(MAP_PATH)
+    except (OSError, MapFileError) as error:
+        print(f"Could not load {MAP_PATH}: {error}")
+        return
+    if terrain.shape != (ROWS, ROWS):
+        print(f"Could not load {MAP_PATH}: it is {terrain.shape[0]}x{terrain.shape[1]}, the grid is {ROWS}x{ROWS}")
+        return
+
+    path_found = False
+    algorithm_run = False
+    grid[START_POINT[0]][START_POINT[1]].update(nodetype='blank', is_visited=False, is_path=False)
+    grid[END_POINT[0]][END_POINT[1]].update(nodetype='blank', is_visited=False, is_path=False)
+
+    # The start and end points move to wherever they were when the map was saved
+    starts = np.argwhere(terrain == START)
+    ends = np.argwhere(terrain == END)
+    if len(starts):
+        START_POINT = tuple(int(x) for x in starts[0])
+    if len(ends):
+        END_POINT = tuple(int(x) for x in ends[0])
+
+    clear_visited()
+    load_terrain(terrain)
+    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+    grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
+
+# Each button maps to the function that runs when it is clicked
+button_handlers = {
+    dijkstraButton: run_dijkstra,
+    dfsButton: run_dfs,
+    bfsButton: run_bfs,
+    astarButton: run_astar,
+    greedyButton: run_greedy,
+    resetButton: run_benchmark,
+    mazeButton: generate_prim,
+    altPrimButton: generate_alt_prim,
+    recursiveMazeButton: generate_recursive_division,
+    terrainButton: generate_terrain,
+    visToggleButton: toggle_visualise,
+}
+
+# Buttons that only change the visited cells and path, which the searches draw themselves,
+# or the button itself. The grid isn't drawn again after them
+search_buttons = {dijkstraButton, dfsButton, bfsButton, astarButton, greedyButton}
+button_only_buttons = {visToggleButton}
+
+# Each key maps to the function that runs when it is pressed
+key_handlers = {
+    pygame.K_s: save_grid,
+    pygame.K_l: load_grid,
+    pygame.K_d: toggle_diagonals,
+    pygame.K_c: cycle_corner_rule,
+    pygame.K_w: cycle_heuristic_weight,
+}
+
+# Keys that change the whole grid, the others only print their new setting
+redraw_keys = {pygame.K_l}
+
 # Loop until the user clicks the close Button.
 done = False
  
 # Used to manage how fast the screen updates
 clock = pygame.time.Clock()
+
+# Draw the first frame; after that we only redraw when an event changed something
+update_gui()
+pygame.display.flip()
  
 # -------- Main Program Loop -----------
 while not done:
+    # Block until there is an event to handle rather than redrawing an unchanged screen
+    events = [pygame.event.wait()] + pygame.event.get()
+    # Whether the whole screen has to be drawn again, or else the cells and buttons that
+    # changed and whether a search drew over the grid
+    redraw = False
+    changed_cells = []
+    changed_rects = []
+    searched = False
+
     # --- Main event loop
-    for event in pygame.event.get():
+    for event in events:
         if event.type == pygame.QUIT:
             done = True
         
@@ -214,382 +1444,24 @@ while not done:
                     else:
                         update_cell_to = 'wall'
                     cell_updated.update(nodetype=update_cell_to)
+                    changed_cells.append((row, column))
                     mouse_drag = True
                     if algorithm_run and cell_updated.is_path == True:
                         path_found = update_path()
-            
-            # Note to reader:
-            # After having to create so many if statements for the different buttons
-            # I have realised that a better way to handle this may be to create an 
-            # onClick method inside the button class, where treatment can be defined
-            # when defining the button
-            # TODO: try this out
-
-            # When the Dijkstra Button is clicked
-            elif dijkstraButton.isOver(pos):
-                clear_visited()
-                update_gui(draw_background=False, draw_buttons=False)
-                if VISUALISE:    
-                    pygame.display.flip()
-                astarNodes =0
-                astarTime = 0
-                #for x in range(30):
-                path_found = dijkstra(grid, START_POINT, END_POINT)
-                grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                algorithm_run = 'dijkstra'
-
-                time_taken = astarTime/30
-                num_visited = astarNodes/30
-                if(time_taken == 0 or num_visited == 0):
-                    print("no solution")
-                
-                else:
-                    pass
-                    #print(f"Dijkstra finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
-            
-            # When the DFS Button is clicked
-            elif dfsButton.isOver(pos):
-                clear_visited()
-                update_gui(draw_background=False, draw_buttons=False)
-                if VISUALISE:
-                    pygame.display.flip()
-                astarTime = 0
-                astarNodes = 0
-                #for x in range(30):
-                path_found = xfs(grid, START_POINT, END_POINT, x='d')
-                grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                algorithm_run = 'dfs'
-
-                time_taken = astarTime/30
-                num_visited = astarNodes/30
-                if(time_taken == 0 or num_visited == 0):
-                    print("no solution")
-                
-                else:
-                    pass
-                    #print(f"DFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
-            
-            # When the DFS Button is clicked
-            elif bfsButton.isOver(pos):
-                clear_visited()
-                update_gui(draw_background=False, draw_buttons=False)
-                if VISUALISE:
-                    pygame.display.flip()
-                astarTime = 0
-                astarNodes = 0
-                #for x in range(30):
-                path_found = xfs(grid, START_POINT, END_POINT, x='b')
-                grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                algorithm_run = 'bfs'
-
-                time_taken = astarTime/30
-                num_visited = astarNodes/30 
-                if(time_taken == 0 or num_visited == 0):
-                    print("no solution")
-                
-                else: 
-                    pass
-                    #print(f"BFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
-            # When the A* Button is clicked
-            elif astarButton.isOver(pos):
-                clear_visited()
-                update_gui(draw_background=False, draw_buttons=False)
-                if VISUALISE:
-                    pygame.display.flip()
-                astarTime =0
-                astarNodes = 0
-                for x in range(10):
-                    path_found = dijkstra(grid, START_POINT, END_POINT, astar=True)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'astar'
-
-                time_taken = astarTime/10
-                num_visited = astarNodes/10
-                if(time_taken == 0 or num_visited == 0):
-                    print("no solution")
-                
-                else:
-                    print(f"A-Star finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
-            # When the Greedy Button is clicked
-            elif greedyButton.isOver(pos):
-                clear_visited()
-                update_gui(draw_background=False, draw_buttons=False)
-                if VISUALISE:
-                    pygame.display.flip()
-                astarTime =0
-                astarNodes = 0
-                for x in range(10):
-                    path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'greedy'
-
-                time_taken = astarTime/10
-                num_visited = astarNodes/10
-                if(time_taken == 0 or num_visited == 0):
-                    print("no solution")
-                
-                else:
-                    print(f"Greedy BFS finished in {time_taken:.4f} seconds on average. That is an average of {time_taken/num_visited:.8f} seconds per node.")
-                    #pass
-
-            # When the Reset Button is clicked
-            elif resetButton.isOver(pos):
-                #path_found = False
-                #algorithm_run = False
-                #for row in range(ROWS):
-                #    for column in range(ROWS):
-                #        if (row,column) != START_POINT and (row,column) != END_POINT:
-                #            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-                aTime = 0
-                aSpace = 0
-                aPath = 0
-
-                gTime = 0
-                gSpace = 0
-                gPath = 0
-
-                bTime = 0
-                bSpace = 0
-                bPath = 0
-
-                dTime = 0
-                dSpace = 0
-                dPath = 0
-
-                dsTime = 0
-                dsSpace = 0
-                dsPath = 0
-
-                data = []
-                for i in range(10):
-                    data.append([])
-                    for j in range(5):
-                        data[i].append([])
-                        for k in range(3):
-                            data[i][j].append(0)
-
-                for x in range(10):
-                    PrimMaze()
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    
-                    astarTime =0
-                    astarNodes = 0
-                    astarPath = 0
-                    #for x in range(10):
-                    path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'greedy'
-
-                    while astarTime == 0 or astarNodes ==0:
-                        PrimMaze()
-                        clear_visited()
-                        update_gui(draw_background=False, draw_buttons=False)
-                        
-                        astarTime =0
-                        astarNodes = 0
-                        astarPath = 0
-                        #for x in range(10):
-                        path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
-                        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                        algorithm_run = 'greedy'
-
-
-
-                    print(f"Run {x}: Maze size: {ROWS}, Maze type: Prim's")
-                    print("Order: A-star, Greedy, BFS, DFS, Dijkstra")
-
-                    print("-----")
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    if VISUALISE:
-                        pygame.display.flip()
-                    astarTime =0
-                    astarNodes = 0
-                    astarPath = 0
-                    #for x in range(10):
-                    path_found = dijkstra(grid, START_POINT, END_POINT, astar=True)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'astar'
-                    print(astarTime)
-                    print(astarPath)
-                    print(astarNodes)
-                    
-                    aTime += astarTime
-                    aSpace += astarNodes
-                    aPath += astarPath
-
-                    print("-----")
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    
-                    astarTime =0
-                    astarNodes = 0
-                    astarPath = 0
-                    #for x in range(10):
-                    path_found = dijkstra(grid, START_POINT, END_POINT, greedy = True)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'greedy'
-                    print(astarTime)
-                    print(astarPath)
-                    print(astarNodes)
-                    
-                    gTime += astarTime
-                    gSpace += astarNodes
-                    gPath += astarPath
-
-                    print("-----")
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    if VISUALISE:
-                        pygame.display.flip()
-                    astarTime = 0
-                    astarNodes = 0
-                    astarPath = 0
-                    #for x in range(30):
-                    path_found = xfs(grid, START_POINT, END_POINT, x='b')
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'bfs'
-                    print(astarTime)
-                    print(astarPath)
-                    print(astarNodes)
-                    
-                    bTime += astarTime
-                    bSpace += astarNodes
-                    bPath += astarPath
-
-                    print("-----")
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    if VISUALISE:
-                        pygame.display.flip()
-                    astarTime = 0
-                    astarNodes = 0
-                    astarPath = 0
-                    #for x in range(30):
-                    path_found = xfs(grid, START_POINT, END_POINT, x='d')
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'dfs'
-                    print(astarTime)
-                    print(astarPath)
-                    print(astarNodes)
-                    
-                    dTime += astarTime
-                    dSpace += astarPath
-                    dPath += astarPath
-
-                    print("-----")
-                    clear_visited()
-                    update_gui(draw_background=False, draw_buttons=False)
-                    if VISUALISE:    
-                        pygame.display.flip()
-                    astarNodes =0
-                    astarTime = 0
-                    astarPath = 0
-                    #for x in range(30):
-                    path_found = dijkstra(grid, START_POINT, END_POINT)
-                    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-                    algorithm_run = 'dijkstra'
-                    print(astarTime)
-                    print(astarPath)
-                    print(astarNodes)
-                    
-                    dsTime += astarTime
-                    dsSpace += astarNodes
-                    dsPath += astarPath
-                    print("-----")
-                print("Calculated averaged values. Order: Time, Space, Path Length, Total-Cost")
-                print("A-star")
-                print(aTime/10)
-                print(aSpace/10)
-                print(aPath/10)
-                print((aTime/10)*100 + (aPath/10))
-                print("Greedy BFS")
-                print(gTime/10)
-                print(gSpace/10)
-                print(gPath/10)
-                print((gTime/10)*100 + (gPath/10))
-                print("BFS")
-                print(bTime/10)
-                print(bSpace/10)
-                print(bPath/10)
-                print((bTime/10)*100 + (bPath/10))
-                print("DFS")
-                print(dTime/10)
-                print(dSpace/10)
-                print(dPath/10)
-                print((dTime/10)*100 + (dPath/10))
-                print("Dijkstra")
-                print(dsTime/10)
-                print(dsSpace/10)
-                print(dsPath/10)
-                print((dsTime/10)*100 + (dsPath/10))
-                print("-----")
-                
-
-                for map in data:
-                    #cost = 0
-                    for trial in map:
-                        cost = 0
-                        cost = trial[0]*100 + trial[1]
-                
-                
-                
-                    
-
-
-
-            # When the Prim Button is clicked
-            elif mazeButton.isOver(pos):
-                path_found = False
-                algorithm_run = False
-                for row in range(ROWS):
-                    for column in range(ROWS):
-                        if (row,column) != START_POINT and (row,column) != END_POINT:
-                            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-                grid = better_prim()
-
-            # When the Better Prim is clicked
-            elif altPrimButton.isOver(pos):
-                path_found = False
-                algorithm_run = False
-                for row in range(ROWS):
-                    for column in range(ROWS):
-                        if (row,column) != START_POINT and (row,column) != END_POINT:
-                            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-                grid = prim()
-
-            # When the Random Maze (recursive division) Button is clicked
-            elif recursiveMazeButton.isOver(pos):
-                path_found = False
-                algorithm_run = False
-                for row in range(ROWS):
-                    for column in range(ROWS):
-                        if (row,column) != START_POINT and (row,column) != END_POINT:
-                            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-                            draw_square(row%5,column%5)
-                if VISUALISE:
-                    pygame.display.flip()
-                recursive_division()
-        
-            # When the Random Terrain Button is clicked
-            elif terrainButton.isOver(pos):
-                path_found = False
-                algorithm_run = False
-                for row in range(ROWS):
-                    for column in range(ROWS):
-                        if (row,column) != START_POINT and (row,column) != END_POINT:
-                            grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-                update_gui(draw_background=False, draw_buttons=False)
-                random_terrain()
-
-            # When the Visualisation Toggle Button is clicked
-            elif visToggleButton.isOver(pos):
-                if VISUALISE:
-                    VISUALISE = False
-                else:
-                    VISUALISE = True
+                        searched = True
 
+            # Otherwise run the handler of whichever button was clicked
+            else:
+                for button, handler in button_handlers.items():
+                    if button.isOver(pos):
+                        handler()
+                        if button in search_buttons or button in button_only_buttons:
+                            button.draw(screen, (0,0,0))
+                            changed_rects.append(pygame.Rect(button.x, button.y, button.width, button.height))
+                            searched = searched or button in search_buttons
+                        else:
+                            redraw = True
+                        break
         
         elif event.type == pygame.MOUSEBUTTONUP:
             # Turn off all mouse drags if mouse Button released
@@ -632,802 +1504,78 @@ while not done:
                     else:
                         update_cell_to = 'wall'
                     cell_updated.update(nodetype=update_cell_to)
+                    changed_cells.append((row, column))
 
                 mouse_drag = True
                 
                 if algorithm_run:
                     if cell_updated.is_path == True:
                         path_found = update_path()
+                        searched = True
             
             # Move the start point
             elif drag_start_point == True:
                 if grid[row][column].nodetype == "blank":
                     grid[START_POINT[0]][START_POINT[1]].update(nodetype='blank', is_path=False, is_visited=False)
+                    changed_cells.append(START_POINT)
                     START_POINT = (row,column)
                     grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+                    changed_cells.append(START_POINT)
                     # If we have already run the algorithm, update it as the point is moved
                     if algorithm_run:
                         path_found = update_path()
+                        searched = True
                         grid[START_POINT[0]][START_POINT[1]].update(nodetype='start') 
             
             # Move the end point
             elif drag_end_point == True:
                 if grid[row][column].nodetype == "blank":
                     grid[END_POINT[0]][END_POINT[1]].update(nodetype='blank', is_path=False, is_visited=False)
+                    changed_cells.append(END_POINT)
                     END_POINT = (row,column)
                     grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
+                    changed_cells.append(END_POINT)
                     # If we have already run the algorithm, update it as the point is moved
                     if algorithm_run:
                         path_found = update_path()
+                        searched = True
                         grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
 
-            pygame.display.flip()
+        elif event.type == pygame.KEYDOWN:
+            if event.key in key_handlers:
+                key_handlers[event.key]()
+                redraw = redraw or event.key in redraw_keys
 
         elif event.type == pygame.VIDEORESIZE:
             old_surface_saved = screen
             screen = pygame.display.set_mode((event.w, event.h),pygame.RESIZABLE)
             screen.blit(old_surface_saved, (0,0))
             del old_surface_saved
- 
-    # Game logic
-
-    ### UTILITY FUNCTIONS ###
-    def RandomMaze():
-        global grid
-        global path_found
-        global algorithm_run
-        path_found = False
-        algorithm_run = False
-        for row in range(ROWS):
-            for column in range(ROWS):
-                if (row,column) != START_POINT and (row,column) != END_POINT:
-                    grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-        grid = prim()
-        
-    def PrimMaze():
-        global grid
-        global path_found
-        global algorithm_run
-        path_found = False
-        algorithm_run = False
-        for row in range(ROWS):
-            for column in range(ROWS):
-                if (row,column) != START_POINT and (row,column) != END_POINT:
-                    grid[row][column].update(nodetype='blank', is_visited=False, is_path=False)
-        grid = prim()
-
-    # Clear board, keeping excluded nodes
-    def clear_visited():
-        excluded_nodetypes = ['start', 'end', 'wall', 'mud']
-        for row in range(ROWS):
-            for column in range(ROWS):
-                if grid[row][column].nodetype not in excluded_nodetypes:
-                    grid[row][column].update(nodetype="blank", is_visited=False, is_path=False)
-                else:
-                     grid[row][column].update(is_visited=False, is_path=False)
-        update_gui(draw_background=False, draw_buttons=False)
+            redraw = True
 
-    def update_path(algorithm_run=algorithm_run):
-        
-        clear_visited()
-        
-        valid_algorithms = ['dijkstra', 'astar', 'dfs', 'bfs','greedy']
-
-        assert algorithm_run in valid_algorithms, f"last algorithm used ({algorithm_run}) is not in valid algorithms: {valid_algorithms}"
-
-        if algorithm_run == 'dijkstra':
-            path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False)
-        elif algorithm_run == 'astar':
-            path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False, astar=True)
-        elif algorithm_run == 'greedy':
-            path_found = dijkstra(grid, START_POINT, END_POINT, visualise=False, greedy = True)
-        elif algorithm_run == 'dfs':
-            path_found = xfs(grid, START_POINT, END_POINT, x='d', visualise=False)
-        elif algorithm_run == 'bfs':
-            path_found = xfs(grid, START_POINT, END_POINT, x='b', visualise=False)
-        else:
-            path_found = False
-        return path_found
-
-    def random_terrain(mazearray=grid, num_patches=False, visualise=VISUALISE):
-        if not num_patches:
-            num_patches = random.randrange(int(ROWS/10),int(ROWS/4))
-
-        terrain_nodes = set([])
-
-        if VISUALISE:
-            pygame.display.flip()
-
-        # For each patch we are creating we start with a centre node and branch outwards
-        # getting neighbours of neighbours etc. for each node that we consider, there is
-        # a variable probability of it becoming a patch of mud
-        # As we branch outwards that probability decreases
-        for patch in range(num_patches+1):
-            neighbour_cycles = 0
-            centre_point = (random.randrange(1,ROWS-1),random.randrange(1,ROWS-1))
-            patch_type = 'mud'
-            terrain_nodes.add(centre_point)
-            
-            while len(terrain_nodes) > 0:
-                node = terrain_nodes.pop()
-                
-                if grid[node[0]][node[1]].nodetype != 'start' and grid[node[0]][node[1]].nodetype != 'end':
-                    grid[node[0]][node[1]].update(nodetype=patch_type)
-                    draw_square(node[0],node[1])
-                    
-                    if visualise:
-                        update_square(node[0],node[1])
-                        time.sleep(0.000001)
-                
-                neighbour_cycles += 1
-                
-                for node, ntype in get_neighbours(node):
-                    
-                    if grid[node[0]][node[1]].nodetype == 'mud':
-                        continue
-                    threshold = 700-(neighbour_cycles*10)
-                    
-                    if random.randrange(1,101) <= threshold:
-                        terrain_nodes.add(node)
-
-    # Function for moving an item between two dicts
-    def dict_move(from_dict, to_dict, item):
-        to_dict[item] = from_dict[item]
-        from_dict.pop(item)
-        return from_dict, to_dict
-
-    # + represents non-diagonal neighbours, x diagonal neighbours
-    def get_neighbours(node, max_width=ROWS-1, diagonals=DIAGONALS):
-        if not diagonals:
-            neighbours = (
-                ((min(max_width,node[0]+1),node[1]),"+"),
-                ((max(0,node[0]-1),node[1]),"+"),
-                ((node[0],min(max_width,node[1]+1)),"+"),
-                ((node[0],max(0,node[1]-1)),"+")
-            )
-        else:
-            neighbours = (
-                ((min(max_width,node[0]+1),node[1]),"+"),
-                ((max(0,node[0]-1),node[1]),"+"),
-                ((node[0],min(max_width,node[1]+1)),"+"),
-                ((node[0],max(0,node[1]-1)),"+"),
-                ((min(max_width,node[0]+1),min(max_width,node[1]+1)),"x"),
-                ((min(max_width,node[0]+1),max(0,node[1]-1)),"x"),
-                ((max(0,node[0]-1),min(max_width,node[1]+1)),"x"),
-                ((max(0,node[0]-1),max(0,node[1]-1)),"x")
-            )
-
-        # return neighbours
-        return (neighbour for neighbour in neighbours if neighbour[0] != node)
-
-    # For Pygame: this draws a square in the given location (for when properties updated)
-    def draw_square(row,column,grid=grid):
-        height = screen.get_height()*(2/3)
-        if(ROWS==200):
-            height = 3
-        elif(ROWS ==150):
-            height = 5
-        elif(ROWS==100):
-            height=5
-        elif(ROWS==50):
-            height=6
-        elif(ROWS==250):
-            height = 2
-        elif(ROWS==300):
-            height =2
-        elif(ROWS==350):
-            height =1
-        
-        pygame.draw.rect(
-            screen,
-            grid[row][column].color,
-            [
-                height * column,
-                height* row,
-                height,
-                height
-            ]
-        )
-        pygame.event.pump()
-
-    # For Pygame: this updates the screen for the given square
-    # (as opposed to pygame.display.flip() which updates the entire screen)
-    def update_square(row,column):
-        pygame.display.update(
-            (MARGIN + WIDTH) * column + MARGIN,
-            (MARGIN + HEIGHT) * row + MARGIN,
-            WIDTH,
-            HEIGHT
-        )
-        pygame.event.pump()
-
-    ### MAZE CREATION ALGORITHMS ###
-
-    # randomized Prim's algorithm for creating random mazes
-    def prim(mazearray=False, start_point=False, visualise=VISUALISE):
-
-        # If a maze isn't input, we just create a grid full of walls
-        if not mazearray:
-            mazearray = []
-            for row in range(ROWS):
-                mazearray.append([])
-                for column in range(ROWS):
-                    mazearray[row].append(Node('wall'))
-                    if visualise:
-                        draw_square(row,column,grid=mazearray)
-
-        n = len(mazearray) - 1
-
-        if not start_point:
-            start_point = (random.randrange(0,n,2),random.randrange(0,n,2))
-        #     START_POINT = start_point
-        # mazearray[start_point[0]][start_point[1]].update(nodetype='start')
-        
-        if visualise:
-            draw_square(start_point[0], start_point[1], grid=mazearray)
-            pygame.display.flip()
-
-        walls = set([])
-
-        neighbours = get_neighbours(start_point, n)
-
-        for row in range(ROWS):
-            for colum in range(ROWS):
-                if random.random() > 0.2:
-                    mazearray[row][colum].update(nodetype = 'blank')
-
-        for neighbour, ntype in neighbours:
-            if mazearray[neighbour[0]][neighbour[1]].nodetype == 'wall':
-                walls.add(neighbour)
-                # walls.append(neighbour)
-
-        # While there are walls in the list:
-        # Pick a random wall from the list. If only one of the cells that the wall divides is visited, then:
-        # # Make the wall a passage and mark the unvisited cell as part of the maze.
-        # # Add the neighboring walls of the cell to the wall list.
-        # Remove the wall from the list.
-        while len(walls) > 0:                
-            wall = random.choice(tuple(walls))
-            wall_neighbours = get_neighbours(wall, n)
-            neighbouring_walls = set()
-            pcount = 0
-            for wall_neighbour, ntype in wall_neighbours:
-                if wall_neighbour == (start_point or END_POINT):
-                    continue
-                if mazearray[wall_neighbour[0]][wall_neighbour[1]].nodetype != 'wall':
-                    pcount += 1
-                else:
-                    neighbouring_walls.add(wall_neighbour)
-                    
-            if pcount <= 1:
-                #mazearray[wall[0]][wall[1]].update(nodetype='blank')
-                if visualise:
-                    draw_square(wall[0],wall[1],mazearray)
-                    update_square(wall[0],wall[1])
-                    time.sleep(0.000001)
-
-                walls.update(neighbouring_walls)
-
-            
-            walls.remove(wall)            
-
-        mazearray[END_POINT[0]][END_POINT[1]].update(nodetype='end')
-        mazearray[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-
-        return mazearray
-
-    # randomized Prim's algorithm for creating random mazes
-    # This version maintains the traditional "maze" look, where a route cannot
-    # be diagonally connected to another point on the route
-    def better_prim(mazearray=False, start_point=False, visualise=VISUALISE):
-
-        # If a maze isn't input, we just create a grid full of walls
-        if not mazearray:
-            mazearray = []
-            for row in range(ROWS):
-                mazearray.append([])
-                for column in range(ROWS):
-                    if row % 2 != 0 and column % 2 != 0:
-                        mazearray[row].append(Node('dormant'))
-                    else:
-                        mazearray[row].append(Node('wall'))
-                    if visualise:
-                        draw_square(row,column,grid=mazearray)
-
-        n = len(mazearray) - 1
-
-        if not start_point:
-            start_point = (random.randrange(1,n,2),random.randrange(1,n,2))
-            mazearray[start_point[0]][start_point[1]].update(nodetype='blank')
-        
-        if visualise:
-            draw_square(start_point[0], start_point[1], grid=mazearray)
-            pygame.display.flip()
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.ACTIVEEVENT):
+            redraw = True
 
-        walls = set()
+    if redraw and not done:
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
 
-        starting_walls = get_neighbours(start_point, n)
+        # --- Drawing code should go here
+        update_gui()
 
-        for wall, ntype in starting_walls:
-            if mazearray[wall[0]][wall[1]].nodetype == 'wall':
-                walls.add(wall)
-
-        # While there are walls in the list (set):
-        # Pick a random wall from the list. If only one of the cells that the wall divides is visited, then:
-        # # Make the wall a passage and mark the unvisited cell as part of the maze.
-        # # Add the neighboring walls of the cell to the wall list.
-        # Remove the wall from the list.
-        while len(walls) > 0:
-            wall = random.choice(tuple(walls))
-            visited = 0
-            add_to_maze = []
-
-            for wall_neighbour, ntype in get_neighbours(wall,n):
-                if mazearray[wall_neighbour[0]][wall_neighbour[1]].nodetype == 'blank':
-                    visited += 1
-
-            if visited <= 1:
-                mazearray[wall[0]][wall[1]].update(nodetype='blank')
-                
-                if visualise:
-                    draw_square(wall[0],wall[1],mazearray)
-                    update_square(wall[0],wall[1])
-                    time.sleep(0.0001)
-                
-                # A 'dormant' node (below) is a different type of node I had to create for this algo
-                # otherwise the maze generated doesn't look like a traditional maze.
-                # Every dormant eventually becomes a blank node, while the regular walls
-                # sometimes become a passage between blanks and are sometimes left as walls
-                for neighbour, ntype in get_neighbours(wall,n):
-                    if mazearray[neighbour[0]][neighbour[1]].nodetype == 'dormant':
-                        add_to_maze.append((neighbour[0],neighbour[1]))
-                
-                if len(add_to_maze) > 0:
-                    cell = add_to_maze.pop()
-                    mazearray[cell[0]][cell[1]].update(nodetype='blank')
-                    
-                    if visualise:
-                        draw_square(cell[0],cell[1],mazearray)
-                        update_square(cell[0],cell[1])
-                        time.sleep(0.0001)
-                    
-                    for cell_neighbour, ntype in get_neighbours(cell,n):
-                        if mazearray[cell_neighbour[0]][cell_neighbour[1]].nodetype == 'wall':
-                            walls.add(cell_neighbour)
-
-            walls.remove(wall)
-
-        mazearray[END_POINT[0]][END_POINT[1]].update(nodetype='end')
-        mazearray[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-
-        return mazearray
-
-    # This is for use in the recursive division function
-    # it is to avoid creating a gap where there will ultimately be an intersection 
-    # of perpendicular walls, creating an unsolveable maze
-    # TODO: generalise this
-    def gaps_to_offset():
-        return [x for x in range(0, ROWS-1, 4)]
-
-    # Recursive division algorithm
-    N, S, E, W = 1, 2, 4, 8
-    HORIZONTAL, VERTICAL = 0, 1
-
-    def recursive_division2(grid = grid, mx = 0, my=0, ax=ROWS, ay = ROWS):
-        dx = ax - mx
-        dy = ay - my
-        if dx < 2 or dy < 2:
-            # make a hallway
-            if dx > 1:
-                y = my
-                for x in range(mx, ax-1):
-                    grid[y][x].update(nodetype='wall')
-                    grid[y][x+1].update(nodetype='wall')
-            elif dy > 1:
-                x = mx
-                for y in range(my, ay-1):
-                    grid[y][x].update(nodetype='wall')
-                    grid[y+1][x].update(nodetype='wall')
-            return
-
-        wall = HORIZONTAL if dy > dx else (VERTICAL if dx > dy else random.randrange(2))
-
-        xp = random.randrange(mx, ax-(wall == VERTICAL))
-        yp = random.randrange(my, ay-(wall == HORIZONTAL))
-
-        x, y = xp, yp
-        if wall == HORIZONTAL:
-            ny = y + 1
-            grid[y][x].update(nodetype='wall')
-            grid[ny][x].update(nodetype='wall')
-
-            #recursive_division2(grid, mx, my, ax, ny)
-            #recursive_division2(grid, mx, ny, ax, ay)
-        else:
-            nx = x + 1
-            grid[y][x].update(nodetype='wall')
-            grid[y][nx].update(nodetype='wall')
-
-            #recursive_division2(grid, mx, my, nx, ay)
-            #recursive_division2(grid, nx, my, ax, ay)
-    def recursive_division(chamber=None, visualise=VISUALISE, gaps_to_offset=gaps_to_offset(), halving=True):
-
-        sleep = 0.001
-        sleep_walls = 0.001
-
-        # When no "chamber" is input,we are starting with the base grid
-        if chamber == None:
-            chamber_width = int(len(grid))
-            chamber_height = int(len(grid[1]))
-            chamber_left = 0
-            chamber_top = 0
-        else:
-            chamber_width = chamber[2]
-            chamber_height = chamber[3]
-            chamber_left = chamber[0]
-            chamber_top = chamber[1]
-
-        if halving:
-            x_divide = int(chamber_width/2)
-            y_divide = int(chamber_height/2)
-        
-        if chamber_width < 5:
-            pass
-        else:
-            # draw x wall
-            for y in range(chamber_height):
-                grid[chamber_left + x_divide][chamber_top + y].update(nodetype='wall')
-                draw_square(chamber_left + x_divide, chamber_top + y)
-                if visualise:
-                    update_square(chamber_left + x_divide, chamber_top + y)
-                    time.sleep(sleep_walls)
-         
-        if chamber_height < 5:
-            pass
-        else:
-            # draw y wall
-            for x in range(chamber_width):
-                grid[chamber_left + x][chamber_top + y_divide].update(nodetype='wall')
-                draw_square(chamber_left + x, chamber_top + y_divide)
-                if visualise:
-                    update_square(chamber_left + x, chamber_top + y_divide)
-                    time.sleep(sleep_walls)
-
-        # Base case: stop dividing
-        if chamber_width < 3 and chamber_height < 3:
-            return
-
-        # define the 4 new chambers (left, top, width, height)
-
-        top_left =      (chamber_left,                  chamber_top,                x_divide,                       y_divide)
-        top_right =     (chamber_left + x_divide + 1,   chamber_top,                chamber_width - x_divide - 1,   y_divide)
-        bottom_left =   (chamber_left,                  chamber_top + y_divide + 1, x_divide,                       chamber_height - y_divide - 1)
-        bottom_right =  (chamber_left + x_divide + 1,   chamber_top + y_divide + 1, chamber_width - x_divide - 1,   chamber_height - y_divide - 1)
-
-        chambers = (top_left, top_right, bottom_left, bottom_right)
-
-        # define the 4 walls (of a + symbol) (left, top, width, height)
-                
-        left =      (chamber_left,                     chamber_top + y_divide,      x_divide,                       1)
-        right =     (chamber_left + x_divide + 1,      chamber_top + y_divide,      chamber_width - x_divide - 1,   1)
-        top =       (chamber_left + x_divide,          chamber_top,                 1,                              y_divide)
-        bottom =    (chamber_left + x_divide,          chamber_top + y_divide + 1,  1,                              chamber_height - y_divide - 1)
-        
-        walls = (left, right, top, bottom)
-
-        gaps = 3
-        for wall in random.sample(walls, gaps):
-            # print(wall)
-            if wall[3] == 1:
-                x = random.randrange(wall[0],wall[0]+wall[2])
-                y = wall[1]
-                if x in gaps_to_offset and y in gaps_to_offset:
-                    if wall[2] == x_divide:
-                        x -= 1
-                    else:
-                        x += 1
-                if x >= ROWS:
-                    x = ROWS -1
-            else: # the wall is horizontal
-                x = wall[0]
-                y = random.randrange(wall[1],wall[1]+wall[3])
-                if y in gaps_to_offset and x in gaps_to_offset:
-                    if wall[3] == y_divide:
-                        y -=1
-                    else:
-                        y += 1
-                if y >= ROWS:
-                    y = ROWS-1
-            grid[x][y].update(nodetype="blank")
-            draw_square(x, y)
-            if visualise:
-                update_square(x, y)
-                time.sleep(sleep)
-
-        # recursively apply the algorithm to all chambers
-        for num, chamber in enumerate(chambers):
-            recursive_division(chamber)
-
-    ### PATHFINDING ALGORITHMS ###
-
-    #Changes: Added Greedy Best-First Search algorithm
-
-    # Dijkstra's pathfinding algorithm, with the option to switch to A* by adding a heuristic of expected distance to end node
-    def dijkstra(mazearray, start_point=(0,0), goal_node=False, display=pygame.display, visualise=VISUALISE, diagonals=DIAGONALS, astar=False, greedy = False):
-        global astarTime
-        global astarNodes
-        heuristic = 0
-        distance = 0
-
-        # Get the dimensions of the (square) maze
-        n = len(mazearray) - 1
-        
-        # Create the various data structures with speed in mind
-        visited_nodes = set()
-        unvisited_nodes = set([(x,y) for x in range(n+1) for y in range(n+1)])
-        queue = AStarQueue()
-
-        queue.push(distance+heuristic, distance, start_point)
-        v_distances = {}
-        #Track parent nodes
-        came_from = {}
-
-        #print(greedy)
-
-        # If a goal_node is not set, put it in the bottom right (1 square away from either edge)
-        if not goal_node:
-            goal_node = (n,n)
-        priority, current_distance, current_node = queue.pop()
-        start = time.perf_counter()
-        
-        # Main algorithm loop
-        while current_node != goal_node and len(unvisited_nodes) > 0:
-            if current_node in visited_nodes:
-                if len(queue.show()) == 0:
-                    return False
-                else:
-                    priority, current_distance, current_node = queue.pop()
-                    continue
-            
-            # Call to check neighbours of the current node
-            for neighbour in get_neighbours(current_node, n, diagonals=diagonals):
-                neighbours_loop(
-                    neighbour, 
-                    mazearr=mazearray, 
-                    visited_nodes=visited_nodes, 
-                    unvisited_nodes=unvisited_nodes, 
-                    queue=queue, 
-                    v_distances=v_distances, 
-                    current_node=current_node,
-                    current_distance=current_distance,
-                    astar=astar,
-                    greedy = greedy,
-                    came_from = came_from
-                )
-
-            # When we have checked the current node, add and remove appropriately
-            visited_nodes.add(current_node)
-            unvisited_nodes.discard(current_node)
-            
-            # Add the distance to the visited distances dictionary (used for traceback)
-            v_distances[current_node] = current_distance
-            
-            # Pygame part: visited nodes mark visited nodes as green
-            if (current_node[0],current_node[1]) != start_point:
-                mazearray[current_node[0]][current_node[1]].update(is_visited = True)
-                draw_square(current_node[0],current_node[1],grid=mazearray)
-
-                # If we want to visualise it (rather than run instantly)
-                # then we update the grid with each loop
-                if visualise:
-                    update_square(current_node[0],current_node[1])
-                    time.sleep(0.00001)
-            
-            # If there are no nodes in the queue then we return False (no path)
-            if len(queue.show()) == 0:
-                return False
-            # Otherwise we take the minimum distance as the new current node
-            else:
-                priority, current_distance, current_node = queue.pop()
-        
-        # TODO: update this line so it works properly
-        v_distances[goal_node] = current_distance + (1 if not diagonals else 2**0.5)
-        visited_nodes.add(goal_node)
-
-        # Draw the path back from goal node to start node
-        trace_back(goal_node, start_point, v_distances, visited_nodes, n, mazearray, diags=diagonals, visualise=visualise, came_from =came_from)
-
-        end = time.perf_counter()
-        num_visited = len(visited_nodes)
-        time_taken = end-start
-        astarTime += time_taken
-        astarNodes += num_visited
-
-        # Print timings
-        #print(f"Program finished in {time_taken:.4f} seconds after checking {num_visited} nodes. That is {time_taken/num_visited:.8f} seconds per node.")
-        
-        # The commented out line returns the distance to the end node
-        # return False if v_distances[goal_node] == float('inf') else v_distances[goal_node]
-        return False if v_distances[goal_node] == float('inf') else True
-
-
-    # (DIJKSTRA/A*) loop to check all neighbours of the "current node"
-    def neighbours_loop(neighbour, mazearr, visited_nodes, unvisited_nodes, queue, v_distances, current_node, current_distance, diags=DIAGONALS, astar=False, greedy = False, came_from={}):
-        
-        neighbour, ntype = neighbour
-
-        heuristic = 0
-        #print("here")
-        if astar or greedy:
-            heuristic = abs(END_POINT[0] - neighbour[0]) + abs(END_POINT[1] - neighbour[1])
-            heuristic *= 1 # if this goes above 1 then the shortest path is not guaranteed, but the attempted route becomes more direct
-        
-        # If the neighbour has already been visited 
-        if neighbour in visited_nodes:
-            pass
-        elif mazearr[neighbour[0]][neighbour[1]].nodetype == 'wall':
-            visited_nodes.add(neighbour)
-            unvisited_nodes.discard(neighbour)
-        else:
-            modifier = mazearr[neighbour[0]][neighbour[1]].distance_modifier
-            coordinate = (neighbour[0],neighbour[1])
-            came_from[coordinate] = current_node
-            if ntype == "+":
-                cost = 1
-                if not (greedy):
-                    
-                    cost = current_distance+(1*modifier)
-                queue.push(cost+heuristic, cost, neighbour)
-            elif ntype == "x": 
-                queue.push(current_distance+((2**0.5)*modifier)+heuristic, current_distance+((2**0.5)*modifier), neighbour)
-                print("ntypex")
-
-    # (DIJKSTRA/A*) trace a path back from the end node to the start node after the algorithm has been run
-    def trace_back(goal_node, start_node, v_distances, visited_nodes, n, mazearray, diags=False, visualise=VISUALISE, came_from={}):
-        global astarPath
-        # begin the list of nodes which will represent the path back, starting with the end node
-        path = [goal_node]
-        
-        current_node = goal_node
-        count = 0
-        # Set the loop in motion until we get back to the start
-        while current_node in came_from:
-            current_node = came_from[current_node]
-            path.append(current_node)
-            #print(current_node)
-            mazearray[current_node[0]][current_node[1]].update(is_path=True)
-            draw_square(current_node[0], current_node[1], grid=mazearray)
-            count +=1
-            #print("here")
-        #print(count)
-        astarPath = count
-        #draw_square(10, 10, grid=mazearray)
+        # --- Go ahead and update the screen with what we've drawn.
         pygame.display.flip()
 
-        mazearray[start_node[0]][start_node[1]].update(is_path=True)
-
-
-    def xfs(mazearray, start_point, goal_node, x, display=pygame.display, visualise=VISUALISE, diagonals=DIAGONALS):
-        '''
-        This is a function where you choose x='b' or x='d' to run bfs (breadth-first search) or
-        dfs (depth-first search) on your chosen mazearray (grid format), with chosen start_point (x,y)
-        and chosen goal_node (x,y)
-        '''
-        global astarNodes
-        global astarTime
-        global astarPath
-
-        #print("start")
-        assert x == 'b' or x == 'd', "x should equal 'b' or 'd' to make this bfs or dfs"
-
-        # Get the dimensions of the (square) maze
-        n = len(mazearray) - 1
-        
-        # Create the various data structures with speed in mind
-        mydeque = deque()
-        mydeque.append(start_point)
-        visited_nodes = set([])
-        path_dict = {start_point: None}
-        
-        stop = False
-
-        start = time.perf_counter()
-
-        # Main algorithm loop
-        while len(mydeque) > 0 and stop!= True:
-            #print(len(mydeque))
-            if x == 'd':
-                current_node = mydeque.pop()
-            elif x == 'b':
-                current_node = mydeque.popleft()
-          
-            if current_node == goal_node:
-                count = 0
-                # Trace back to start using path_dict
-                path_node = goal_node
-                while stop != True:
-                    path_node = path_dict[path_node]
-                    mazearray[path_node[0]][path_node[1]].update(is_path = True)
-                    draw_square(path_node[0],path_node[1],grid=mazearray)
-                    count +=1
-                    if visualise:
-                        update_square(path_node[0],path_node[1])
-                    if path_node == start_point:
-                        #print(count)
-                        astarPath = count
-                        stop = True
-                #print("stopped")
-                
-            
-            if mazearray[current_node[0]][current_node[1]].nodetype == 'wall':
-                continue
-            
-            if current_node not in visited_nodes:
-                visited_nodes.add(current_node)
-                mazearray[current_node[0]][current_node[1]].update(is_visited = True)
-                draw_square(current_node[0],current_node[1],grid=mazearray)
-                if visualise:
-                    update_square(current_node[0],current_node[1])
-                    time.sleep(0.001)
-                
-                for neighbour, ntype in get_neighbours(current_node, n):
-                    mydeque.append(neighbour)
-                    # Used for tracing back
-                    if neighbour not in visited_nodes:
-                        path_dict[neighbour] = current_node
-            #print(len(mydeque))
-        #print("stop")
-        end = time.perf_counter()
-        num_visited = len(visited_nodes)
-        time_taken = end-start
-        astarTime += time_taken
-        astarNodes += num_visited
-        #print(f"Program finished in {time_taken:.4f} seconds after checking {num_visited} nodes. That is {time_taken/num_visited:.8f} seconds per node.")
-       # print("here")
-        pygame.display.flip()
-        return False
-
-    grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
-    grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
-
-
-    # Update the GUI 
-    def update_gui(draw_background=True, draw_buttons=True, draw_grid=True):
-        
-        if draw_background:
-            # Draw a black background to set everything on
-            screen.fill(BLACK)
-            pass
-
-        if draw_buttons:
-            visToggleButton = Button(GREY, SCREEN_WIDTH/3, SCREEN_WIDTH + BUTTON_HEIGHT*2, SCREEN_WIDTH/3, BUTTON_HEIGHT, f"Visualise: {str(VISUALISE)}")
-            # Draw Button below grid
-            dijkstraButton.draw(screen, (0,0,0))
-            dfsButton.draw(screen, (0,0,0))
-            bfsButton.draw(screen, (0,0,0))
-
-            astarButton.draw(screen, (0,0,0))
-            greedyButton.draw(screen,(0,0,0))
-
-            resetButton.draw(screen, (0,0,0))
-            mazeButton.draw(screen, (0,0,0))
-            altPrimButton.draw(screen, (0,0,0))
-            recursiveMazeButton.draw(screen, (0,0,0))
-            terrainButton.draw(screen, (0,0,0))
-            visToggleButton.draw(screen, (0,0,0))
-
-        if draw_grid:
-            # Draw the grid
-            for row in range(ROWS):
-                for column in range(ROWS):
-                    color = grid[row][column].color
-                    draw_square(row,column)
-
-    # --- Drawing code should go here
-    update_gui()
-
-    # --- Go ahead and update the screen with what we've drawn.
-    pygame.display.flip()
+    # Otherwise only draw the cells that changed, and show them and the changed buttons
+    elif (changed_cells or changed_rects or searched) and not done:
+        grid[START_POINT[0]][START_POINT[1]].update(nodetype='start')
+        grid[END_POINT[0]][END_POINT[1]].update(nodetype='end')
+        draw_squares(changed_cells)
+        rects = changed_rects + [square_rect(row, column) for row, column in changed_cells]
+        # The searches have already drawn the cells they cleared and marked
+        if searched:
+            rects.append(grid_rect())
+        pygame.display.update(rects)
     
     # --- Limit to 60 frames per second
     clock.tick(60)
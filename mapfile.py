@@ -0,0 +1,146 @@
+#On-disk map files.
+#A map file is a fixed size header followed by the terrain array (see terrain.py),
+#one uint8 per cell, stored row by row:
+#
+#    offset  size  field
+#    0       4     magic b'PFM1'
+#    4       2     version
+#    6       2     flags
+#    8       4     rows
+#    12      4     columns
+#    16      48    reserved (zero), so the terrain starts 64 byte aligned
+#    64            rows * columns terrain codes
+#
+#If flags has FLAG_COSTS set, a float32 cost layer (rows * columns) follows the
+#terrain, starting at the next multiple of 64 bytes.
+#Loading memory-maps the file, so opening even a huge map is instant and pages are
+#only read from disk when the cells in them are used.
+
+import struct
+
+import numpy as np
+
+MAGIC = b'PFM1'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+HEADER_SIZE = 64
+FLAG_COSTS = 1
+
+
+class MapFileError(ValueError):
+    pass
+
+
+def pack_header(rows, columns, flags=0):
+    return HEADER.pack(MAGIC, VERSION, flags, rows, columns).ljust(HEADER_SIZE, b'\0')
+
+
+def unpack_header(data):
+    if len(data) < HEADER_SIZE:
+        raise MapFileError("file is too short to be a map file")
+    magic, version, flags, rows, columns = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise MapFileError(f"not a map file (magic {magic!r})")
+    if version != VERSION:
+        raise MapFileError(f"unsupported map file version {version}")
+    return rows, columns, flags
+
+
+# Byte offset of the cost layer of a rows x columns map
+def costs_offset(rows, columns):
+    end = HEADER_SIZE + rows*columns
+    return -(-end // HEADER_SIZE) * HEADER_SIZE
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        return unpack_header(f.read(HEADER_SIZE))
+
+
+# Save a terrain array (and optionally a cost layer of the same shape) to a map file.
+# Both are written in blocks of rows, so they can themselves be memmaps bigger than memory
+def save_map(path, terrain, costs=None, block_rows=1024):
+    rows, columns = terrain.shape
+    if costs is not None and costs.shape != terrain.shape:
+        raise MapFileError(f"cost layer has shape {costs.shape}, terrain has {terrain.shape}")
+
+    with open(path, 'wb') as f:
+        f.write(pack_header(rows, columns, FLAG_COSTS if costs is not None else 0))
+        for row in range(0, rows, block_rows):
+            f.write(np.ascontiguousarray(terrain[row:row+block_rows], dtype=np.uint8).tobytes())
+        if costs is not None:
+            f.write(b'\0' * (costs_offset(rows, columns) - f.tell()))
+            for row in range(0, rows, block_rows):
+                f.write(np.ascontiguousarray(costs[row:row+block_rows], dtype=np.float32).tobytes())
+
+
+# Open a map file without reading it: returns (terrain, costs) as numpy.memmap arrays
+# (costs is None when the file doesn't have a cost layer).
+# mode is the numpy.memmap mode: 'r' read only, 'r+' write through to the file, 'c' copy on write
+def load_map(path, mode='r'):
+    rows, columns, flags = read_header(path)
+    terrain = np.memmap(path, dtype=np.uint8, mode=mode, offset=HEADER_SIZE, shape=(rows, columns))
+    costs = None
+    if flags & FLAG_COSTS:
+        costs = np.memmap(path, dtype=np.float32, mode=mode, offset=costs_offset(rows, columns), shape=(rows, columns))
+    return terrain, costs
+
+
+# Create a new (blank) map file of the given size and return it opened for writing,
+# so generators can fill it in place without the grid ever being in memory
+def create_map(path, rows, columns=None, costs=False):
+    if columns is None:
+        columns = rows
+    with open(path, 'wb') as f:
+        f.write(pack_header(rows, columns, FLAG_COSTS if costs else 0))
+        end = costs_offset(rows, columns) + rows*columns*4 if costs else HEADER_SIZE + rows*columns
+        f.truncate(end)
+    return load_map(path, mode='r+')
+
+
+# Write a map one row at a time, so the whole grid never has to be in memory.
+# The number of rows doesn't have to be known up front: the header is rewritten on close
+class MapWriter(object):
+    def __init__(self, path, columns, rows=0):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self.file = open(path, 'wb')
+        self.file.write(pack_header(rows, columns))
+
+    def write_row(self, row):
+        row = np.asarray(row, dtype=np.uint8)
+        if row.shape != (self.columns,):
+            raise MapFileError(f"row has shape {row.shape}, expected ({self.columns},)")
+        self.file.write(row.tobytes())
+        self.rows += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(pack_header(self.rows, self.columns))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Stream an iterable of rows (e.g. generators.eller_rows()) straight into a map file.
+# Returns the (rows, columns) written
+def write_rows(path, rows):
+    writer = None
+    try:
+        for row in rows:
+            if writer is None:
+                writer = MapWriter(path, len(row))
+            writer.write_row(row)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise MapFileError("no rows to write")
+    return writer.rows, writer.columns
@@ -0,0 +1,157 @@
+#Import maps and scenarios from the Moving AI grid pathfinding benchmarks
+#(https://movingai.com/benchmarks/formats.html) and run the scenarios with our solvers.
+#
+#    python movingai.py <file.scen> [--algorithm astar] [--maps <dir>] [--limit N] [--four-way]
+#
+#A .map file is a short header (type, height, width, "map") followed by one line of
+#characters per row. '.' and 'G' are open ground, 'S' (swamp) is open ground too,
+#'@', 'O', 'T' (trees) and 'W' (water) can't be entered.
+#A .scen file has a "version" line and then one tab separated line per scenario:
+#bucket, map, map width, map height, start x, start y, goal x, goal y, optimal length
+#where x is the column and y the row. The optimal lengths are for 8-way movement
+#(diagonal moves cost sqrt(2)) that never cuts the corner of a wall, which is how the
+#scenarios are run unless four-way movement is asked for.
+
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from terrain import BLANK, WALL
+from mapfile import write_rows
+import solvers
+
+# Byte translation table from map characters to terrain codes
+TERRAIN_CODES = {b'.': BLANK, b'G': BLANK, b'S': BLANK, b'@': WALL, b'O': WALL, b'T': WALL, b'W': WALL}
+TABLE = bytearray([WALL] * 256)
+for character, code in TERRAIN_CODES.items():
+    TABLE[ord(character)] = code
+TABLE = bytes(TABLE)
+
+Scenario = namedtuple('Scenario', ['bucket', 'map', 'width', 'height', 'start', 'goal', 'optimal_length'])
+
+
+class MovingAIError(ValueError):
+    pass
+
+
+# Read the header of a .map file, leaving f at the first row of the map
+def read_map_header(f):
+    header = {}
+    for line in f:
+        line = line.strip()
+        if line == b'map':
+            break
+        key, _, value = line.partition(b' ')
+        header[key.decode()] = value.decode()
+    else:
+        raise MovingAIError("map file has no 'map' line")
+    try:
+        return int(header['height']), int(header['width'])
+    except (KeyError, ValueError):
+        raise MovingAIError(f"bad map header: {header}")
+
+
+# Yield the rows of a .map file one at a time as terrain code arrays
+def iter_map_rows(path):
+    with open(path, 'rb') as f:
+        height, width = read_map_header(f)
+        for row in range(height):
+            line = f.readline().rstrip(b'\r\n')
+            if len(line) != width:
+                raise MovingAIError(f"row {row} of {path} has {len(line)} cells, expected {width}")
+            yield np.frombuffer(line.translate(TABLE), dtype=np.uint8)
+
+
+# Read a whole .map file into a terrain array
+def read_map(path):
+    with open(path, 'rb') as f:
+        height, width = read_map_header(f)
+    terrain = np.empty((height, width), dtype=np.uint8)
+    for row, codes in enumerate(iter_map_rows(path)):
+        terrain[row] = codes
+    return terrain
+
+
+# Convert a .map file into one of our map files without loading it all into memory
+def convert_map(path, out_path):
+    return write_rows(out_path, iter_map_rows(path))
+
+
+# Yield the scenarios in a .scen file
+def iter_scenarios(path):
+    with open(path) as f:
+        for number, line in enumerate(f):
+            if number == 0 and line.startswith('version'):
+                continue
+            if not line.strip():
+                continue
+            fields = line.rstrip('\r\n').split('\t')
+            if len(fields) != 9:
+                raise MovingAIError(f"line {number + 1} of {path} has {len(fields)} fields, expected 9")
+            bucket, map_name, width, height, start_x, start_y, goal_x, goal_y, optimal = fields
+            yield Scenario(int(bucket), map_name, int(width), int(height),
+                           (int(start_y), int(start_x)), (int(goal_y), int(goal_x)), float(optimal))
+
+
+# Solve every scenario in a .scen file with algorithm (one of solvers.ALGORITHMS).
+# Maps are looked up in map_dir (by default next to the .scen file) and loaded once.
+# Returns a dict of totals and the list of mismatches as (scenario, cost found)
+def run_scenarios(scen_path, algorithm='astar', map_dir=None, limit=None, tolerance=1e-4, diagonals=True, corner_cutting='never'):
+    if map_dir is None:
+        map_dir = os.path.dirname(scen_path)
+    maps = {}
+    mismatches = []
+    count = expanded = 0
+    search_time = 0
+
+    for scenario in iter_scenarios(scen_path):
+        if limit is not None and count >= limit:
+            break
+        if scenario.map not in maps:
+            maps[scenario.map] = read_map(os.path.join(map_dir, os.path.basename(scenario.map)))
+        terrain = maps[scenario.map]
+
+        start = time.perf_counter()
+        result = solvers.solve(terrain, scenario.start, scenario.goal, algorithm, diagonals, corner_cutting)
+        search_time += time.perf_counter() - start
+
+        count += 1
+        expanded += result.expanded
+        if abs(result.cost - scenario.optimal_length) > tolerance * max(1, scenario.optimal_length):
+            mismatches.append((scenario, result.cost))
+
+    report = {
+        'scenarios': count,
+        'mismatches': len(mismatches),
+        'search_time': search_time,
+        'queries_per_second': count / search_time if search_time else 0,
+        'expanded_per_second': expanded / search_time if search_time else 0,
+        'mean_expanded': expanded / count if count else 0,
+    }
+    return report, mismatches
+
+
+def print_report(report, mismatches, show=10):
+    print(f"{report['scenarios']} scenarios in {report['search_time']:.3f} s: "
+          f"{report['queries_per_second']:.1f} queries/s, {report['expanded_per_second']:.0f} nodes/s, "
+          f"{report['mean_expanded']:.0f} nodes expanded on average")
+    print(f"{report['mismatches']} costs differ from the reference optimal length")
+    for scenario, cost in mismatches[:show]:
+        print(f"    {scenario.map} {scenario.start} -> {scenario.goal}: found {cost}, optimal {scenario.optimal_length}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run Moving AI benchmark scenarios")
+    parser.add_argument('scen', help=".scen file")
+    parser.add_argument('--algorithm', default='astar', choices=list(solvers.ALGORITHMS))
+    parser.add_argument('--maps', default=None, help="directory with the .map files (default: next to the .scen file)")
+    parser.add_argument('--limit', type=int, default=None, help="only run the first LIMIT scenarios")
+    parser.add_argument('--four-way', action='store_true', help="don't move diagonally (costs won't match the optimal lengths)")
+    parser.add_argument('--corner-cutting', default='never', choices=list(solvers.CORNER_CUTTING))
+    args = parser.parse_args()
+
+    print_report(*run_scenarios(args.scen, args.algorithm, args.maps, args.limit,
+                                diagonals=not args.four_way, corner_cutting=args.corner_cutting))
@@ -0,0 +1,210 @@
+#A compressed path database for maps that don't change: for every open cell (the source)
+#it stores the first move of a shortest path to every other open cell (the target).
+#Paths are then read off the tables one move at a time, with no search.
+#
+#    database = PathDatabase(terrain)
+#    result = database.path(start, goal)
+#
+#Each source's table is run-length compressed over an ordering of the target cells.
+#Neighbouring cells mostly share a first move, so the default depth-first ordering
+#(which keeps cells that are close together next to each other) gives long runs.
+#Finding the run a target is in is a binary search, so extracting a path takes
+#O(path length * log runs).
+#
+#Building it is quadratic in the number of open cells, so it is meant for small and
+#medium maps.
+
+import bisect
+import heapq
+import time
+from math import inf
+
+import numpy as np
+
+from terrain import COSTS
+from solvers import Result
+
+STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+# First move for a target that is the source itself, or can't be reached from it
+ANY_MOVE = 0
+
+
+# Order the open cells depth first, so cells that are close in the ordering are close on the map
+def dfs_order(passable):
+    rows, columns = passable.shape
+    passable = passable.tolist()
+    seen = [[False] * columns for row in range(rows)]
+    order = []
+    for row in range(rows):
+        for column in range(columns):
+            if not passable[row][column] or seen[row][column]:
+                continue
+            seen[row][column] = True
+            stack = [(row, column)]
+            while stack:
+                cell = stack.pop()
+                order.append(cell)
+                for row_step, column_step in STEPS:
+                    neighbour_row, neighbour_column = cell[0] + row_step, cell[1] + column_step
+                    if 0 <= neighbour_row < rows and 0 <= neighbour_column < columns and passable[neighbour_row][neighbour_column] and not seen[neighbour_row][neighbour_column]:
+                        seen[neighbour_row][neighbour_column] = True
+                        stack.append((neighbour_row, neighbour_column))
+    return order
+
+
+def row_order(passable):
+    return list(map(tuple, np.argwhere(passable).tolist()))
+
+
+ORDERS = {'dfs': dfs_order, 'rows': row_order}
+
+
+# Dijkstra's algorithm from one source over the open cells (numbered by their place in
+# the ordering). neighbours[cell] lists (neighbour, cost of entering it, move code).
+# Returns the first move towards every cell (ANY_MOVE for the source and the cells
+# it can't reach) and the distances
+def first_moves(neighbours, source):
+    distances = [inf] * len(neighbours)
+    moves = bytearray(len(neighbours))
+    distances[source] = 0
+    for neighbour, cost, code in neighbours[source]:
+        distances[neighbour] = cost
+        moves[neighbour] = code
+    heap = [(distances[neighbour], neighbour) for neighbour, cost, code in neighbours[source]]
+    heapq.heapify(heap)
+    while heap:
+        distance, cell = heapq.heappop(heap)
+        if distance > distances[cell]:
+            continue
+        move = moves[cell]
+        for neighbour, cost, code in neighbours[cell]:
+            new_distance = distance + cost
+            if new_distance < distances[neighbour]:
+                distances[neighbour] = new_distance
+                moves[neighbour] = move
+                heapq.heappush(heap, (new_distance, neighbour))
+    return moves, distances
+
+
+# Position of every open cell in the ordering, -1 for walls
+def rank_cells(shape, order):
+    rank = np.full(shape, -1, dtype=np.int64)
+    if len(order):
+        order_rows, order_columns = np.asarray(order).T
+        rank[order_rows, order_columns] = np.arange(len(order))
+    return rank
+
+
+# Build the compressed tables of a terrain array, as a dict of arrays:
+#   order       (cells, 2) the open cells in the order the targets are numbered
+#   region      connected region of every open cell, to answer unreachable queries without a table
+#   offsets     source i has the runs offsets[i] to offsets[i + 1]
+#   run_starts  target number each run starts at
+#   run_moves   first move (1 + index in STEPS) of each run
+def build_tables(terrain, order='dfs'):
+    terrain = np.asarray(terrain)
+    rows, columns = terrain.shape
+    costs = COSTS[terrain]
+    order = ORDERS[order](costs < inf)
+    count = len(order)
+
+    # Open neighbours of every open cell as (rank, cost of entering it, move code)
+    rank = rank_cells(terrain.shape, order).tolist()
+    cost_list = costs.tolist()
+    neighbours = []
+    for row, column in order:
+        cell_neighbours = []
+        for code, (row_step, column_step) in enumerate(STEPS, 1):
+            neighbour_row, neighbour_column = row + row_step, column + column_step
+            if 0 <= neighbour_row < rows and 0 <= neighbour_column < columns and rank[neighbour_row][neighbour_column] >= 0:
+                cell_neighbours.append((rank[neighbour_row][neighbour_column], cost_list[neighbour_row][neighbour_column], code))
+        neighbours.append(cell_neighbours)
+
+    region = np.full(count, -1, dtype=np.int32)
+    offsets = [0]
+    run_starts = []
+    run_moves = []
+    for source in range(count):
+        moves, distances = first_moves(neighbours, source)
+        row = np.frombuffer(moves, dtype=np.uint8)
+        if region[source] < 0:
+            region[np.isfinite(distances)] = source
+        # Let targets that don't care take the move before them, so runs join up
+        known = np.flatnonzero(row != ANY_MOVE)
+        if len(known):
+            row = row[known[np.maximum(np.searchsorted(known, np.arange(count), side='right') - 1, 0)]]
+        starts = np.flatnonzero(np.diff(row, prepend=np.uint8(255)))
+        run_starts.append(starts.astype(np.uint32))
+        run_moves.append(row[starts])
+        offsets.append(offsets[-1] + len(starts))
+
+    return {
+        'order': np.array(order, dtype=np.int32).reshape(count, 2),
+        'region': region,
+        'offsets': np.array(offsets, dtype=np.uint32),
+        'run_starts': np.concatenate(run_starts) if run_starts else np.empty(0, dtype=np.uint32),
+        'run_moves': np.concatenate(run_moves) if run_moves else np.empty(0, dtype=np.uint8),
+    }
+
+
+class PathDatabase(object):
+    # With an ArtifactCache (see cache.py) the tables are only built the first time a map is seen
+    def __init__(self, terrain, order='dfs', cache=None):
+        started = time.perf_counter()
+        terrain = np.asarray(terrain)
+        if cache is not None:
+            tables = cache.get_or_build(terrain, 'pathdb', lambda: build_tables(terrain, order), order=order)
+        else:
+            tables = build_tables(terrain, order)
+        self.build_time = time.perf_counter() - started
+
+        self.shape = terrain.shape
+        self.costs = COSTS[terrain].tolist()
+        self.order = list(map(tuple, tables['order'].tolist()))
+        self.rank = rank_cells(terrain.shape, self.order)
+        self.offsets = tables['offsets']
+        self.run_starts = tables['run_starts']
+        self.run_moves = tables['run_moves']
+        # Lists for the lookups, indexing numpy arrays one item at a time is slow
+        self.offsets_list = self.offsets.tolist()
+        self.starts_list = self.run_starts.tolist()
+        self.moves_list = self.run_moves.tolist()
+        self.rank_list = self.rank.tolist()
+        self.region = tables['region'].tolist()
+
+    # First move of a shortest path from source to target, as a (row step, column step)
+    def first_move(self, source, target):
+        index = self.rank_list[source[0]][source[1]]
+        run = bisect.bisect_right(self.starts_list, self.rank_list[target[0]][target[1]], self.offsets_list[index], self.offsets_list[index + 1]) - 1
+        return STEPS[self.moves_list[run] - 1]
+
+    def path(self, start, goal):
+        ranks = self.rank_list
+        source, target = ranks[start[0]][start[1]], ranks[goal[0]][goal[1]]
+        if source < 0 or target < 0 or self.region[source] != self.region[target]:
+            return Result(None, inf, 0)
+        offsets = self.offsets_list
+        starts = self.starts_list
+        moves = self.moves_list
+
+        path = [start]
+        cost = 0
+        node = start
+        while node != goal:
+            source = ranks[node[0]][node[1]]
+            run = bisect.bisect_right(starts, target, offsets[source], offsets[source + 1]) - 1
+            row_step, column_step = STEPS[moves[run] - 1]
+            node = (node[0] + row_step, node[1] + column_step)
+            cost += self.costs[node[0]][node[1]]
+            path.append(node)
+        return Result(path, cost, 0)
+
+    # Bytes used by the compressed tables
+    def size(self):
+        return self.offsets.nbytes + self.run_starts.nbytes + self.run_moves.nbytes
+
+    def stats(self):
+        count = len(self.order)
+        return {'cells': count, 'runs': len(self.run_starts), 'runs_per_source': len(self.run_starts) / count if count else 0,
+                'bytes': self.size(), 'uncompressed_bytes': count * count, 'build_time': self.build_time}
@@ -1,17 +1,51 @@
 import heapq
+from itertools import count
+
+# How AStarQueue orders nodes with the same priority (f):
+# smaller-g      the node with the smaller distance from the start first
+# larger-g       the node with the larger distance first (closest to the goal for A*)
+# smaller-h      the node with the smaller heuristic first (priority - distance)
+# fifo / lifo    the node pushed first / last
+# cross-product  the node with the smaller tie value given to push(): solvers.py uses
+#                how far it is from the straight line between start and goal
+TIE_BREAKING = ['smaller-g', 'larger-g', 'smaller-h', 'fifo', 'lifo', 'cross-product']
 
 class AStarQueue(object):
-    def __init__(self):
+    def __init__(self, tie_breaking='smaller-g'):
+        if tie_breaking not in TIE_BREAKING:
+            raise ValueError(f"tie_breaking must be one of: {TIE_BREAKING}")
         self.myheap = []
+        self.tie_breaking = tie_breaking
+        self.counter = count()
 
     def show(self):
         return self.myheap
 
-    def push(self, priority, distance, node):
-        heapq.heappush(self.myheap, (priority, distance, node))
+    # Entries are (priority, tie key, distance, node), so remaining ties still go to
+    # the smaller distance and then the node
+    def push(self, priority, distance, node, tie=0):
+        tie_breaking = self.tie_breaking
+        if tie_breaking == 'smaller-g':
+            key = distance
+        elif tie_breaking == 'larger-g':
+            key = -distance
+        elif tie_breaking == 'smaller-h':
+            key = priority - distance
+        elif tie_breaking == 'fifo':
+            key = next(self.counter)
+        elif tie_breaking == 'lifo':
+            key = -next(self.counter)
+        else:
+            key = tie
+        heapq.heappush(self.myheap, (priority, key, distance, node))
 
     def pop(self):
-        priority, distance, node = heapq.heappop(self.myheap)
+        priority, key, distance, node = heapq.heappop(self.myheap)
+        return priority, distance, node
+
+    # The entry pop() would return, without removing it
+    def peek(self):
+        priority, key, distance, node = self.myheap[0]
         return priority, distance, node
 
 
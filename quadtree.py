@@ -0,0 +1,249 @@
+#Quadtree decomposition of a terrain array into square blocks that all cost the same to
+#cross, for maps with big open or mud areas (noise_terrain(), random_terrain() in grid.py).
+#A search first finds a path through the blocks, then finds the path of cells inside the
+#blocks on that path (and the blocks next to them), so a big block is one node instead of
+#hundreds of cells.
+#
+#    tree = QuadTree(terrain)
+#    result = tree.astar(start, goal)
+#    terrain[row, column] = MUD
+#    tree.update([(row, column)])
+#
+#The blocks are the leaves of a quadtree over the map padded to a power of two: a square
+#is split in four until every part has one cost. owner[row, column] is the block a cell is
+#in, and blocks[block] is its (row, column, size, cost), None for blocks that have been
+#replaced. After cells are painted update() only builds the part of the tree around them
+#again: the block they were in, or the biggest square around it that has become one cost.
+#The indices of replaced blocks are given to new ones, so painting over and over doesn't
+#make the list of blocks grow.
+#
+#The path found is the shortest inside the blocks searched, not always the shortest on
+#the map. Only 4-way movement is supported.
+
+from math import inf
+
+import numpy as np
+
+from priority_queue import AStarQueue
+from terrain import COSTS
+from solvers import COST_LIST, Result, get_neighbours, manhattan
+
+# Terrain codes that cost the same share a class, so blank, start and end cells go in one block
+COST_CLASSES = np.unique(COSTS, return_inverse=True)[1].astype(np.int8)
+
+# Class of squares outside the map, and of squares that have to be split
+OUTSIDE = -1
+MIXED = -2
+
+
+# Split a size x size square (size a power of two) of cost classes into blocks. Each level
+# halves the squares: a square is one block when its four quarters are blocks of the same
+# class, or are outside the map. Returns the blocks as (row, column, size) and, for every
+# cell, the index of its block
+def decompose(classes, size):
+    height, width = classes.shape
+    level = np.full((size, size), OUTSIDE, dtype=np.int8)
+    level[:height, :width] = classes
+    levels = [level]
+    while level.shape[0] > 1:
+        half = level.shape[0] // 2
+        quarters = level.reshape(half, 2, half, 2).transpose(0, 2, 1, 3).reshape(half, half, 4)
+        highest = quarters.max(axis=2)
+        lowest = np.where(quarters == OUTSIDE, np.iinfo(np.int8).max, quarters).min(axis=2)
+        level = np.where((quarters == MIXED).any(axis=2), MIXED,
+                         np.where(highest == OUTSIDE, OUTSIDE, np.where(highest == lowest, highest, MIXED))).astype(np.int8)
+        levels.append(level)
+
+    # Blocks are the squares of one class whose parent is mixed, from the biggest down
+    blocks = []
+    owner = np.full((size, size), -1, dtype=np.int32)
+    parent_mixed = np.ones((1, 1), dtype=bool)
+    for depth in range(len(levels) - 1, -1, -1):
+        level = levels[depth]
+        block_size = 1 << depth
+        leaves = (level >= 0) & parent_mixed
+        indices = np.full(level.shape, -1, dtype=np.int32)
+        positions = np.argwhere(leaves)
+        indices[leaves] = np.arange(len(blocks), len(blocks) + len(positions))
+        blocks.extend((row * block_size, column * block_size, block_size) for row, column in positions.tolist())
+        expanded = np.repeat(np.repeat(indices, block_size, axis=0), block_size, axis=1)
+        np.copyto(owner, expanded, where=expanded >= 0)
+        if depth:
+            parent_mixed = np.repeat(np.repeat(level == MIXED, 2, axis=0), 2, axis=1)
+    return blocks, owner[:height, :width]
+
+
+class QuadTree(object):
+    def __init__(self, terrain):
+        self.terrain = terrain
+        self.rows, self.columns = terrain.shape
+        self.size = 1 << max(self.rows - 1, self.columns - 1, 0).bit_length()
+        self.blocks = []
+        # Indices of replaced blocks, for new blocks to take
+        self.free = []
+        self.owner = np.full(terrain.shape, -1, dtype=np.int32)
+        self.build(0, 0, self.size)
+
+    # Make the blocks of the square at row, column (clipped to the map)
+    def build(self, row, column, size):
+        classes = COST_CLASSES[np.asarray(self.terrain[row:row + size, column:column + size])]
+        blocks, owner = decompose(classes, size)
+        indices = np.empty(len(blocks), dtype=np.int32)
+        for number, (block_row, block_column, block_size) in enumerate(blocks):
+            cell = (row + block_row, column + block_column)
+            block = (cell[0], cell[1], block_size, COST_LIST[self.terrain[cell]])
+            if self.free:
+                indices[number] = self.free.pop()
+                self.blocks[indices[number]] = block
+            else:
+                indices[number] = len(self.blocks)
+                self.blocks.append(block)
+        self.owner[row:row + size, column:column + size] = indices[owner]
+
+    # Build the tree again where cells were painted (after the terrain has been changed)
+    def update(self, cells):
+        terrain = self.terrain
+        for cell in cells:
+            row, column, size, cost = self.blocks[self.owner[cell]]
+            if COST_LIST[terrain[cell]] == cost:
+                continue
+            # Grow the square while it is all one cost, so blocks merge again
+            while size < self.size:
+                parent_size = size * 2
+                parent_row, parent_column = cell[0] // parent_size * parent_size, cell[1] // parent_size * parent_size
+                classes = COST_CLASSES[np.asarray(terrain[parent_row:parent_row + parent_size, parent_column:parent_column + parent_size])]
+                if classes.min() != classes.max():
+                    break
+                row, column, size = parent_row, parent_column, parent_size
+            for block in np.unique(self.owner[row:row + size, column:column + size]).tolist():
+                self.blocks[block] = None
+                self.free.append(block)
+            self.build(row, column, size)
+
+    # The end of a block (one past its last row and column), clipped to the map
+    def block_end(self, block):
+        row, column, size, cost = self.blocks[block]
+        return min(row + size, self.rows), min(column + size, self.columns)
+
+    # The open blocks that share an edge with a block
+    def neighbours(self, block):
+        row, column, size, cost = self.blocks[block]
+        owner = self.owner
+        if size == 1:
+            found = {owner[neighbour] for neighbour in get_neighbours((row, column), self.rows, self.columns)}
+        else:
+            end_row, end_column = self.block_end(block)
+            sides = []
+            if row > 0:
+                sides.append(owner[row - 1, column:end_column])
+            if end_row < self.rows:
+                sides.append(owner[end_row, column:end_column])
+            if column > 0:
+                sides.append(owner[row:end_row, column - 1])
+            if end_column < self.columns:
+                sides.append(owner[row:end_row, end_column])
+            found = np.unique(np.concatenate(sides)).tolist() if sides else []
+        return [neighbour for neighbour in found if self.blocks[neighbour][3] != inf]
+
+    # The cell of a block closest to a point
+    def closest_cell(self, block, point):
+        row, column, size, cost = self.blocks[block]
+        end_row, end_column = self.block_end(block)
+        return min(max(point[0], row), end_row - 1), min(max(point[1], column), end_column - 1)
+
+    # A* over the blocks. Each block is entered at the cell closest to where the search
+    # left the block before, and a move costs the cells crossed to get there.
+    # Returns the blocks from the start's to the goal's, and the number expanded
+    def block_path(self, start, goal):
+        start_block, goal_block = self.owner[start], self.owner[goal]
+        queue = AStarQueue('larger-g')
+        queue.push(manhattan(start, goal), 0, start_block)
+        points = {start_block: start}
+        distances = {start_block: 0}
+        came_from = {start_block: None}
+        closed = set()
+
+        while queue.show():
+            priority, distance, block = queue.pop()
+            if block in closed:
+                continue
+            closed.add(block)
+            if block == goal_block:
+                path = []
+                while block is not None:
+                    path.append(block)
+                    block = came_from[block]
+                path.reverse()
+                return path, len(closed)
+
+            point = points[block]
+            block_cost = self.blocks[block][3]
+            for neighbour in self.neighbours(block):
+                if neighbour in closed:
+                    continue
+                entry = goal if neighbour == goal_block else self.closest_cell(neighbour, point)
+                # Cross this block to its edge, then step into the neighbour (and on to the goal in its block)
+                crossing = manhattan(point, self.closest_cell(block, entry))
+                new_distance = distance + block_cost * crossing + self.blocks[neighbour][3] * manhattan(self.closest_cell(block, entry), entry)
+                if new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    points[neighbour] = entry
+                    came_from[neighbour] = block
+                    queue.push(new_distance + manhattan(entry, goal), new_distance, neighbour)
+        return None, len(closed)
+
+    # A* over the cells of a set of blocks
+    def refine(self, start, goal, allowed):
+        terrain = self.terrain
+        owner = self.owner
+        rows, columns = self.rows, self.columns
+        queue = AStarQueue('larger-g')
+        queue.push(manhattan(start, goal), 0, start)
+        distances = {start: 0}
+        came_from = {start: None}
+        closed = set()
+
+        while queue.show():
+            priority, distance, node = queue.pop()
+            if node in closed:
+                continue
+            closed.add(node)
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = came_from[node]
+                path.reverse()
+                return Result(path, distance, len(closed))
+            for neighbour in get_neighbours(node, rows, columns):
+                cost = COST_LIST[terrain[neighbour]]
+                if cost == inf or neighbour in closed or owner[neighbour] not in allowed:
+                    continue
+                new_distance = distance + cost
+                if new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    came_from[neighbour] = node
+                    queue.push(new_distance + manhattan(neighbour, goal), new_distance, neighbour)
+        return Result(None, inf, len(closed))
+
+    # Path from start to goal: blocks first, then the cells of the blocks on the way and
+    # of the blocks widen steps away from them. Result.expanded counts blocks and cells
+    def astar(self, start, goal, widen=1):
+        if COST_LIST[self.terrain[start]] == inf or COST_LIST[self.terrain[goal]] == inf:
+            return Result(None, inf, 0)
+        blocks, expanded = self.block_path(start, goal)
+        if blocks is None:
+            return Result(None, inf, expanded)
+        allowed = set(blocks)
+        border = blocks
+        for step in range(widen):
+            border = [neighbour for block in border for neighbour in self.neighbours(block) if neighbour not in allowed]
+            allowed.update(border)
+        result = self.refine(start, goal, allowed)
+        return Result(result.path, result.cost, expanded + result.expanded)
+
+    def stats(self):
+        blocks = [block for block in self.blocks if block is not None]
+        return {'cells': self.rows * self.columns, 'blocks': len(blocks),
+                'open_blocks': sum(1 for block in blocks if block[3] != inf),
+                'largest_block': max((block[2] for block in blocks), default=0)}
@@ -0,0 +1,51 @@
+import random
+
+# Create a set that can hand back a random member in O(1)
+# Items live in a list (so random.choice doesn't need to copy anything) and a dict
+# maps each item to its index in that list. Removal swaps the item with the last
+# element of the list and pops it, so add, remove and choice are all O(1)
+class RandomSet(object):
+    def __init__(self, items=()):
+        self.items = []
+        self.index = {}
+        self.update(items)
+
+    def show(self):
+        return self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.index:
+            self.index[item] = len(self.items)
+            self.items.append(item)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def remove(self, item):
+        position = self.index.pop(item)
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.index[last] = position
+
+    def discard(self, item):
+        if item in self.index:
+            self.remove(item)
+
+    def choice(self, rng=random):
+        return rng.choice(self.items)
+
+    def pop_random(self, rng=random):
+        item = self.choice(rng)
+        self.remove(item)
+        return item
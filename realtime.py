@@ -0,0 +1,154 @@
+#Real-time search for agents that have to move every frame. Each call to step() runs a
+#lookahead A* of at most `lookahead` expansions from where the agent is, learns better
+#heuristic values for the cells it expanded, and returns the next cell to move to. The
+#work per call is bounded by the lookahead however big the map is; the learned values
+#stop the agent going round in circles and let it reach the goal over many calls.
+#
+#    agent = RealTimeAgent(terrain, start, goal, lookahead=64)
+#    while agent.position != goal:
+#        position = agent.step()
+#
+#method='rtaa' (RTAA*) sets every expanded cell's value from the best cell left on the
+#open list in one pass. method='lrta' (LSS-LRTA*) propagates values back through the
+#expanded cells with a Dijkstra-like pass, which learns more per call at a higher cost.
+#The learned values depend on the goal: agents heading for the same goal can share one
+#heuristics dict, and keeping it between runs makes later trips faster.
+
+import heapq
+from math import inf
+
+from priority_queue import AStarQueue
+from solvers import COST_LIST, SQRT2, get_moves, manhattan, octile
+
+METHODS = ['rtaa', 'lrta']
+
+
+class RealTimeAgent(object):
+    def __init__(self, terrain, start, goal, lookahead=64, method='rtaa', heuristics=None, diagonals=False, corner_cutting='never'):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of: {METHODS}")
+        self.terrain = terrain
+        self.rows, self.columns = terrain.shape
+        self.position = start
+        self.goal = goal
+        self.lookahead = max(1, lookahead)
+        self.method = method
+        # Learned heuristic values, cells without one use the octile/Manhattan distance
+        self.heuristics = {} if heuristics is None else heuristics
+        self.diagonals = diagonals
+        self.corner_cutting = corner_cutting
+        self.distance_to_goal = octile if diagonals else manhattan
+        # Cells still to move along from the last lookahead, the next one last
+        self.plan = []
+        self.travelled = 0
+        self.expanded = 0
+
+    def heuristic(self, node):
+        value = self.heuristics.get(node)
+        return self.distance_to_goal(node, self.goal) if value is None else value
+
+    # Moves out of node as (neighbour, cost of the move)
+    def moves(self, node):
+        for neighbour, length in get_moves(node, self.terrain, self.rows, self.columns, self.diagonals, self.corner_cutting):
+            cost = COST_LIST[self.terrain[neighbour]]
+            if cost != inf:
+                yield neighbour, cost * length
+
+    # A* from the agent's position for at most lookahead expansions. Returns the cell to
+    # head for (the goal, or the best cell left on the open list), the distances found
+    # and parents, and the expanded cells
+    def search(self):
+        queue = AStarQueue('larger-g')
+        queue.push(self.heuristic(self.position), 0, self.position)
+        distances = {self.position: 0}
+        came_from = {self.position: None}
+        closed = []
+        closed_set = set()
+
+        while queue.show():
+            priority, distance, node = queue.peek()
+            if node in closed_set or distance != distances[node]:
+                queue.pop()
+                continue
+            if node == self.goal or len(closed) >= self.lookahead:
+                return node, distances, came_from, closed
+            queue.pop()
+            closed.append(node)
+            closed_set.add(node)
+            for neighbour, cost in self.moves(node):
+                new_distance = distance + cost
+                if neighbour not in closed_set and new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    came_from[neighbour] = node
+                    queue.push(new_distance + self.heuristic(neighbour), new_distance, neighbour)
+        # Nothing left on the open list: the goal can't be reached from here
+        return None, distances, came_from, closed
+
+    # RTAA*: every expanded cell is at least as far from the goal as best is from the
+    # goal plus the distance from the cell to best
+    def learn_rtaa(self, best, distances, closed):
+        target = distances[best] + self.heuristic(best)
+        for node in closed:
+            self.heuristics[node] = target - distances[node]
+
+    # LSS-LRTA*: set the expanded cells' values from the cells around them, nearest first
+    def learn_lrta(self, closed):
+        closed_set = set(closed)
+        for node in closed:
+            self.heuristics[node] = inf
+        # Start from the cells at the edge of the lookahead
+        heap = []
+        for node in closed:
+            for neighbour, cost in self.moves(node):
+                if neighbour not in closed_set:
+                    heap.append((self.heuristic(neighbour), neighbour))
+        heapq.heapify(heap)
+        while heap and closed_set:
+            value, node = heapq.heappop(heap)
+            if value > self.heuristic(node):
+                continue
+            closed_set.discard(node)
+            # The cost of a move is the cost of the cell entered, so look at moves into node
+            for neighbour, length in get_moves(node, self.terrain, self.rows, self.columns, self.diagonals, self.corner_cutting):
+                if neighbour in closed_set:
+                    new_value = value + COST_LIST[self.terrain[node]] * length
+                    if new_value < self.heuristics[neighbour]:
+                        self.heuristics[neighbour] = new_value
+                        heapq.heappush(heap, (new_value, neighbour))
+
+    # Look ahead (when there is no plan left), learn, and move one cell. Returns the new
+    # position, or None when the agent is at the goal or the goal can't be reached
+    def step(self):
+        if self.position == self.goal:
+            return None
+        if not self.plan or COST_LIST[self.terrain[self.plan[-1]]] == inf:
+            best, distances, came_from, closed = self.search()
+            self.expanded += len(closed)
+            if best is None:
+                self.plan = []
+                return None
+            if self.method == 'rtaa':
+                self.learn_rtaa(best, distances, closed)
+            else:
+                self.learn_lrta(closed)
+            self.plan = []
+            node = best
+            while node != self.position:
+                self.plan.append(node)
+                node = came_from[node]
+
+        previous = self.position
+        self.position = self.plan.pop()
+        cost = COST_LIST[self.terrain[self.position]]
+        self.travelled += cost if previous[0] == self.position[0] or previous[1] == self.position[1] else cost * SQRT2
+        return self.position
+
+    # Step until the goal (or max_steps). Returns the cells visited, from the start
+    def run(self, max_steps=10**6):
+        path = [self.position]
+        for tick in range(max_steps):
+            position = self.step()
+            if position is None:
+                break
+            path.append(position)
+        return path
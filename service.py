@@ -0,0 +1,366 @@
+#A local pathfinding service: maps are loaded once and path queries arrive over a Unix
+#or TCP socket. Queries for the same map and algorithm that arrive close together are
+#batched into one call to the solvers (or to a QueryPool of worker processes).
+#
+#    python service.py --unix /tmp/pathfinder.sock arena=arena.pfm maze=maze.pfm
+#    python service.py --port 7070 --processes 4 arena=arena.pfm
+#
+#and from another process:
+#
+#    with PathClient(unix='/tmp/pathfinder.sock') as client:
+#        result = client.find_path('arena', (0, 0), (10, 20), 'astar')
+#
+#Wire format: every message is a frame, a little-endian uint32 length followed by that many
+#bytes. A request starts with (uint32 request id, uint8 opcode):
+#    OP_PATH:  uint8 algorithm (index in ALGORITHM_NAMES), uint16 map name length, the map
+#              name (utf-8), uint32 start row, start column, goal row, goal column
+#    OP_STATS: nothing else
+#A response starts with (uint32 request id, uint8 status):
+#    STATUS_OK:      float64 cost, uint32 nodes expanded, uint32 path length, then the path
+#                    as uint32 (row, column) pairs
+#    STATUS_NO_PATH: uint32 nodes expanded
+#    STATUS_ERROR:   utf-8 error message
+#The response to OP_STATS is STATUS_OK followed by the statistics as utf-8 JSON.
+#Requests on one connection may be pipelined; responses carry the id of their request.
+
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from math import inf
+
+import numpy as np
+
+from mapfile import load_map
+from batch import QueryPool
+import solvers
+
+ALGORITHM_NAMES = list(solvers.ALGORITHMS)
+
+FRAME = struct.Struct('<I')
+REQUEST = struct.Struct('<IB')
+PATH_QUERY = struct.Struct('<BH')
+POINTS = struct.Struct('<IIII')
+RESPONSE = struct.Struct('<IB')
+FOUND = struct.Struct('<dII')
+NOT_FOUND = struct.Struct('<I')
+
+OP_PATH, OP_STATS = 1, 2
+STATUS_OK, STATUS_NO_PATH, STATUS_ERROR = 0, 1, 2
+
+MAX_FRAME = 16 * 2**20
+
+
+class ServiceError(Exception):
+    pass
+
+
+### WIRE FORMAT ###
+
+def encode_path_request(request_id, map_name, start, goal, algorithm='astar'):
+    name = map_name.encode()
+    return (REQUEST.pack(request_id, OP_PATH) + PATH_QUERY.pack(ALGORITHM_NAMES.index(algorithm), len(name))
+            + name + POINTS.pack(start[0], start[1], goal[0], goal[1]))
+
+
+def decode_path_request(payload):
+    algorithm, length = PATH_QUERY.unpack_from(payload, REQUEST.size)
+    offset = REQUEST.size + PATH_QUERY.size
+    map_name = payload[offset:offset + length].decode()
+    start_row, start_column, goal_row, goal_column = POINTS.unpack_from(payload, offset + length)
+    return map_name, ALGORITHM_NAMES[algorithm], (start_row, start_column), (goal_row, goal_column)
+
+
+def encode_result(request_id, result):
+    if result.path is None:
+        return RESPONSE.pack(request_id, STATUS_NO_PATH) + NOT_FOUND.pack(result.expanded)
+    path = np.asarray(result.path, dtype='<u4')
+    return RESPONSE.pack(request_id, STATUS_OK) + FOUND.pack(result.cost, result.expanded, len(path)) + path.tobytes()
+
+
+def decode_result(payload):
+    request_id, status = RESPONSE.unpack_from(payload)
+    if status == STATUS_ERROR:
+        raise ServiceError(payload[RESPONSE.size:].decode())
+    if status == STATUS_NO_PATH:
+        expanded, = NOT_FOUND.unpack_from(payload, RESPONSE.size)
+        return request_id, solvers.Result(None, inf, expanded)
+    cost, expanded, length = FOUND.unpack_from(payload, RESPONSE.size)
+    path = np.frombuffer(payload, dtype='<u4', count=length*2, offset=RESPONSE.size + FOUND.size).reshape(length, 2)
+    return request_id, solvers.Result([tuple(node) for node in path.tolist()], cost, expanded)
+
+
+def encode_error(request_id, message):
+    return RESPONSE.pack(request_id, STATUS_ERROR) + str(message).encode()
+
+
+### SERVER ###
+
+# Latency and throughput of one kind of request
+class EndpointStats(object):
+    def __init__(self, window=10000):
+        self.count = 0
+        self.errors = 0
+        self.total_latency = 0
+        self.latencies = deque(maxlen=window)
+
+    def add(self, latency, error=False):
+        self.count += 1
+        self.errors += error
+        self.total_latency += latency
+        self.latencies.append(latency)
+
+    def summary(self, uptime):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0
+
+        return {
+            'requests': self.count,
+            'errors': self.errors,
+            'per_second': self.count / uptime if uptime else 0,
+            'mean_ms': self.total_latency / self.count * 1000 if self.count else 0,
+            'p50_ms': percentile(0.5),
+            'p99_ms': percentile(0.99),
+        }
+
+
+class PathService(object):
+    # maps: name -> terrain array or path of a map file (opened with load_map)
+    # processes: 0 solves batches in a thread of this process, otherwise each map gets a
+    # QueryPool with that many worker processes
+    def __init__(self, maps, processes=0, max_batch=64, max_delay=0.002):
+        self.maps = {}
+        for name, terrain in maps.items():
+            if isinstance(terrain, str):
+                terrain, costs = load_map(terrain)
+            self.maps[name] = terrain
+        self.pools = {name: QueryPool(terrain, processes) for name, terrain in self.maps.items()} if processes else {}
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.maps)))
+        self.pending = defaultdict(list)
+        self.timers = {}
+        self.stats = defaultdict(EndpointStats)
+        self.batches = 0
+        self.batched_queries = 0
+        self.started = time.perf_counter()
+
+    # Blocking: solve a batch of (start, goal) pairs for one map and algorithm
+    def solve_batch(self, map_name, algorithm, pairs):
+        if map_name in self.pools:
+            return [result for index, result in self.pools[map_name].solve_many(pairs, algorithm)]
+        terrain = self.maps[map_name]
+        return [solvers.solve(terrain, start, goal, algorithm) for start, goal in pairs]
+
+    # Queue a query to go out with the next batch for its map and algorithm
+    def submit(self, map_name, algorithm, start, goal):
+        if map_name not in self.maps:
+            raise ServiceError(f"unknown map {map_name!r}")
+        rows, columns = self.maps[map_name].shape
+        for row, column in (start, goal):
+            if not (0 <= row < rows and 0 <= column < columns):
+                raise ServiceError(f"({row}, {column}) is outside the {rows}x{columns} map {map_name!r}")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (map_name, algorithm)
+        self.pending[key].append((start, goal, future))
+        if len(self.pending[key]) >= self.max_batch:
+            self.flush(key)
+        elif key not in self.timers:
+            self.timers[key] = loop.call_later(self.max_delay, self.flush, key)
+        return future
+
+    def flush(self, key):
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(key, [])
+        if batch:
+            asyncio.ensure_future(self.run_batch(key, batch))
+
+    async def run_batch(self, key, batch):
+        map_name, algorithm = key
+        self.batches += 1
+        self.batched_queries += len(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.solve_batch, map_name, algorithm, [(start, goal) for start, goal, future in batch])
+        except Exception as error:
+            for start, goal, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (start, goal, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def summary(self):
+        uptime = time.perf_counter() - self.started
+        return {
+            'uptime': uptime,
+            'maps': {name: list(terrain.shape) for name, terrain in self.maps.items()},
+            'batches': self.batches,
+            'mean_batch_size': self.batched_queries / self.batches if self.batches else 0,
+            'endpoints': {endpoint: stats.summary(uptime) for endpoint, stats in self.stats.items()},
+        }
+
+    async def handle_request(self, payload, write):
+        received = time.perf_counter()
+        request_id, opcode = REQUEST.unpack_from(payload)
+        endpoint = {OP_PATH: 'path', OP_STATS: 'stats'}.get(opcode, 'unknown')
+        error = False
+        try:
+            if opcode == OP_PATH:
+                map_name, algorithm, start, goal = decode_path_request(payload)
+                result = await self.submit(map_name, algorithm, start, goal)
+                response = encode_result(request_id, result)
+            elif opcode == OP_STATS:
+                response = RESPONSE.pack(request_id, STATUS_OK) + json.dumps(self.summary()).encode()
+            else:
+                raise ServiceError(f"unknown opcode {opcode}")
+        except Exception as exception:
+            error = True
+            response = encode_error(request_id, exception)
+        write(response)
+        self.stats[endpoint].add(time.perf_counter() - received, error)
+
+    async def handle_connection(self, reader, writer):
+        def write(payload):
+            writer.write(FRAME.pack(len(payload)) + payload)
+
+        tasks = set()
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(FRAME.size)
+                except asyncio.IncompleteReadError:
+                    break
+                length, = FRAME.unpack(header)
+                if length > MAX_FRAME:
+                    break
+                payload = await reader.readexactly(length)
+                # Handle requests concurrently so pipelined queries can share a batch
+                task = asyncio.ensure_future(self.handle_request(payload, write))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, unix=None, host='127.0.0.1', port=None):
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+        self.executor.shutdown()
+
+
+### CLIENT ###
+
+# Blocking client that keeps one connection open for all of its requests
+class PathClient(object):
+    def __init__(self, unix=None, host='127.0.0.1', port=None, timeout=None):
+        if unix is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(unix)
+        else:
+            self.socket = socket.create_connection((host, port))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(timeout)
+        self.file = self.socket.makefile('rb')
+        self.next_id = 0
+
+    def send(self, payload):
+        self.socket.sendall(FRAME.pack(len(payload)) + payload)
+
+    def receive(self):
+        header = self.file.read(FRAME.size)
+        if len(header) < FRAME.size:
+            raise ServiceError("connection closed by the server")
+        length, = FRAME.unpack(header)
+        return self.file.read(length)
+
+    def new_id(self):
+        self.next_id = (self.next_id + 1) % 2**32
+        return self.next_id
+
+    def find_path(self, map_name, start, goal, algorithm='astar'):
+        return self.find_paths(map_name, [(start, goal)], algorithm)[0]
+
+    # Send all the queries before reading any response, so the server can batch them.
+    # Every response is read before the first error is raised, so the connection can
+    # still be used afterwards
+    def find_paths(self, map_name, pairs, algorithm='astar'):
+        ids = []
+        for start, goal in pairs:
+            ids.append(self.new_id())
+            self.send(encode_path_request(ids[-1], map_name, start, goal, algorithm))
+        results = {}
+        for request in ids:
+            payload = self.receive()
+            request_id, status = RESPONSE.unpack_from(payload)
+            if status == STATUS_ERROR:
+                results[request_id] = ServiceError(payload[RESPONSE.size:].decode())
+            else:
+                results[request_id] = decode_result(payload)[1]
+        for query, request_id in enumerate(ids):
+            if isinstance(results[request_id], ServiceError):
+                raise ServiceError(f"query {query}: {results[request_id]}")
+        return [results[request_id] for request_id in ids]
+
+    def stats(self):
+        request_id = self.new_id()
+        self.send(REQUEST.pack(request_id, OP_STATS))
+        payload = self.receive()
+        response_id, status = RESPONSE.unpack_from(payload)
+        if status == STATUS_ERROR:
+            raise ServiceError(payload[RESPONSE.size:].decode())
+        return json.loads(payload[RESPONSE.size:].decode())
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve path queries on a set of maps")
+    parser.add_argument('maps', nargs='+', help="maps to serve, as name=path/to/map.pfm")
+    parser.add_argument('--unix', default=None, help="path of the Unix socket to listen on")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7070)
+    parser.add_argument('--processes', type=int, default=0, help="worker processes per map (0: solve in the server process)")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay', type=float, default=0.002, help="seconds to wait for more queries before running a batch")
+    args = parser.parse_args()
+
+    maps = dict(spec.split('=', 1) for spec in args.maps)
+    service = PathService(maps, args.processes, args.max_batch, args.max_delay)
+    try:
+        asyncio.run(service.serve(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,100 @@
+#A grid kept in multiprocessing.shared_memory, so worker processes can all search the
+#same map without each getting a pickled copy of it.
+#The shared block has the same layout as a map file (see mapfile.py): the header, the
+#uint8 terrain array and optionally the float32 cost layer. Workers only need the name
+#of the block to attach to it; the shape is read from the header.
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from mapfile import pack_header, unpack_header, costs_offset, HEADER_SIZE, FLAG_COSTS
+import solvers
+
+
+# Attach to a shared memory block created by another process, without taking ownership of it
+def attach_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every process that attaches registers the block with the
+        # resource tracker, which then unlinks it when the worker exits. Skip that
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedGrid(object):
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        rows, columns, flags = unpack_header(bytes(shm.buf[:HEADER_SIZE]))
+        self.shape = (rows, columns)
+        self.terrain = np.ndarray((rows, columns), dtype=np.uint8, buffer=shm.buf, offset=HEADER_SIZE)
+        self.costs = None
+        if flags & FLAG_COSTS:
+            self.costs = np.ndarray((rows, columns), dtype=np.float32, buffer=shm.buf, offset=costs_offset(rows, columns))
+
+        # Workers that attach must not change the map under each other
+        if not owner:
+            self.terrain.flags.writeable = False
+            if self.costs is not None:
+                self.costs.flags.writeable = False
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # Copy a terrain array (and optional cost layer) into a new shared memory block
+    @classmethod
+    def create(cls, terrain, costs=None, name=None):
+        rows, columns = terrain.shape
+        size = costs_offset(rows, columns) + rows*columns*4 if costs is not None else HEADER_SIZE + rows*columns
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:HEADER_SIZE] = pack_header(rows, columns, FLAG_COSTS if costs is not None else 0)
+        grid = cls(shm, owner=True)
+        grid.terrain[...] = terrain
+        if costs is not None:
+            grid.costs[...] = costs
+        return grid
+
+    # Attach (read only) to a block made by create() in another process
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_memory(name), owner=False)
+
+    # Detach from the block. The process that created it also frees it
+    def close(self):
+        self.terrain = self.costs = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+### WORKER PROCESSES ###
+
+# The grid a worker process is attached to
+worker_grid = None
+
+
+# Pool initializer: attach this worker to the shared grid called name
+def init_worker(name):
+    global worker_grid
+    worker_grid = SharedGrid.attach(name)
+
+
+# Solve one (start, goal, algorithm) query on the worker's grid. Only the query and the
+# Result cross the process boundary
+def worker_solve(query):
+    start, goal, algorithm = query
+    return solvers.solve(worker_grid.terrain, start, goal, algorithm)
@@ -0,0 +1,560 @@
+#Headless versions of the pathfinding algorithms in grid.py.
+#They work on a terrain array (see terrain.py), or anything else that can be indexed
+#with terrain[row, column] and has a .shape, and don't draw anything.
+#Every solver returns a Result: the path as a list of (row, column) from start to goal
+#(None when there is no path), its cost and the number of nodes expanded.
+#
+#With diagonals=True the solvers also move diagonally, at sqrt(2) times the cost of the
+#cell entered. corner_cutting (a key of CORNER_CUTTING) decides whether a diagonal move
+#may pass the corner of a wall.
+
+import heapq
+import time
+from array import array
+from collections import deque, namedtuple
+from itertools import chain, repeat
+from math import inf
+
+import numpy as np
+
+from priority_queue import AStarQueue
+from terrain import COSTS
+from clearance import clearance_map
+
+Result = namedtuple('Result', ['path', 'cost', 'expanded'])
+
+COST_LIST = COSTS.tolist()
+
+SQRT2 = 2 ** 0.5
+DIAGONAL_STEPS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# How many of the two cells beside a diagonal move may be blocked for the move to be
+# allowed: 'always' lets it squeeze between two walls, 'no-squeeze' lets it round the
+# corner of one wall and 'never' needs both cells to be open
+CORNER_CUTTING = {'always': 2, 'no-squeeze': 1, 'never': 0}
+
+
+# The 4 neighbours of a node that are inside a rows x columns grid
+def get_neighbours(node, rows, columns):
+    row, column = node
+    if row + 1 < rows:
+        yield (row + 1, column)
+    if row > 0:
+        yield (row - 1, column)
+    if column + 1 < columns:
+        yield (row, column + 1)
+    if column > 0:
+        yield (row, column - 1)
+
+
+# The diagonal neighbours of a node that can be moved to under a corner cutting rule.
+# With a clearance map (see clearance.py) the cells beside the move count as blocked
+# when an agent of agent_size doesn't fit on them
+def get_diagonal_neighbours(node, terrain, rows, columns, corner_cutting='never', clearance=None, agent_size=1):
+    allowed = CORNER_CUTTING[corner_cutting]
+    row, column = node
+    for row_step, column_step in DIAGONAL_STEPS:
+        neighbour_row, neighbour_column = row + row_step, column + column_step
+        if 0 <= neighbour_row < rows and 0 <= neighbour_column < columns:
+            if clearance is None:
+                blocked = (COST_LIST[terrain[neighbour_row, column]] == inf) + (COST_LIST[terrain[row, neighbour_column]] == inf)
+            else:
+                blocked = (clearance[neighbour_row, column] < agent_size) + (clearance[row, neighbour_column] < agent_size)
+            if blocked <= allowed:
+                yield (neighbour_row, neighbour_column)
+
+
+# Neighbours of a node as (neighbour, length of the move): 1 for straight moves, sqrt(2) diagonally
+def get_moves(node, terrain, rows, columns, diagonals=False, corner_cutting='never', clearance=None, agent_size=1):
+    moves = zip(get_neighbours(node, rows, columns), repeat(1))
+    if diagonals:
+        moves = chain(moves, zip(get_diagonal_neighbours(node, terrain, rows, columns, corner_cutting, clearance, agent_size), repeat(SQRT2)))
+    return moves
+
+
+def manhattan(node, goal):
+    return abs(goal[0] - node[0]) + abs(goal[1] - node[1])
+
+
+# Distance with diagonal moves allowed (admissible for 8-way movement, Manhattan isn't)
+def octile(node, goal):
+    row_distance = abs(goal[0] - node[0])
+    column_distance = abs(goal[1] - node[1])
+    return max(row_distance, column_distance) + (SQRT2 - 1) * min(row_distance, column_distance)
+
+
+# Follow came_from back from the goal and return the path from start to goal
+def trace_back(came_from, goal):
+    path = []
+    node = goal
+    while node is not None:
+        path.append(node)
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+# Follow parents back from the goal: a flat array or a dict that maps a cell id
+# (row * columns + column) to its parent's, -1 for none. Returns the path's cell ids as
+# an int32 array
+def trace_parents(parents, goal, columns):
+    path = array('i')
+    node = goal[0] * columns + goal[1]
+    while node >= 0:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return np.frombuffer(path, dtype=np.int32)
+
+
+def ids_to_cells(ids, columns):
+    rows, cells = np.divmod(np.asarray(ids), columns)
+    return list(zip(rows.tolist(), cells.tolist()))
+
+
+# A path of cell ids as its first cell and the straight runs after it, as
+# ((row step, column step), count) - a path of n cells along one line is a single run
+def run_length_path(ids, columns):
+    ids = np.asarray(ids)
+    if not len(ids):
+        return None, []
+    rows, cells = np.divmod(ids, columns)
+    start = (int(rows[0]), int(cells[0]))
+    row_steps, column_steps = np.diff(rows), np.diff(cells)
+    if not len(row_steps):
+        return start, []
+    # Where the step changes, and so where each run starts
+    changes = (row_steps[1:] != row_steps[:-1]) | (column_steps[1:] != column_steps[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(changes) + 1))
+    counts = np.diff(starts, append=len(row_steps))
+    runs = list(zip(zip(row_steps[starts].tolist(), column_steps[starts].tolist()), counts.tolist()))
+    return start, runs
+
+
+# The cells of a path from its first cell and runs (the opposite of run_length_path())
+def expand_runs(start, runs):
+    if start is None:
+        return None
+    path = [start]
+    row, column = start
+    for (row_step, column_step), count in runs:
+        for step in range(count):
+            row += row_step
+            column += column_step
+            path.append((row, column))
+    return path
+
+
+# Maps held in memory with up to this many cells keep a search's parents, distances and
+# expanded flags in flat arrays indexed by cell id (9 bytes a cell). Other maps, such as
+# memory-mapped files and chunked grids bigger than memory, use SparseArrays instead, so
+# a search only takes memory for the cells it reaches
+FLAT_SEARCH_CELLS = 2**22
+
+
+# A dict that reads as default for the keys it doesn't have, without adding them
+class SparseArray(dict):
+    def __init__(self, default):
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+
+# Parents, distances and expanded flags by cell id for a search on terrain
+def search_arrays(terrain):
+    rows, columns = terrain.shape
+    size = rows * columns
+    if isinstance(terrain, np.ndarray) and not isinstance(terrain, np.memmap) and size <= FLAT_SEARCH_CELLS:
+        return array('i', [-1]) * size, array('f', [inf]) * size, bytearray(size)
+    return SparseArray(-1), SparseArray(inf), SparseArray(0)
+
+
+# How dijkstra() returns paths: a list of (row, column), an int32 array of cell ids, or
+# the first cell and run-length steps from run_length_path()
+PATH_FORMATS = ['cells', 'ids', 'runs']
+
+
+# Cost of walking a path: the cost of every cell entered after the start,
+# times sqrt(2) when it is entered diagonally
+def path_cost(terrain, path):
+    cost = 0
+    for previous, node in zip(path, path[1:]):
+        step = COST_LIST[terrain[node]]
+        cost += step if previous[0] == node[0] or previous[1] == node[1] else step * SQRT2
+    return cost
+
+
+# Dijkstra's algorithm, or A* (astar=True) / greedy best-first search (greedy=True)
+# with a Manhattan distance heuristic (octile with diagonals).
+# A weight above 1 makes A* weighted: the heuristic is multiplied by it, so the search
+# heads for the goal more directly and the path costs at most weight times the shortest.
+# tie_breaking is how nodes with the same priority are ordered (see priority_queue.py).
+# Preferring the larger distance stops A* spreading over plateaus of equal priority.
+# An agent_size above 1 plans for an agent covering agent_size x agent_size cells, with
+# the node in its top left corner, using a clearance map (see clearance.py) made from the
+# terrain if one isn't given. Moves cost what the corner cell entered costs.
+# path_format (one of PATH_FORMATS) is what Result.path holds
+def dijkstra(terrain, start, goal, astar=False, greedy=False, diagonals=False, corner_cutting='never', weight=1, tie_breaking='larger-g', agent_size=1, clearance=None,
+             path_format='cells'):
+    if corner_cutting not in CORNER_CUTTING:
+        raise ValueError(f"corner_cutting must be one of: {list(CORNER_CUTTING)}")
+    if path_format not in PATH_FORMATS:
+        raise ValueError(f"path_format must be one of: {PATH_FORMATS}")
+    rows, columns = terrain.shape
+    if agent_size > 1:
+        if clearance is None:
+            clearance = clearance_map(terrain)
+        if clearance[start] < agent_size:
+            return Result(None, inf, 0)
+    else:
+        clearance = None
+    costs = COST_LIST
+    distance_to_goal = octile if diagonals else manhattan
+
+    def heuristic(node):
+        return weight * distance_to_goal(node, goal) if astar or greedy else 0
+
+    # For cross-product tie breaking: how far a node is from the line between start and goal
+    row_step, column_step = start[0] - goal[0], start[1] - goal[1]
+
+    def cross_product(node):
+        return abs((node[0] - goal[0]) * column_step - (node[1] - goal[1]) * row_step)
+
+    cross = tie_breaking == 'cross-product'
+    queue = AStarQueue(tie_breaking)
+    queue.push(heuristic(start), 0, start)
+    # Parent (-1 for none), shortest distance found and whether expanded, by cell id
+    # (row * columns + column). Distances are float32, the costs returned are exact
+    parents, distances, expanded = search_arrays(terrain)
+    distances[start[0] * columns + start[1]] = 0
+    count = 0
+
+    while queue.show():
+        priority, distance, node = queue.pop()
+        node_id = node[0] * columns + node[1]
+        if expanded[node_id]:
+            continue
+        expanded[node_id] = 1
+        count += 1
+        if node == goal:
+            path = trace_parents(parents, goal, columns)
+            if path_format == 'cells':
+                path = ids_to_cells(path, columns)
+            elif path_format == 'runs':
+                path = run_length_path(path, columns)
+            return Result(path, distance, count)
+
+        for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting, clearance, agent_size):
+            cost = costs[terrain[neighbour]]
+            neighbour_id = neighbour[0] * columns + neighbour[1]
+            if cost == inf or expanded[neighbour_id] or (clearance is not None and clearance[neighbour] < agent_size):
+                continue
+            new_distance = distance + cost * length
+            if new_distance < distances[neighbour_id]:
+                distances[neighbour_id] = new_distance
+                parents[neighbour_id] = node_id
+                priority = heuristic(neighbour) if greedy else new_distance + heuristic(neighbour)
+                queue.push(priority, new_distance, neighbour, cross_product(neighbour) if cross else 0)
+
+    return Result(None, inf, count)
+
+
+def astar(terrain, start, goal, diagonals=False, corner_cutting='never', tie_breaking='larger-g', agent_size=1, clearance=None, path_format='cells'):
+    return dijkstra(terrain, start, goal, astar=True, diagonals=diagonals, corner_cutting=corner_cutting, tie_breaking=tie_breaking,
+                    agent_size=agent_size, clearance=clearance, path_format=path_format)
+
+
+def weighted_astar(terrain, start, goal, diagonals=False, corner_cutting='never', weight=2, agent_size=1, clearance=None, path_format='cells'):
+    return dijkstra(terrain, start, goal, astar=True, diagonals=diagonals, corner_cutting=corner_cutting, weight=weight,
+                    agent_size=agent_size, clearance=clearance, path_format=path_format)
+
+
+def greedy(terrain, start, goal, diagonals=False, corner_cutting='never', agent_size=1, clearance=None, path_format='cells'):
+    return dijkstra(terrain, start, goal, greedy=True, diagonals=diagonals, corner_cutting=corner_cutting,
+                    agent_size=agent_size, clearance=clearance, path_format=path_format)
+
+
+# Anytime Repairing A* (ARA*): weighted A* with weight, then again with the weight
+# lowered by step each time down to 1, reusing the previous search instead of starting
+# over. Yields (bound, Result) for every path found, each path at most bound times
+# the cost of the shortest. Once a path has been found the search stops at the
+# deadline (seconds after the call), if one is given
+def ara_star_paths(terrain, start, goal, weight=3, step=0.5, deadline=None, diagonals=False, corner_cutting='never'):
+    if corner_cutting not in CORNER_CUTTING:
+        raise ValueError(f"corner_cutting must be one of: {list(CORNER_CUTTING)}")
+    started = time.perf_counter()
+    rows, columns = terrain.shape
+    costs = COST_LIST
+    distance_to_goal = octile if diagonals else manhattan
+
+    def heuristic(node):
+        return distance_to_goal(node, goal)
+
+    epsilon = max(1, weight)
+    distances = {start: 0}
+    came_from = {start: None}
+    queue = AStarQueue()
+    queue.push(epsilon * heuristic(start), 0, start)
+    open_nodes = {start}
+    # Nodes expanded in this search, and nodes that got shorter after being expanded
+    closed_nodes = set()
+    inconsistent = set()
+    expanded = 0
+    found = False
+
+    while True:
+        # Expand nodes until none in the queue could lead to a cheaper path to the goal
+        while queue.show():
+            priority, distance, node = queue.peek()
+            if node not in open_nodes or distance != distances[node]:
+                queue.pop()
+                continue
+            if distances.get(goal, inf) <= priority:
+                break
+            if found and deadline is not None and time.perf_counter() - started > deadline:
+                return
+            queue.pop()
+            open_nodes.discard(node)
+            closed_nodes.add(node)
+            expanded += 1
+
+            for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting):
+                cost = costs[terrain[neighbour]]
+                if cost == inf:
+                    continue
+                new_distance = distance + cost * length
+                if new_distance < distances.get(neighbour, inf):
+                    distances[neighbour] = new_distance
+                    came_from[neighbour] = node
+                    if neighbour in closed_nodes:
+                        inconsistent.add(neighbour)
+                    else:
+                        open_nodes.add(neighbour)
+                        queue.push(new_distance + epsilon * heuristic(neighbour), new_distance, neighbour)
+
+        if goal not in distances:
+            yield inf, Result(None, inf, expanded)
+            return
+        found = True
+
+        # The path is within epsilon of the shortest, and within the cost over the
+        # smallest unweighted f of the nodes still waiting to be expanded
+        waiting = [distances[node] + heuristic(node) for node in open_nodes | inconsistent]
+        lowest = min(waiting, default=inf)
+        bound = min(epsilon, distances[goal] / lowest) if distances[goal] > 0 and lowest > 0 else 1
+        # Nodes on the path may have got shorter since the goal was reached, so the
+        # path can cost less than distances[goal]
+        path = trace_back(came_from, goal)
+        yield max(1, bound), Result(path, path_cost(terrain, path), expanded)
+        if bound <= 1:
+            return
+
+        # No need to search again with a weight above the bound already reached
+        epsilon = max(1, min(epsilon - step, bound))
+        open_nodes |= inconsistent
+        inconsistent = set()
+        closed_nodes = set()
+        queue = AStarQueue()
+        for node in open_nodes:
+            queue.push(distances[node] + epsilon * heuristic(node), distances[node], node)
+
+
+# ARA* until the deadline (or until the path is the shortest). Returns the last path
+# found and its suboptimality bound
+def ara_star(terrain, start, goal, weight=3, step=0.5, deadline=None, diagonals=False, corner_cutting='never'):
+    bound, result = inf, Result(None, inf, 0)
+    for bound, result in ara_star_paths(terrain, start, goal, weight, step, deadline, diagonals, corner_cutting):
+        pass
+    return result, bound
+
+
+# Flood out from start over open cells, keeping at most limit of them. False when the
+# whole area was flooded without meeting the goal, True when it was met or the area is
+# too big to tell
+def area_reaches(terrain, start, goal, limit, diagonals=False, corner_cutting='never'):
+    rows, columns = terrain.shape
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting):
+            if COST_LIST[terrain[neighbour]] == inf:
+                continue
+            if neighbour == goal:
+                return True
+            if neighbour not in seen:
+                if len(seen) >= limit:
+                    return True
+                seen.add(neighbour)
+                queue.append(neighbour)
+    return False
+
+
+# IDA*: depth-first searches that go no further than a limit on the estimated path cost
+# (distance + heuristic), raising the limit each time to the lowest estimate that went
+# over it. Memory is the path being followed plus a transposition cache of up to
+# cache_size nodes, holding the shortest distance each was reached with in the current
+# search, so nodes reached again by a longer way aren't searched again. A bigger cache
+# means fewer nodes expanded; with a small one the number of paths tried grows
+# exponentially with the path length. The start's area is flooded first, up to
+# cache_size cells, so a goal that can't be reached from an area that small is found
+# without searching. Otherwise only max_expanded (if given) stops the search early
+def ida_star(terrain, start, goal, diagonals=False, corner_cutting='never', cache_size=2**16, max_expanded=None):
+    if corner_cutting not in CORNER_CUTTING:
+        raise ValueError(f"corner_cutting must be one of: {list(CORNER_CUTTING)}")
+    rows, columns = terrain.shape
+    costs = COST_LIST
+    distance_to_goal = octile if diagonals else manhattan
+    if start == goal:
+        return Result([start], 0, 0)
+    if cache_size and not area_reaches(terrain, start, goal, cache_size, diagonals, corner_cutting):
+        return Result(None, inf, 0)
+
+    # Moves out of a node as (estimate, distance, neighbour), most promising first
+    def successors(node, distance):
+        moves = []
+        for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting):
+            cost = costs[terrain[neighbour]]
+            if cost != inf:
+                new_distance = distance + cost * length
+                moves.append((new_distance + distance_to_goal(neighbour, goal), new_distance, neighbour))
+        moves.sort()
+        return iter(moves)
+
+    limit = distance_to_goal(start, goal)
+    expanded = 0
+    while True:
+        next_limit = inf
+        cache = {start: 0}
+        path = [start]
+        on_path = {start}
+        stack = [successors(start, 0)]
+        expanded += 1
+        while stack:
+            for estimate, distance, neighbour in stack[-1]:
+                if estimate > limit:
+                    next_limit = min(next_limit, estimate)
+                    continue
+                if neighbour in on_path or cache.get(neighbour, inf) <= distance:
+                    continue
+                if neighbour == goal:
+                    path.append(goal)
+                    return Result(path, distance, expanded)
+                if neighbour not in cache and len(cache) >= cache_size > 0:
+                    # Full: forget the node that was cached first
+                    del cache[next(iter(cache))]
+                if cache_size:
+                    cache[neighbour] = distance
+                path.append(neighbour)
+                on_path.add(neighbour)
+                stack.append(successors(neighbour, distance))
+                expanded += 1
+                if max_expanded is not None and expanded >= max_expanded:
+                    return Result(None, inf, expanded)
+                break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+        if next_limit == inf:
+            return Result(None, inf, expanded)
+        limit = next_limit
+
+
+# Beam search: breadth first, one move further each step, but keeping only the width
+# cells with the lowest estimated path cost (distance + heuristic) at each step.
+# Memory is about width times the length of the path. The path isn't always the
+# shortest, and if every cell kept at some step is a dead end no path is found even
+# when there is one. A wider beam finds better paths more often but expands more
+def beam_search(terrain, start, goal, width=64, diagonals=False, corner_cutting='never'):
+    if corner_cutting not in CORNER_CUTTING:
+        raise ValueError(f"corner_cutting must be one of: {list(CORNER_CUTTING)}")
+    rows, columns = terrain.shape
+    costs = COST_LIST
+    distance_to_goal = octile if diagonals else manhattan
+
+    came_from = {start: None}
+    beam = [(start, 0)]
+    expanded = 0
+    while beam:
+        if any(node == goal for node, distance in beam):
+            distance = next(distance for node, distance in beam if node == goal)
+            return Result(trace_back(came_from, goal), distance, expanded)
+        # Cells one move on from the beam, as cell -> (distance, parent)
+        candidates = {}
+        for node, distance in beam:
+            expanded += 1
+            for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting):
+                cost = costs[terrain[neighbour]]
+                if cost == inf or neighbour in came_from:
+                    continue
+                new_distance = distance + cost * length
+                if new_distance < candidates.get(neighbour, (inf, None))[0]:
+                    candidates[neighbour] = (new_distance, node)
+        kept = heapq.nsmallest(width, candidates.items(), key=lambda item: item[1][0] + distance_to_goal(item[0], goal))
+        beam = []
+        for neighbour, (distance, parent) in kept:
+            came_from[neighbour] = parent
+            beam.append((neighbour, distance))
+    return Result(None, inf, expanded)
+
+
+# Breadth-first (x='b') or depth-first (x='d') search. These ignore terrain costs
+# (and the extra length of diagonal moves) while searching, but the cost of the path
+# they find is still reported
+def xfs(terrain, start, goal, x='b', diagonals=False, corner_cutting='never'):
+    assert x == 'b' or x == 'd', "x should equal 'b' or 'd' to make this bfs or dfs"
+    if corner_cutting not in CORNER_CUTTING:
+        raise ValueError(f"corner_cutting must be one of: {list(CORNER_CUTTING)}")
+    rows, columns = terrain.shape
+    costs = COST_LIST
+
+    mydeque = deque([start])
+    came_from = {start: None}
+    visited_nodes = set()
+
+    while mydeque:
+        node = mydeque.pop() if x == 'd' else mydeque.popleft()
+        if node in visited_nodes:
+            continue
+        visited_nodes.add(node)
+        if node == goal:
+            path = trace_back(came_from, goal)
+            return Result(path, path_cost(terrain, path), len(visited_nodes))
+
+        for neighbour, length in get_moves(node, terrain, rows, columns, diagonals, corner_cutting):
+            if neighbour in visited_nodes or costs[terrain[neighbour]] == inf:
+                continue
+            # DFS follows the most recent parent, BFS keeps the first one (the shortest)
+            if x == 'd' or neighbour not in came_from:
+                came_from[neighbour] = node
+            mydeque.append(neighbour)
+
+    return Result(None, inf, len(visited_nodes))
+
+
+def bfs(terrain, start, goal, diagonals=False, corner_cutting='never'):
+    return xfs(terrain, start, goal, x='b', diagonals=diagonals, corner_cutting=corner_cutting)
+
+
+def dfs(terrain, start, goal, diagonals=False, corner_cutting='never'):
+    return xfs(terrain, start, goal, x='d', diagonals=diagonals, corner_cutting=corner_cutting)
+
+
+ALGORITHMS = {
+    'dijkstra': dijkstra,
+    'astar': astar,
+    'greedy': greedy,
+    'bfs': bfs,
+    'dfs': dfs,
+    'weighted_astar': weighted_astar,
+    'ida_star': ida_star,
+    'beam': beam_search,
+}
+
+
+# Run one of ALGORITHMS by name
+def solve(terrain, start, goal, algorithm='astar', diagonals=False, corner_cutting='never'):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"algorithm must be one of: {list(ALGORITHMS)}")
+    return ALGORITHMS[algorithm](terrain, start, goal, diagonals=diagonals, corner_cutting=corner_cutting)
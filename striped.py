@@ -0,0 +1,299 @@
+#Parallel search for a single query on a very large map. The grid is split into
+#horizontal stripes, one per worker process, and the search runs in synchronous rounds:
+#every worker expands the part of the frontier inside its stripe (with numpy, a whole
+#frontier at a time) and only the cells it reaches in the neighbouring stripes are sent
+#back, to be handed to the worker that owns them at the start of the next round.
+#
+#    with StripedSearch(terrain, processes=4) as search:
+#        result = search.bfs(start, goal)
+#        result = search.dijkstra(start, goal)
+#
+#bfs() is level synchronous: one round per BFS level, ignoring terrain costs like
+#solvers.bfs(). dijkstra() uses delta-stepping so mud costs are respected: distances are
+#grouped into buckets delta wide, cheap ("light") moves are relaxed in rounds until the
+#current bucket is settled, then expensive ("heavy") moves out of it once.
+#
+#The terrain is shared with the workers through a SharedGrid (see shared_grid.py). Each
+#worker keeps the distances of its own stripe and writes the move into every cell it
+#reaches into a shared array, which the main process follows back from the goal.
+
+import multiprocessing
+from multiprocessing import shared_memory
+from math import inf
+
+import numpy as np
+
+from shared_grid import SharedGrid, attach_memory
+from terrain import COSTS
+import solvers
+
+# Moves between cells, the code stored for a cell is 1 + the index of the move into it
+MOVES = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+EMPTY = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.uint8))
+
+
+def concatenate(parts):
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return EMPTY
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+### WORKER PROCESSES ###
+
+# The search state of one stripe, rows top to bottom (excluded)
+class Stripe(object):
+    def __init__(self, grid, moves, top, bottom):
+        self.rows, self.columns = grid.shape
+        self.terrain = grid.terrain.reshape(-1)
+        self.moves = moves
+        self.offset = top * self.columns
+        self.end = bottom * self.columns
+        self.distances = np.empty(self.end - self.offset, dtype=np.float64)
+
+    def reset(self, costs, delta, goal):
+        self.costs = costs
+        self.delta = delta
+        self.goal = goal - self.offset if self.offset <= goal < self.end else None
+        self.distances.fill(inf)
+        self.moves[self.offset:self.end] = 0
+        # Cells (local indices) reached but not expanded since, and the cells of the current bucket
+        self.active = np.empty(0, dtype=np.int64)
+        self.settled = []
+
+    # Lower the distance of the cells in (global ids, distances, move codes) where it's shorter
+    def apply(self, reached):
+        cells, distances, codes = reached
+        if not len(cells):
+            return
+        cells = cells - self.offset
+        # Keep the shortest distance to each cell
+        order = np.lexsort((distances, cells))
+        cells, distances, codes = cells[order], distances[order], codes[order]
+        first = np.ones(len(cells), dtype=bool)
+        first[1:] = cells[1:] != cells[:-1]
+        cells, distances, codes = cells[first], distances[first], codes[first]
+
+        shorter = distances < self.distances[cells]
+        cells = cells[shorter]
+        self.distances[cells] = distances[shorter]
+        self.moves[cells + self.offset] = codes[shorter]
+        self.active = np.union1d(self.active, cells)
+
+    # Cells reached from cells (local indices) by light or heavy moves, as (global ids, distances, move codes)
+    def relax(self, cells, light):
+        columns = self.columns
+        distances = self.distances[cells]
+        cells = cells + self.offset
+        rows, cols = np.divmod(cells, columns)
+        reached = []
+        for code, (row_step, column_step) in enumerate(MOVES, 1):
+            inside = (rows + row_step >= 0) & (rows + row_step < self.rows) & (cols + column_step >= 0) & (cols + column_step < columns)
+            neighbours = cells[inside] + row_step * columns + column_step
+            costs = self.costs[self.terrain[neighbours]]
+            keep = costs <= self.delta if light else (costs > self.delta) & (costs < inf)
+            neighbours = neighbours[keep]
+            reached.append((neighbours, distances[inside][keep] + costs[keep], np.full(len(neighbours), code, dtype=np.uint8)))
+        return concatenate(reached)
+
+    # Expand the active cells in the current bucket (below limit) by light moves,
+    # or expand the cells settled in it by heavy moves
+    def step(self, phase, limit, incoming):
+        self.apply(incoming)
+        expanded = 0
+        if phase == 'light':
+            current = self.distances[self.active] < limit
+            cells = self.active[current]
+            self.active = self.active[~current]
+            self.settled.append(cells)
+            expanded = len(cells)
+        else:
+            cells = np.concatenate(self.settled) if self.settled else EMPTY[0]
+            self.settled = []
+        reached = self.relax(cells, phase == 'light')
+
+        # Keep the cells inside the stripe, send the others to the stripes above and below
+        cells = reached[0]
+        up = cells < self.offset
+        down = cells >= self.end
+        self.apply(tuple(array[~(up | down)] for array in reached))
+        active_distances = self.distances[self.active]
+        return {
+            'up': tuple(array[up] for array in reached),
+            'down': tuple(array[down] for array in reached),
+            'more': bool((active_distances < limit).any()),
+            'next': active_distances.min() if len(active_distances) else inf,
+            'goal': self.distances[self.goal] if self.goal is not None else None,
+            'expanded': expanded,
+        }
+
+
+# Worker process: run the commands sent by StripedSearch on one stripe until it sends None
+def stripe_worker(connection, grid_name, moves_name, top, bottom):
+    grid = SharedGrid.attach(grid_name)
+    moves_memory = attach_memory(moves_name)
+    moves = np.ndarray(grid.shape[0] * grid.shape[1], dtype=np.uint8, buffer=moves_memory.buf)
+    stripe = Stripe(grid, moves, top, bottom)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            command, arguments = message
+            if command == 'reset':
+                connection.send(stripe.reset(*arguments))
+            else:
+                connection.send(stripe.step(command, *arguments))
+    finally:
+        del stripe, moves
+        grid.close()
+        moves_memory.close()
+
+
+### MAIN PROCESS ###
+
+class StripedSearch(object):
+    def __init__(self, terrain, processes=None, context=None):
+        if isinstance(terrain, SharedGrid):
+            self.grid = terrain
+            self.owns_grid = False
+        else:
+            self.grid = SharedGrid.create(terrain)
+            self.owns_grid = True
+        rows, columns = self.grid.shape
+        self.moves_memory = shared_memory.SharedMemory(create=True, size=rows * columns)
+        self.moves = np.ndarray((rows, columns), dtype=np.uint8, buffer=self.moves_memory.buf)
+
+        processes = min(processes or multiprocessing.cpu_count(), rows)
+        self.bounds = np.linspace(0, rows, processes + 1).astype(int)
+        context = multiprocessing.get_context(context)
+        self.connections = []
+        self.workers = []
+        for top, bottom in zip(self.bounds[:-1], self.bounds[1:]):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(target=stripe_worker, args=(worker_connection, self.grid.name, self.moves_memory.name, top, bottom), daemon=True)
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+    # Index of the stripe a row is in
+    def owner(self, row):
+        return int(np.searchsorted(self.bounds, row, side='right')) - 1
+
+    # Send every worker a command and wait for all the replies
+    def broadcast(self, command, arguments):
+        for connection, worker_arguments in zip(self.connections, arguments):
+            connection.send((command, worker_arguments))
+        return [connection.recv() for connection in self.connections]
+
+    # Hand the cells each stripe reached in its neighbours to them. Returns the cells
+    # for every stripe and the shortest distance among them
+    def route(self, replies):
+        incoming = []
+        for index in range(len(replies)):
+            parts = []
+            if index > 0:
+                parts.append(replies[index - 1]['down'])
+            if index + 1 < len(replies):
+                parts.append(replies[index + 1]['up'])
+            incoming.append(concatenate(parts))
+        shortest = min((reached[1].min() for reached in incoming if len(reached[1])), default=inf)
+        return incoming, shortest
+
+    # Delta-stepping from start until the goal is settled. Returns the distance to the goal
+    # (inf if it can't be reached) and the number of cells expanded
+    def search(self, start, goal, costs, delta):
+        rows, columns = self.grid.shape
+        goal_id = goal[0] * columns + goal[1]
+        goal_owner = self.owner(goal[0])
+        heavy = bool(((costs > delta) & (costs < inf)).any())
+        self.broadcast('reset', [(costs, delta, goal_id)] * len(self.connections))
+
+        incoming = [EMPTY] * len(self.connections)
+        incoming[self.owner(start[0])] = (np.array([start[0] * columns + start[1]]), np.zeros(1), np.zeros(1, dtype=np.uint8))
+        bucket = 0
+        expanded = 0
+        while True:
+            limit = (bucket + 1) * delta
+            # Light moves until no cell is left in the bucket in any stripe
+            while True:
+                replies = self.broadcast('light', [(limit, reached) for reached in incoming])
+                incoming, shortest = self.route(replies)
+                expanded += sum(reply['expanded'] for reply in replies)
+                if shortest >= limit and not any(reply['more'] for reply in replies):
+                    break
+            goal_distance = replies[goal_owner]['goal']
+            if goal_distance < limit:
+                return goal_distance, expanded
+
+            if heavy:
+                replies = self.broadcast('heavy', [(limit, reached) for reached in incoming])
+                incoming, shortest = self.route(replies)
+            following = min(shortest, min(reply['next'] for reply in replies))
+            if following == inf:
+                return inf, expanded
+            bucket = int(following // delta)
+
+    # Follow the moves stored by the workers back from the goal
+    def trace_back(self, start, goal):
+        path = [goal]
+        node = goal
+        while node != start:
+            row_step, column_step = MOVES[self.moves[node] - 1]
+            node = (node[0] - row_step, node[1] - column_step)
+            path.append(node)
+        path.reverse()
+        return path
+
+    # Level synchronous breadth-first search, ignoring terrain costs like solvers.bfs()
+    def bfs(self, start, goal):
+        costs = np.where(COSTS < inf, 1.0, inf)
+        distance, expanded = self.search(start, goal, costs, 1)
+        if distance == inf:
+            return solvers.Result(None, inf, expanded)
+        path = self.trace_back(start, goal)
+        return solvers.Result(path, solvers.path_cost(self.grid.terrain, path), expanded)
+
+    # Shortest path with terrain costs by delta-stepping. delta defaults to the
+    # cheapest move, which makes every bucket a single distance
+    def dijkstra(self, start, goal, delta=None):
+        if delta is None:
+            delta = COSTS[COSTS > 0].min()
+        distance, expanded = self.search(start, goal, COSTS, delta)
+        if distance == inf:
+            return solvers.Result(None, inf, expanded)
+        return solvers.Result(self.trace_back(start, goal), distance, expanded)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.moves = None
+        self.moves_memory.close()
+        self.moves_memory.unlink()
+        if self.owns_grid:
+            self.grid.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# One-off versions of StripedSearch.bfs() and .dijkstra(): start the workers, search, stop them
+def parallel_bfs(terrain, start, goal, processes=None):
+    with StripedSearch(terrain, processes) as search:
+        return search.bfs(start, goal)
+
+
+def parallel_dijkstra(terrain, start, goal, delta=None, processes=None):
+    with StripedSearch(terrain, processes) as search:
+        return search.dijkstra(start, goal, delta)
@@ -0,0 +1,33 @@
+#Array storage for grids, used by everything that doesn't need a pygame window.
+#A grid is a 2D numpy uint8 array (rows, columns) holding one terrain code per cell.
+#The codes are the index of the nodetype in Node.nodetypes (grid.py) so the two can
+#be converted back and forth without a lookup table.
+
+import numpy as np
+from math import inf
+
+NODETYPES = ['blank', 'start', 'end', 'wall', 'mud', 'dormant']
+BLANK, START, END, WALL, MUD, DORMANT = range(len(NODETYPES))
+
+# Cost of moving onto a cell of each type (same as Node.distance_modifiers)
+COSTS = np.array([1, 1, 1, inf, 3, inf], dtype=np.float64)
+
+# Cells that can never be entered
+BLOCKED = np.array([False, False, False, True, False, True])
+
+
+# Create an empty (all blank) terrain array
+def new_terrain(rows, columns=None):
+    if columns is None:
+        columns = rows
+    return np.zeros((rows, columns), dtype=np.uint8)
+
+
+# Per-cell movement cost for a terrain array (inf for walls)
+def cost_layer(terrain):
+    return COSTS[terrain]
+
+
+# Boolean mask of the cells that are walls (or dormant)
+def wall_mask(terrain):
+    return BLOCKED[terrain]